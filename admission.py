@@ -0,0 +1,236 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+LIMITES_HABILITADOS = os.getenv("LIMITES_HABILITADOS", "0") == "1"
+# Presupuesto de cada cliente en unidades de costo: recarga por segundo y ráfaga máxima
+TASA_CLIENTE = float(os.getenv("TASA_CLIENTE", "50"))
+RAFAGA_CLIENTE = float(os.getenv("RAFAGA_CLIENTE", "100"))
+# Presupuesto compartido por todos los clientes de cada ruta con costo propio
+TASA_RUTA = float(os.getenv("TASA_RUTA", "500"))
+RAFAGA_RUTA = float(os.getenv("RAFAGA_RUTA", "1000"))
+# Ruta exacta -> unidades que consume; el resto (p. ej. GET /productos/{id}) cuesta COSTO_BASE
+COSTOS_RUTA = {
+    ruta: float(costo)
+    for ruta, costo in (
+        par.split("=") for par in os.getenv(
+            "COSTOS_RUTA",
+            "/productos=3,/productos/buscar=5,/productos/top=2,/productos/facetas=2,"
+            "/productos/exportar=20,/productos/importar=20,/productos/bulk=10"
+        ).split(",") if par
+    )
+}
+COSTO_BASE = 1.0
+MAX_CLIENTES = int(os.getenv("MAX_CLIENTES", "10000"))
+MAX_CONCURRENTES = int(os.getenv("MAX_CONCURRENTES", "64"))
+MAX_COLA = int(os.getenv("MAX_COLA", "128"))
+ESPERA_MAXIMA_COLA = float(os.getenv("ESPERA_MAXIMA_COLA", "2"))
+# Retry-After sugerido cuando se rechaza por saturación y no por presupuesto
+REINTENTO_SATURADO = 1
+# Header que identifica al cliente (p. ej. X-Api-Key); vacío usa la IP de la conexión
+HEADER_CLIENTE = os.getenv("HEADER_CLIENTE", "").lower()
+RUTAS_EXENTAS = frozenset(("/metrics", "/limites/estadisticas", "/cache/estadisticas", "/debug/solicitudes-lentas"))
+
+
+class CubetaTokens:
+    """Token bucket que se recarga de forma perezosa al consultarlo: O(1) y sin temporizadores"""
+
+    __slots__ = ("capacidad", "tasa", "tokens", "ultimo")
+
+    def __init__(self, capacidad: float, tasa: float, ahora: float):
+        self.capacidad = capacidad
+        self.tasa = tasa
+        self.tokens = capacidad
+        self.ultimo = ahora
+
+    def espera(self, costo: float, ahora: float) -> float:
+        """Recarga y retorna los segundos que faltan para poder pagar `costo` (0 si ya alcanza)"""
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.tasa)
+        self.ultimo = ahora
+        faltante = min(costo, self.capacidad) - self.tokens
+        return faltante / self.tasa if faltante > 0 else 0.0
+
+    def descontar(self, costo: float):
+        self.tokens -= min(costo, self.capacidad)
+
+
+class LimitadorTasa:
+    """Presupuestos por cliente y por ruta; una solicitud paga su costo en ambos o en ninguno.
+
+    Los clientes se guardan en un LRU acotado: uno expulsado vuelve con la
+    cubeta llena, lo mismo que tendría tras estar inactivo.
+    """
+
+    def __init__(
+        self,
+        tasa_cliente: float = TASA_CLIENTE,
+        rafaga_cliente: float = RAFAGA_CLIENTE,
+        tasa_ruta: float = TASA_RUTA,
+        rafaga_ruta: float = RAFAGA_RUTA,
+        costos: Optional[Dict[str, float]] = None,
+        max_clientes: int = MAX_CLIENTES
+    ):
+        self.tasa_cliente = tasa_cliente
+        self.rafaga_cliente = rafaga_cliente
+        self.costos = COSTOS_RUTA if costos is None else costos
+        self.max_clientes = max_clientes
+        self._clientes: "OrderedDict[str, CubetaTokens]" = OrderedDict()
+        ahora = time.monotonic()
+        self._rutas = {ruta: CubetaTokens(rafaga_ruta, tasa_ruta, ahora) for ruta in self.costos}
+        self.rechazadas_cliente = 0
+        self.rechazadas_ruta = 0
+
+    def admitir(self, cliente: str, ruta: str, ahora: Optional[float] = None) -> float:
+        """0 si la solicitud entra; si no, los segundos a esperar antes de reintentar"""
+        ahora = time.monotonic() if ahora is None else ahora
+        costo = self.costos.get(ruta, COSTO_BASE)
+
+        cubeta = self._clientes.get(cliente)
+        if cubeta is None:
+            cubeta = self._clientes[cliente] = CubetaTokens(self.rafaga_cliente, self.tasa_cliente, ahora)
+            if len(self._clientes) > self.max_clientes:
+                self._clientes.popitem(last=False)
+        else:
+            self._clientes.move_to_end(cliente)
+
+        espera = cubeta.espera(costo, ahora)
+        if espera:
+            self.rechazadas_cliente += 1
+            return espera
+        cubeta_ruta = self._rutas.get(ruta)
+        if cubeta_ruta is not None:
+            espera = cubeta_ruta.espera(costo, ahora)
+            if espera:
+                self.rechazadas_ruta += 1
+                return espera
+            cubeta_ruta.descontar(costo)
+        cubeta.descontar(costo)
+        return 0.0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "clientes": len(self._clientes),
+            "rechazadas_cliente": self.rechazadas_cliente,
+            "rechazadas_ruta": self.rechazadas_ruta,
+            "tokens_por_ruta": {ruta: round(cubeta.tokens, 2) for ruta, cubeta in self._rutas.items()}
+        }
+
+
+class ControlAdmision:
+    """Limita las solicitudes en curso; las que sobran esperan en una cola FIFO acotada.
+
+    Con la cola llena, o si la espera supera `espera_maxima`, la solicitud se
+    rechaza de inmediato en lugar de sumar latencia a las que ya están dentro.
+    Solo se usa desde el event loop, así que no necesita locks.
+    """
+
+    def __init__(
+        self,
+        max_concurrentes: int = MAX_CONCURRENTES,
+        max_cola: int = MAX_COLA,
+        espera_maxima: float = ESPERA_MAXIMA_COLA
+    ):
+        self.max_concurrentes = max_concurrentes
+        self.max_cola = max_cola
+        self.espera_maxima = espera_maxima
+        self.en_curso = 0
+        self.en_cola = 0
+        self._cola: Deque[asyncio.Future] = deque()
+        self.admitidas = 0
+        self.encoladas = 0
+        self.rechazadas_cola_llena = 0
+        self.rechazadas_espera = 0
+
+    async def entrar(self) -> bool:
+        """True con un lugar reservado que hay que devolver con salir()"""
+        if self.en_curso < self.max_concurrentes and not self.en_cola:
+            self.en_curso += 1
+            self.admitidas += 1
+            return True
+        if self.en_cola >= self.max_cola:
+            self.rechazadas_cola_llena += 1
+            return False
+
+        turno = asyncio.get_running_loop().create_future()
+        self._cola.append(turno)
+        self.en_cola += 1
+        self.encoladas += 1
+        try:
+            # salir() traspasa su lugar resolviendo el turno, sin liberarlo en el medio
+            await asyncio.wait_for(turno, self.espera_maxima)
+        except asyncio.TimeoutError:
+            self.rechazadas_espera += 1
+            return False
+        except asyncio.CancelledError:
+            # El cliente se fue justo cuando recibía el lugar: se pasa al siguiente
+            if turno.done() and not turno.cancelled():
+                self.salir()
+            raise
+        finally:
+            self.en_cola -= 1
+        self.admitidas += 1
+        return True
+
+    def salir(self):
+        while self._cola:
+            turno = self._cola.popleft()
+            # Los turnos vencidos o cancelados quedaron en la cola; se descartan al pasar
+            if not turno.done():
+                turno.set_result(None)
+                return
+        self.en_curso -= 1
+
+    async def salir_al_terminar(self, cuerpo: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """Entrega el cuerpo de la respuesta y devuelve el lugar cuando termina, falla o se cancela"""
+        try:
+            async for fragmento in cuerpo:
+                yield fragmento
+        finally:
+            self.salir()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "max_concurrentes": self.max_concurrentes,
+            "max_cola": self.max_cola,
+            "en_curso": self.en_curso,
+            "en_cola": self.en_cola,
+            "admitidas": self.admitidas,
+            "encoladas": self.encoladas,
+            "rechazadas_cola_llena": self.rechazadas_cola_llena,
+            "rechazadas_espera": self.rechazadas_espera
+        }
+
+
+class Limites:
+    """Rate limiting y control de admisión que aplica el middleware de la API"""
+
+    def __init__(self, habilitados: bool = LIMITES_HABILITADOS):
+        self.habilitados = habilitados
+        self.tasa = LimitadorTasa()
+        self.admision = ControlAdmision()
+
+    @staticmethod
+    def cliente(request) -> str:
+        if HEADER_CLIENTE:
+            valor = request.headers.get(HEADER_CLIENTE)
+            if valor:
+                return valor
+        return request.client.host if request.client is not None else "desconocido"
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "habilitados": self.habilitados,
+            "tasa": self.tasa.estadisticas(),
+            "admision": self.admision.estadisticas()
+        }
+
+
+def segundos_retry_after(espera: float) -> str:
+    """Retry-After en segundos enteros, redondeado hacia arriba"""
+    return str(max(1, math.ceil(espera)))
+
+
+limites = Limites()
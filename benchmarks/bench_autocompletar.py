@@ -0,0 +1,79 @@
+"""Benchmark de autocompletar y de la búsqueda con errores de tipeo.
+
+Uso:
+    python benchmarks/bench_autocompletar.py --productos 100000
+
+Construye el índice de búsqueda sobre un catálogo sintético y compara:
+autocompletar con el trie contra recorrer todos los nombres y ordenar por
+rating, y la búsqueda difusa con el índice de borrados contra calcular la
+distancia de edición con cada token del vocabulario.
+"""
+import argparse
+import heapq
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datos import generar_productos
+from fuzzy import distancia_edicion, distancia_permitida
+from products import Producto
+from search import IndiceBusqueda, _PATRON_TOKEN
+
+PREFIJOS = ["l", "la", "lap", "mon", "auric"]
+CON_ERRORES = ["laptpo", "monitro", "cafetrea", "bicicelta", "inalambirco"]
+
+
+def micros(funcion, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main(argumentos):
+    productos = []
+    for datos in generar_productos(argumentos.productos):
+        producto = Producto(**datos)
+        producto.id = uuid4()
+        productos.append(producto)
+
+    indice = IndiceBusqueda()
+    inicio = time.perf_counter()
+    indice.reconstruir(productos)
+    print(f"catálogo: {len(productos)} productos, índice en {time.perf_counter() - inicio:.2f} s")
+
+    def autocompletar_recorriendo(prefijo, k):
+        return heapq.nsmallest(k, (
+            (-p.rating, p.id) for p in productos
+            if any(token.startswith(prefijo) for token in _PATRON_TOKEN.findall(p.nombre_clave))
+        ))
+
+    print(f"{'prefijo':>12} {'recorrido µs':>14} {'trie µs':>10}")
+    for prefijo in PREFIJOS:
+        esperado = [producto_id for _, producto_id in autocompletar_recorriendo(prefijo, argumentos.k)]
+        assert [producto_id for producto_id, _ in indice.autocompletar(prefijo, argumentos.k)] == esperado
+        recorrido = micros(lambda: autocompletar_recorriendo(prefijo, argumentos.k), 3)
+        trie = micros(lambda: indice.autocompletar(prefijo, argumentos.k), argumentos.repeticiones)
+        print(f"{prefijo:>12} {recorrido:>14.0f} {trie:>10.1f}")
+
+    vocabulario = list(indice._postings)
+    print(f"\nvocabulario: {len(vocabulario)} tokens")
+    print(f"{'palabra':>12} {'recorrido µs':>14} {'borrados µs':>12} {'tokens':>7}")
+    for palabra in CON_ERRORES:
+        maximo = distancia_permitida(palabra)
+        recorrido = micros(
+            lambda: [t for t in vocabulario if not t.isdigit() and distancia_edicion(palabra, t, maximo) <= maximo], 1
+        )
+        borrados = micros(lambda: indice._difuso.similares(palabra), argumentos.repeticiones)
+        print(f"{palabra:>12} {recorrido:>14.0f} {borrados:>12.1f} {len(indice._difuso.similares(palabra)):>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--productos", type=int, default=100_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeticiones", type=int, default=1000)
+    main(parser.parse_args())
@@ -0,0 +1,120 @@
+"""Benchmark de memoria y latencia de filtrado del almacén columnar.
+
+Uso:
+    python benchmarks/bench_columnar.py --productos 200000 --repeticiones 20
+
+Compara la lista de modelos original (recorrido lineal), ProductStore
+(índices en diccionarios) y ColumnStore (arrays NumPy) en memoria retenida
+por el catálogo y en latencia de filtros y de páginas ordenadas.
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from products import Producto
+from store import ProductStore
+from column_store import ColumnStore
+from utils import generar_timestamps
+from benchmarks.datos import generar_productos
+
+CONSULTAS = {
+    "categoria": {"categoria": "hogar"},
+    "disponible+precio": {"disponible": True, "precio_max": 500},
+    "combinado": {"disponible": True, "categoria": "Tecnología", "precio_max": 1000},
+    "selectivo": {"categoria": "Libros", "precio_max": 20},
+}
+
+
+def productos(cantidad: int):
+    fecha = generar_timestamps()["fecha_creacion"]
+    for datos in generar_productos(cantidad):
+        producto = Producto(**datos)
+        producto.id = uuid4()
+        producto.fecha_creacion = producto.fecha_actualizacion = fecha
+        yield producto
+
+
+def construir(fabrica: Callable, cantidad: int):
+    """Construye el catálogo y retorna (catálogo, MB retenidos, segundos)"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    catalogo = fabrica(productos(cantidad))
+    segundos = time.perf_counter() - inicio
+    gc.collect()
+    retenidos = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    return catalogo, retenidos, segundos
+
+
+def en_store(store):
+    def fabrica(fuente):
+        for producto in fuente:
+            store.agregar(producto)
+        return store
+    return fabrica
+
+
+def filtrar_lista(lista: List[Producto], disponible=None, categoria=None, precio_max=None):
+    """El recorrido lineal de filtrar_productos antes de los índices"""
+    return [
+        p for p in lista
+        if (disponible is None or p.disponible == disponible)
+        and (not categoria or p.categoria.lower() == categoria.lower())
+        and (precio_max is None or p.precio <= precio_max)
+    ]
+
+
+def medir(funcion: Callable, repeticiones: int) -> float:
+    """Milisegundos por llamada"""
+    funcion()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main(argumentos):
+    catalogos: Dict[str, object] = {}
+    print(f"{'catálogo':>14} {'MB':>9} {'carga s':>9}")
+    for nombre, fabrica in (
+        ("lista", list),
+        ("ProductStore", en_store(ProductStore())),
+        ("ColumnStore", en_store(ColumnStore())),
+    ):
+        catalogo, retenidos, segundos = construir(fabrica, argumentos.productos)
+        catalogos[nombre] = catalogo
+        print(f"{nombre:>14} {retenidos:>9.1f} {segundos:>9.2f}")
+
+    print(f"\n{'consulta (ms)':>18} {'filas':>8} {'lista':>9} {'ProductStore':>13} {'ColumnStore':>12}")
+    lista, indices, columnar = catalogos["lista"], catalogos["ProductStore"], catalogos["ColumnStore"]
+    for nombre, filtros in CONSULTAS.items():
+        filas = len(columnar.filtrar(**filtros))
+        tiempos = (
+            medir(lambda: filtrar_lista(lista, **filtros), argumentos.repeticiones),
+            medir(lambda: indices.filtrar(**filtros), argumentos.repeticiones),
+            medir(lambda: columnar.filtrar(**filtros), argumentos.repeticiones),
+        )
+        print(f"{nombre:>18} {filas:>8} {tiempos[0]:>9.2f} {tiempos[1]:>13.2f} {tiempos[2]:>12.2f}")
+
+    for nombre, filtros in CONSULTAS.items():
+        tiempos = (
+            medir(lambda: sorted(filtrar_lista(lista, **filtros), key=lambda p: p.precio)[:50], argumentos.repeticiones),
+            medir(lambda: indices.paginar(**filtros, ordenar_por="precio", limite=50), argumentos.repeticiones),
+            medir(lambda: columnar.paginar(**filtros, ordenar_por="precio", limite=50), argumentos.repeticiones),
+        )
+        print(f"{'página ' + nombre:>18} {50:>8} {tiempos[0]:>9.2f} {tiempos[1]:>13.2f} {tiempos[2]:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--productos", type=int, default=200_000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    main(parser.parse_args())
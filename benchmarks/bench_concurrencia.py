@@ -0,0 +1,59 @@
+"""Benchmark de carga: throughput de GET /productos/{id} según la concurrencia.
+
+Uso:
+    python benchmarks/bench_concurrencia.py --solicitudes 400 --concurrencias 1 10 50 100
+
+Con la latencia simulada en asyncio.sleep, el throughput debería crecer casi
+linealmente con la concurrencia hasta saturar la CPU.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from main import app
+from repository import repositorio
+
+
+async def medir(cliente: httpx.AsyncClient, url: str, solicitudes: int, concurrencia: int) -> float:
+    """Lanza las solicitudes con la concurrencia indicada y retorna solicitudes por segundo"""
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def una():
+        async with semaforo:
+            response = await cliente.get(url)
+            response.raise_for_status()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una() for _ in range(solicitudes)))
+    return solicitudes / (time.perf_counter() - inicio)
+
+
+async def main(argumentos):
+    repositorio.retraso = argumentos.retraso
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        response = await cliente.post("/productos", json={
+            "nombre": "Producto Benchmark",
+            "precio": 10.0,
+            "categoria": "Benchmark"
+        })
+        url = f"/productos/{response.json()['id']}"
+
+        print(f"retraso simulado: {argumentos.retraso}s, solicitudes por nivel: {argumentos.solicitudes}")
+        print(f"{'concurrencia':>12} {'req/s':>10}")
+        for concurrencia in argumentos.concurrencias:
+            rps = await medir(cliente, url, argumentos.solicitudes, concurrencia)
+            print(f"{concurrencia:>12} {rps:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solicitudes", type=int, default=400)
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--retraso", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
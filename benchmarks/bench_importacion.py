@@ -0,0 +1,80 @@
+"""Benchmark de importación y exportación del catálogo en streaming.
+
+Uso:
+    python benchmarks/bench_importacion.py --filas 50000 --formato csv
+
+Genera el archivo al vuelo, lo envía en chunks a POST /productos/importar y
+luego lee GET /productos/exportar; reporta filas por segundo de cada fase.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from main import app
+from repository import repositorio
+from catalog_io import fila_csv
+from benchmarks.datos import generar_productos
+
+COLUMNAS = ["nombre", "descripcion", "precio", "stock", "categoria", "disponible", "rating"]
+
+
+def generar_filas(cantidad: int, formato: str):
+    """Genera filas sintéticas sin materializar el archivo completo"""
+    if formato == "csv":
+        yield ",".join(COLUMNAS) + "\n"
+    for datos in generar_productos(cantidad):
+        if formato == "csv":
+            yield fila_csv(datos[columna] for columna in COLUMNAS)
+        else:
+            yield json.dumps(datos) + "\n"
+
+
+async def cuerpo_en_chunks(cantidad: int, formato: str, filas_por_chunk: int = 1000):
+    buffer = []
+    for fila in generar_filas(cantidad, formato):
+        buffer.append(fila)
+        if len(buffer) >= filas_por_chunk:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+async def main(argumentos):
+    repositorio.retraso = argumentos.retraso
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        inicio = time.perf_counter()
+        response = await cliente.post(
+            f"/productos/importar?formato={argumentos.formato}&tamano_lote={argumentos.tamano_lote}",
+            content=cuerpo_en_chunks(argumentos.filas, argumentos.formato)
+        )
+        duracion = time.perf_counter() - inicio
+        resumen = response.json()
+        print(f"importación {argumentos.formato}: {resumen['importados']} filas en {duracion:.2f}s "
+              f"-> {resumen['importados'] / duracion:,.0f} filas/s ({resumen['fallidos']} con error)")
+
+        inicio = time.perf_counter()
+        filas = 0
+        async with cliente.stream("GET", f"/productos/exportar?formato={argumentos.formato}") as respuesta:
+            async for _ in respuesta.aiter_lines():
+                filas += 1
+        duracion = time.perf_counter() - inicio
+        if argumentos.formato == "csv":
+            filas -= 1
+        print(f"exportación {argumentos.formato}: {filas} filas en {duracion:.2f}s -> {filas / duracion:,.0f} filas/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=50000)
+    parser.add_argument("--formato", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--tamano-lote", type=int, default=500)
+    parser.add_argument("--retraso", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
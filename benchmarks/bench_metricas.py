@@ -0,0 +1,68 @@
+"""Micro-benchmark del costo de las métricas por solicitud.
+
+Uso:
+    python benchmarks/bench_metricas.py --solicitudes 5000
+
+Mide el costo aislado de registrar una solicitud y el de extremo a extremo
+de GET /productos/{id} con las métricas habilitadas y deshabilitadas.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from main import app
+from metrics import Metricas, metricas
+from repository import repositorio
+
+
+def costo_registro(repeticiones: int) -> float:
+    """Nanosegundos por inicio_solicitud + fin_solicitud"""
+    aislada = Metricas()
+
+    def registrar():
+        aislada.inicio_solicitud("GET")
+        aislada.fin_solicitud("GET", "/productos/{producto_id}", 200, 1_234_567)
+
+    return timeit.timeit(registrar, number=repeticiones) / repeticiones * 1e9
+
+
+async def costo_extremo_a_extremo(cliente: httpx.AsyncClient, url: str, solicitudes: int, habilitadas: bool) -> float:
+    """Microsegundos por solicitud con las métricas en el estado indicado"""
+    metricas.habilitadas = habilitadas
+    for _ in range(200):
+        await cliente.get(url)
+    inicio = time.perf_counter()
+    for _ in range(solicitudes):
+        await cliente.get(url)
+    return (time.perf_counter() - inicio) / solicitudes * 1e6
+
+
+async def main(argumentos):
+    print(f"registro aislado: {costo_registro(200_000):.0f} ns por solicitud")
+
+    repositorio.retraso = 0
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        response = await cliente.post("/productos", json={
+            "nombre": "Producto Benchmark",
+            "precio": 10.0,
+            "categoria": "Benchmark"
+        })
+        url = f"/productos/{response.json()['id']}"
+
+        sin = await costo_extremo_a_extremo(cliente, url, argumentos.solicitudes, False)
+        con = await costo_extremo_a_extremo(cliente, url, argumentos.solicitudes, True)
+        print(f"sin métricas: {sin:.1f} µs/solicitud")
+        print(f"con métricas: {con:.1f} µs/solicitud (sobrecosto {con - sin:+.1f} µs)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solicitudes", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""Micro-benchmark de las claves normalizadas de Producto.
+
+Uso:
+    python benchmarks/bench_normalizacion.py --productos 100000
+
+Compara, sobre un catálogo grande, normalizar nombre, categoría y descripción
+en cada solicitud contra leer las claves que Producto calcula al crearse.
+Reporta microsegundos y bytes asignados por solicitud; para medir la memoria
+cada escenario conserva las claves que produce durante la pasada.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datos import generar_productos, CATEGORIAS
+from products import Producto, normalizar
+from search import _PATRON_TOKEN, tokenizar
+from store import ProductStore
+
+ESCENARIOS = {
+    "categoría": (
+        lambda productos: [normalizar(p.categoria) for p in productos],
+        lambda productos: [p.categoria_clave for p in productos]
+    ),
+    "nombre": (
+        lambda productos: [normalizar(p.nombre) for p in productos],
+        lambda productos: [p.nombre_clave for p in productos]
+    ),
+    "tokens descripción": (
+        lambda productos: [tokenizar(p.descripcion) for p in productos],
+        lambda productos: [_PATRON_TOKEN.findall(p.descripcion_clave) for p in productos]
+    ),
+}
+
+
+def medir(funcion, productos, repeticiones: int):
+    """(µs por solicitud, bytes asignados por solicitud)"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(productos)
+    micros = (time.perf_counter() - inicio) / repeticiones * 1e6
+
+    tracemalloc.start()
+    resultado = funcion(productos)
+    asignados = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del resultado
+    return micros, asignados
+
+
+def main(argumentos):
+    store = ProductStore()
+    for datos in generar_productos(argumentos.productos):
+        producto = Producto(**datos)
+        producto.id = uuid4()
+        store.agregar(producto)
+    productos = list(store)
+    print(f"catálogo: {len(productos)} productos")
+
+    print(f"{'escenario':>20} {'antes µs':>12} {'ahora µs':>12} {'antes KiB':>11} {'ahora KiB':>11}")
+    for nombre, (antes, ahora) in ESCENARIOS.items():
+        micros_antes, bytes_antes = medir(antes, productos, argumentos.repeticiones)
+        micros_ahora, bytes_ahora = medir(ahora, productos, argumentos.repeticiones)
+        print(
+            f"{nombre:>20} {micros_antes:>12.0f} {micros_ahora:>12.0f} "
+            f"{bytes_antes / 1024:>11.0f} {bytes_ahora / 1024:>11.0f}"
+        )
+
+    # Recorrido real del almacén en memoria: una página filtrada por categoría y ordenada por precio
+    categoria = CATEGORIAS[1].upper()
+    inicio = time.perf_counter()
+    for _ in range(argumentos.repeticiones):
+        store.paginar(categoria=categoria, ordenar_por="precio", limite=argumentos.limite)
+    micros = (time.perf_counter() - inicio) / argumentos.repeticiones * 1e6
+    print(f"paginar categoria={categoria!r} limite={argumentos.limite}: {micros:.0f} µs/solicitud")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--productos", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--limite", type=int, default=1000)
+    main(parser.parse_args())
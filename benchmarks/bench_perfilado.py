@@ -0,0 +1,68 @@
+"""Micro-benchmark del costo del perfilado por solicitud.
+
+Uso:
+    python benchmarks/bench_perfilado.py --solicitudes 3000
+
+Mide GET /productos/{id} y un listado de --productos productos con el
+perfilado deshabilitado, habilitado (solo tramos) y con cProfile pedido por
+header, para comprobar que deshabilitado el sobrecosto es despreciable.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from benchmarks.datos import generar_productos
+from main import app
+from profiling import perfilador
+from repository import repositorio
+
+MODOS = {
+    "deshabilitado": (False, {}),
+    "tramos": (True, {}),
+    "cProfile": (True, {"X-Profile": "1"}),
+}
+
+
+async def medir(cliente: httpx.AsyncClient, url: str, solicitudes: int, habilitado: bool, headers) -> float:
+    """Microsegundos por solicitud en el modo indicado"""
+    perfilador.habilitado = habilitado
+    for _ in range(min(200, solicitudes)):
+        await cliente.get(url, headers=headers)
+    inicio = time.perf_counter()
+    for _ in range(solicitudes):
+        await cliente.get(url, headers=headers)
+    return (time.perf_counter() - inicio) / solicitudes * 1e6
+
+
+async def main(argumentos):
+    repositorio.retraso = 0
+    # Sin guardar nada: se mide el costo de perfilar, no el de llenar el buffer
+    perfilador.umbral_ms = float("inf")
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        response = await cliente.post("/productos/bulk", json=list(generar_productos(argumentos.productos)))
+        producto_id = response.json()["resultados"][0]["id"]
+        urls = {
+            "obtener": f"/productos/{producto_id}",
+            "listar": f"/productos?limit={argumentos.limite}&ordenar_por=precio",
+        }
+
+        print(f"{'escenario':>10} " + " ".join(f"{modo:>14}" for modo in MODOS))
+        for escenario, url in urls.items():
+            solicitudes = argumentos.solicitudes if escenario == "obtener" else argumentos.solicitudes // 10
+            tiempos = [await medir(cliente, url, solicitudes, *MODOS[modo]) for modo in MODOS]
+            print(f"{escenario:>10} " + " ".join(f"{micros:>11.1f} µs" for micros in tiempos))
+        perfilador.habilitado = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solicitudes", type=int, default=3000)
+    parser.add_argument("--productos", type=int, default=2000)
+    parser.add_argument("--limite", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
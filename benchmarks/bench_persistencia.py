@@ -0,0 +1,115 @@
+"""Benchmark del almacén en memoria persistente (snapshot + WAL).
+
+Uso:
+    python benchmarks/bench_persistencia.py --productos 1000000 --hilos 8
+
+Carga el catálogo en un AlmacenDurable sobre un directorio temporal, mide
+escrituras concurrentes con group commit (registros por fsync), el tiempo de
+escribir un snapshot y el arranque en frío: snapshot mapeado en memoria más
+reproducción del log, y luego la construcción de los índices del repositorio.
+Como referencia mide también la reimportación validando cada producto.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datos import generar_productos
+from persistence import AlmacenDurable, ARCHIVO_SNAPSHOT
+from products import Producto
+from repository import ProductRepository
+from store import ProductStore
+
+TAMANO_LOTE = 1000
+
+
+def crear_productos(cantidad: int):
+    productos = []
+    for datos in generar_productos(cantidad):
+        producto = Producto(**datos)
+        producto.id = uuid4()
+        productos.append(producto)
+    return productos
+
+
+def escrituras_concurrentes(almacen: AlmacenDurable, hilos: int, por_hilo: int):
+    """Actualizaciones desde varios hilos esperando el fsync, como las hace el repositorio"""
+    repositorio = ProductRepository.__new__(ProductRepository)
+    repositorio.store = almacen
+    repositorio._lock_almacen = threading.Lock()
+    ids = [producto.id for producto in list(almacen)[:hilos * por_hilo]]
+
+    def escribir(desde):
+        for producto_id in ids[desde:desde + por_hilo]:
+            repositorio._mutar(almacen.actualizar, producto_id, {"stock": 1})
+
+    antes = almacen._wal.estadisticas()
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=escribir, args=(i * por_hilo,)) for i in range(hilos)]
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    segundos = time.perf_counter() - inicio
+    despues = almacen._wal.estadisticas()
+    registros = despues["registros"] - antes["registros"]
+    lotes = despues["lotes_fsync"] - antes["lotes_fsync"]
+    print(
+        f"escrituras {hilos} hilos: {registros / segundos:,.0f}/s, "
+        f"{registros / max(lotes, 1):.1f} registros por fsync"
+    )
+
+
+def main(argumentos):
+    productos = crear_productos(argumentos.productos)
+    print(f"catálogo: {len(productos)} productos")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenDurable(directorio, intervalo_snapshot=3600)
+        inicio = time.perf_counter()
+        for i in range(0, len(productos), TAMANO_LOTE):
+            almacen.agregar_lote(productos[i:i + TAMANO_LOTE])
+        almacen.esperar_durabilidad()
+        print(f"carga inicial por el WAL: {time.perf_counter() - inicio:.2f} s")
+
+        escrituras_concurrentes(almacen, 1, argumentos.escrituras)
+        escrituras_concurrentes(almacen, argumentos.hilos, argumentos.escrituras // argumentos.hilos)
+
+        inicio = time.perf_counter()
+        almacen.guardar_snapshot()
+        tamano = os.path.getsize(os.path.join(directorio, ARCHIVO_SNAPSHOT))
+        print(f"snapshot: {time.perf_counter() - inicio:.2f} s, {tamano / 2**20:.1f} MiB")
+
+        for producto in productos[:argumentos.escrituras]:
+            almacen.actualizar(producto.id, {"precio": producto.precio + 1})
+        almacen._wal.cerrar()
+
+        inicio = time.perf_counter()
+        recuperado = AlmacenDurable(directorio, intervalo_snapshot=3600)
+        cargado = time.perf_counter() - inicio
+        ProductRepository(recuperado)
+        listo = time.perf_counter() - inicio
+        print(
+            f"arranque: almacén {cargado:.2f} s ({recuperado.arranque['registros_reproducidos']} registros del log), "
+            f"listo para servir {listo:.2f} s"
+        )
+
+    inicio = time.perf_counter()
+    store = ProductStore()
+    for producto in productos:
+        store.agregar(Producto(**producto.model_dump()))
+    print(f"referencia, reimportar validando: {time.perf_counter() - inicio:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--productos", type=int, default=200_000)
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--escrituras", type=int, default=2000)
+    main(parser.parse_args())
@@ -0,0 +1,75 @@
+"""Micro-benchmark del costo de construir un Producto según su origen.
+
+Uso:
+    python benchmarks/bench_validacion.py --productos 50000
+
+Compara, por producto, validar un payload (lo que hace un POST) contra
+reconstruir datos ya validados con Producto.sin_validar (lo que hacen los
+almacenes al rehidratar), y el costo de copia() (lo que guarda el registro
+de cambios).
+También mide el PUT: volcar ProductoUpdate con model_dump(exclude_unset=True)
+contra ProductoUpdate.cambios(). Reporta microsegundos por producto y bytes
+retenidos por producto construido.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datos import generar_productos
+from products import Producto, ProductoUpdate
+
+
+def medir(funcion, entradas, repeticiones: int):
+    """(µs por producto, bytes retenidos por producto)"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for entrada in entradas:
+            funcion(entrada)
+    micros = (time.perf_counter() - inicio) / (repeticiones * len(entradas)) * 1e6
+
+    tracemalloc.start()
+    resultado = [funcion(entrada) for entrada in entradas]
+    retenidos = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del resultado
+    return micros, retenidos / len(entradas)
+
+
+def main(argumentos):
+    ahora = datetime.now()
+    payloads = list(generar_productos(argumentos.productos))
+    validados = []
+    for datos in payloads:
+        producto = Producto(**datos)
+        producto.id = uuid4()
+        producto.fecha_creacion = producto.fecha_actualizacion = ahora
+        validados.append(producto)
+    # Lo que tiene un almacén al rehidratar: todos los campos, ya validados
+    filas = [dict(producto.__dict__) for producto in validados]
+    actualizaciones = [ProductoUpdate(precio=datos["precio"], stock=datos["stock"]) for datos in payloads]
+    print(f"productos: {len(payloads)}")
+
+    escenarios = [
+        ("validar payload", lambda datos: Producto(**datos), payloads),
+        ("sin_validar", lambda fila: Producto.sin_validar(**fila), filas),
+        ("copia", lambda producto: producto.copia(), validados),
+        ("PUT model_dump", lambda cambios: cambios.model_dump(exclude_unset=True), actualizaciones),
+        ("PUT cambios()", lambda cambios: cambios.cambios(), actualizaciones),
+    ]
+    print(f"{'escenario':>18} {'µs/producto':>12} {'bytes/producto':>15}")
+    for nombre, funcion, entradas in escenarios:
+        micros, retenidos = medir(funcion, entradas, argumentos.repeticiones)
+        print(f"{nombre:>18} {micros:>12.2f} {retenidos:>15.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--productos", type=int, default=50_000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    main(parser.parse_args())
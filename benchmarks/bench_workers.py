@@ -0,0 +1,144 @@
+"""Benchmark de escalado del throughput con el número de workers.
+
+Uso:
+    python benchmarks/bench_workers.py --workers 1 2 4 --productos 5000 --duracion 10
+
+Para cada cantidad de workers levanta server.py sobre un SQLite temporal,
+siembra el catálogo por HTTP y lo carga desde varios procesos cliente con
+conexiones keep-alive. Reporta solicitudes por segundo y p95 por escenario.
+El escalado queda acotado por los núcleos disponibles: los clientes
+compiten por la misma CPU que los workers.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from benchmarks.datos import generar_productos, CATEGORIAS
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def esperar_servidor(url: str, timeout: float = 30.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            if httpx.get(url + "/").status_code == 200:
+                return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondió en {timeout}s")
+
+
+def sembrar(url: str, cantidad: int) -> List[str]:
+    ids = []
+    lote = []
+    with httpx.Client(base_url=url, timeout=None) as cliente:
+        for datos in generar_productos(cantidad):
+            lote.append(datos)
+            if len(lote) == 1000:
+                ids += [r["id"] for r in cliente.post("/productos/bulk", json=lote).json()["resultados"]]
+                lote = []
+        if lote:
+            ids += [r["id"] for r in cliente.post("/productos/bulk", json=lote).json()["resultados"]]
+    return ids
+
+
+def cargar(url: str, escenario: str, ids: List[str], duracion: float, concurrencia: int, semilla: int, cola):
+    """Proceso cliente: corre el escenario durante `duracion` segundos y reporta latencias"""
+    aleatorio = random.Random(semilla)
+
+    def solicitud():
+        if escenario == "obtener":
+            return {"url": f"/productos/{aleatorio.choice(ids)}"}
+        return {"url": "/productos", "params": {"limit": 50, "categoria": aleatorio.choice(CATEGORIAS)}}
+
+    async def correr():
+        latencias = []
+        fin = time.monotonic() + duracion
+        limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+        async with httpx.AsyncClient(base_url=url, limits=limites, timeout=None) as cliente:
+            async def trabajador():
+                while time.monotonic() < fin:
+                    inicio = time.perf_counter()
+                    await cliente.get(**solicitud())
+                    latencias.append(time.perf_counter() - inicio)
+
+            await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        return latencias
+
+    cola.put(asyncio.run(correr()))
+
+
+def medir(url: str, escenario: str, ids: List[str], argumentos) -> dict:
+    cola = multiprocessing.Queue()
+    procesos = [
+        multiprocessing.Process(
+            target=cargar,
+            args=(url, escenario, ids, argumentos.duracion, argumentos.concurrencia, semilla, cola)
+        )
+        for semilla in range(argumentos.clientes)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    latencias = sorted(latencia for _ in procesos for latencia in cola.get())
+    for proceso in procesos:
+        proceso.join()
+    return {
+        "rps": round(len(latencias) / argumentos.duracion, 1),
+        "p95_ms": round(latencias[int(len(latencias) * 0.95)] * 1000, 2) if latencias else 0.0
+    }
+
+
+def main(argumentos):
+    print(f"núcleos disponibles: {os.cpu_count()}")
+    print(f"{'workers':>8} {'escenario':>10} {'req/s':>10} {'p95 ms':>8}")
+    for workers in argumentos.workers:
+        with tempfile.TemporaryDirectory() as directorio:
+            puerto = argumentos.puerto
+            entorno = {
+                **os.environ,
+                "BACKEND_DB": "sqlite",
+                "SQLITE_RUTA": os.path.join(directorio, "productos.db"),
+                "RETRASO_DB": str(argumentos.retraso),
+                "METRICAS_HABILITADAS": "1"
+            }
+            servidor = subprocess.Popen(
+                [sys.executable, str(RAIZ / "server.py"), "--workers", str(workers), "--port", str(puerto)],
+                env=entorno,
+                cwd=RAIZ
+            )
+            try:
+                url = f"http://127.0.0.1:{puerto}"
+                esperar_servidor(url)
+                ids = sembrar(url, argumentos.productos)
+                # Deja que los workers repliquen la siembra antes de medir
+                time.sleep(1)
+                for escenario in ("obtener", "listar"):
+                    resultado = medir(url, escenario, ids, argumentos)
+                    print(f"{workers:>8} {escenario:>10} {resultado['rps']:>10} {resultado['p95_ms']:>8}")
+            finally:
+                servidor.terminate()
+                servidor.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--productos", type=int, default=5000)
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos por escenario")
+    parser.add_argument("--clientes", type=int, default=2, help="procesos que generan carga")
+    parser.add_argument("--concurrencia", type=int, default=32, help="solicitudes en vuelo por cliente")
+    parser.add_argument("--retraso", type=float, default=0.0, help="latencia simulada del repositorio")
+    parser.add_argument("--puerto", type=int, default=8765)
+    main(parser.parse_args())
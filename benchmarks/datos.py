@@ -0,0 +1,24 @@
+"""Generador sintético y reproducible de productos para los benchmarks."""
+import random
+from typing import Dict, Iterator
+
+CATEGORIAS = ["Tecnología", "Electrónicos", "Hogar", "Deportes", "Oficina", "Juguetes", "Jardín", "Libros"]
+SUSTANTIVOS = ["Laptop", "Teléfono", "Silla", "Lámpara", "Balón", "Mochila", "Monitor", "Cafetera", "Bicicleta", "Auriculares"]
+ADJETIVOS = ["Gaming", "Ergonómica", "Inteligente", "Compacto", "Profesional", "Portátil", "Inalámbrico", "Clásico"]
+
+
+def generar_productos(cantidad: int, semilla: int = 42) -> Iterator[Dict]:
+    """Produce payloads válidos de Producto con nombres únicos"""
+    aleatorio = random.Random(semilla)
+    for i in range(cantidad):
+        sustantivo = aleatorio.choice(SUSTANTIVOS)
+        adjetivo = aleatorio.choice(ADJETIVOS)
+        yield {
+            "nombre": f"{sustantivo} {adjetivo} {i}",
+            "descripcion": f"{sustantivo} {adjetivo.lower()} modelo {i} con garantía",
+            "precio": round(aleatorio.uniform(1, 5000), 2),
+            "stock": aleatorio.randint(0, 500),
+            "categoria": aleatorio.choice(CATEGORIAS),
+            "disponible": aleatorio.random() > 0.2,
+            "rating": round(aleatorio.uniform(0, 5), 1)
+        }
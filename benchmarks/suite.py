@@ -0,0 +1,214 @@
+"""Suite de carga reproducible para la API de productos.
+
+Uso:
+    python benchmarks/suite.py --productos 10000 --concurrencia 16 --solicitudes 500
+    python benchmarks/suite.py --productos 10000 --guardar-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --productos 10000 --baseline benchmarks/baseline.json
+
+Siembra el catálogo con el generador sintético, recorre todos los endpoints
+de main.py en proceso con un cliente asíncrono y reporta p50/p95/p99,
+throughput y RSS máximo en JSON. Con --baseline termina con código 1 si
+algún escenario empeora más que la tolerancia.
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from main import app
+from products import Producto
+from repository import repositorio
+from utils import generar_timestamps
+from benchmarks.datos import generar_productos, CATEGORIAS
+
+TAMANO_LOTE_SIEMBRA = 5000
+
+
+async def sembrar(cantidad: int) -> List[str]:
+    """Carga el catálogo por lotes directamente en el repositorio y retorna los IDs"""
+    ids = []
+    lote = []
+    for datos in generar_productos(cantidad):
+        producto = Producto(**datos)
+        producto.id = uuid4()
+        producto.fecha_creacion = producto.fecha_actualizacion = generar_timestamps()["fecha_creacion"]
+        lote.append(producto)
+        if len(lote) == TAMANO_LOTE_SIEMBRA:
+            await repositorio.crear_lote(lote, atomico=False)
+            ids.extend(str(p.id) for p in lote)
+            lote = []
+    if lote:
+        await repositorio.crear_lote(lote, atomico=False)
+        ids.extend(str(p.id) for p in lote)
+    return ids
+
+
+def escenarios(ids: List[str], aleatorio: random.Random) -> Dict[str, Callable[[int], dict]]:
+    """Cada escenario arma los argumentos de la solicitud número i"""
+    def nuevo(i):
+        return {"nombre": f"Bench Nuevo {i} {aleatorio.random()}", "precio": 10.0, "categoria": "Bench"}
+
+    return {
+        "raiz": lambda i: {"method": "GET", "url": "/"},
+        "listar_pagina": lambda i: {
+            "method": "GET", "url": "/productos",
+            "params": {"limit": 50, "ordenar_por": "precio", "categoria": CATEGORIAS[i % len(CATEGORIAS)]}
+        },
+        "listar_filtrado": lambda i: {
+            "method": "GET", "url": "/productos",
+            "params": {"disponible": "true", "categoria": CATEGORIAS[i % len(CATEGORIAS)], "precio_max": 50 + i % 100}
+        },
+        "obtener": lambda i: {"method": "GET", "url": f"/productos/{aleatorio.choice(ids)}"},
+        "buscar": lambda i: {
+            "method": "GET", "url": "/productos/buscar",
+            "params": {"q": aleatorio.choice(["laptop", "silla ergo", "telefono", "bici", "monitor"]), "min_rating": i % 5}
+        },
+        "crear": lambda i: {"method": "POST", "url": "/productos", "json": nuevo(i)},
+        "actualizar": lambda i: {
+            "method": "PUT", "url": f"/productos/{aleatorio.choice(ids)}",
+            "json": {"stock": i % 100, "precio": round(aleatorio.uniform(1, 100), 2)}
+        },
+        "crear_lote": lambda i: {"method": "POST", "url": "/productos/bulk", "json": [nuevo(f"{i}-{j}") for j in range(20)]},
+        "exportar_ndjson": lambda i: {
+            "method": "GET", "url": "/productos/exportar",
+            "params": {"formato": "ndjson", "categoria": CATEGORIAS[i % len(CATEGORIAS)]}
+        },
+        "metricas": lambda i: {"method": "GET", "url": "/metrics"},
+        "cache_estadisticas": lambda i: {"method": "GET", "url": "/cache/estadisticas"},
+        "eliminar": lambda i: {"method": "DELETE", "url": f"/productos/{ids.pop()}"},
+    }
+
+
+def percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+async def correr_escenario(
+    cliente: httpx.AsyncClient,
+    armar: Callable[[int], dict],
+    solicitudes: int,
+    concurrencia: int
+) -> dict:
+    latencias: List[float] = []
+    errores = 0
+    siguiente = 0
+
+    async def trabajador():
+        nonlocal siguiente, errores
+        while siguiente < solicitudes:
+            i = siguiente
+            siguiente += 1
+            argumentos = armar(i)
+            inicio = time.perf_counter()
+            response = await cliente.request(**argumentos)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if response.status_code >= 400:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+    return {
+        "solicitudes": solicitudes,
+        "errores": errores,
+        "throughput_rps": round(solicitudes / duracion, 1),
+        "p50_ms": round(percentil(latencias, 50), 3),
+        "p95_ms": round(percentil(latencias, 95), 3),
+        "p99_ms": round(percentil(latencias, 99), 3)
+    }
+
+
+def comparar(resultado: dict, baseline: dict, tolerancia: float) -> List[str]:
+    """Lista de regresiones respecto al baseline"""
+    regresiones = []
+    for nombre, actual in resultado["escenarios"].items():
+        base = baseline.get("escenarios", {}).get(nombre)
+        if base is None:
+            continue
+        if actual["p95_ms"] > base["p95_ms"] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: p95 {actual['p95_ms']}ms > baseline {base['p95_ms']}ms")
+        if actual["throughput_rps"] < base["throughput_rps"] * (1 - tolerancia):
+            regresiones.append(f"{nombre}: {actual['throughput_rps']} req/s < baseline {base['throughput_rps']} req/s")
+        if actual["errores"] > base["errores"]:
+            regresiones.append(f"{nombre}: {actual['errores']} errores > baseline {base['errores']}")
+    base_rss = baseline.get("rss_max_mb")
+    if base_rss and resultado["rss_max_mb"] > base_rss * (1 + tolerancia):
+        regresiones.append(f"rss: {resultado['rss_max_mb']}MB > baseline {base_rss}MB")
+    return regresiones
+
+
+async def main(argumentos) -> int:
+    repositorio.retraso = argumentos.retraso
+    aleatorio = random.Random(argumentos.semilla)
+
+    inicio = time.perf_counter()
+    ids = await sembrar(argumentos.productos)
+    siembra_s = time.perf_counter() - inicio
+
+    seleccion = set(argumentos.escenarios or [])
+    resultado = {
+        "configuracion": {
+            "productos": argumentos.productos,
+            "solicitudes": argumentos.solicitudes,
+            "concurrencia": argumentos.concurrencia,
+            "retraso": argumentos.retraso,
+            "semilla": argumentos.semilla
+        },
+        "siembra_s": round(siembra_s, 2),
+        "escenarios": {}
+    }
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        for nombre, armar in escenarios(ids, aleatorio).items():
+            if seleccion and nombre not in seleccion:
+                continue
+            resultado["escenarios"][nombre] = await correr_escenario(
+                cliente, armar, argumentos.solicitudes, argumentos.concurrencia
+            )
+            print(f"{nombre:>20}: {resultado['escenarios'][nombre]}", file=sys.stderr)
+
+    # ru_maxrss está en KB en Linux
+    resultado["rss_max_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+    if argumentos.guardar_baseline:
+        Path(argumentos.guardar_baseline).write_text(json.dumps(resultado, indent=2, ensure_ascii=False) + "\n")
+
+    if argumentos.baseline:
+        baseline = json.loads(Path(argumentos.baseline).read_text())
+        if baseline.get("configuracion") != resultado["configuracion"]:
+            print("AVISO: la configuración difiere de la del baseline", file=sys.stderr)
+        regresiones = comparar(resultado, baseline, argumentos.tolerancia)
+        if regresiones:
+            print("REGRESIONES DE RENDIMIENTO:", file=sys.stderr)
+            for regresion in regresiones:
+                print(f"  - {regresion}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--productos", type=int, default=10000, help="tamaño del catálogo sembrado (1k a 1M)")
+    parser.add_argument("--solicitudes", type=int, default=500, help="solicitudes por escenario")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--retraso", type=float, default=0.0, help="latencia simulada del repositorio")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--escenarios", nargs="*", help="subconjunto de escenarios a correr")
+    parser.add_argument("--baseline", help="JSON contra el cual comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.5, help="degradación relativa admitida")
+    parser.add_argument("--guardar-baseline", help="ruta donde guardar el resultado como baseline")
+    sys.exit(asyncio.run(main(parser.parse_args())))
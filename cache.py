@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+
+# Costo aproximado de la entrada además del cuerpo (clave, tupla, headers)
+SOBRECOSTO_ENTRADA = 200
+
+
+class CacheRespuestas:
+    """Caché LRU con TTL de respuestas ya serializadas a JSON.
+
+    Cada escritura en el catálogo incrementa la generación; las entradas de
+    generaciones anteriores dejan de servirse sin tener que recorrerlas.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generacion = 0
+        self._entradas: "OrderedDict[Tuple, Tuple[int, float, bytes, Dict[str, str]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.invalidaciones = 0
+
+    @staticmethod
+    def clave(ruta: str, parametros: Iterable[Tuple[str, str]]) -> Tuple:
+        """Normaliza ruta y parámetros: orden estable y sin valores vacíos"""
+        return (ruta, tuple(sorted((k, v) for k, v in parametros if v != "")))
+
+    def obtener(self, clave: Tuple) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """Retorna (cuerpo, headers) si la entrada está vigente"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                generacion, expira, cuerpo, headers = entrada
+                if generacion == self.generacion and expira > time.monotonic():
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return cuerpo, headers
+                self._quitar(clave)
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave: Tuple, generacion: int, cuerpo: bytes, headers: Optional[Dict[str, str]] = None):
+        """Guarda una respuesta calculada en la generación indicada"""
+        tamano = len(cuerpo) + SOBRECOSTO_ENTRADA
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            if generacion != self.generacion:
+                return
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (generacion, time.monotonic() + self.ttl, cuerpo, headers or {})
+            self._bytes += tamano
+            while self._bytes > self.max_bytes:
+                _, entrada = self._entradas.popitem(last=False)
+                self._bytes -= self._tamano_de(entrada)
+                self.expulsiones += 1
+
+    def invalidar(self, *_):
+        """Descarta lógicamente todas las entradas; acepta los argumentos de un oyente del repositorio"""
+        with self._lock:
+            self.generacion += 1
+            self.invalidaciones += 1
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self) -> dict:
+        """Contadores para dimensionar la caché"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "generacion": self.generacion,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "expulsiones": self.expulsiones,
+                "invalidaciones": self.invalidaciones
+            }
+
+    def _quitar(self, clave: Tuple):
+        entrada = self._entradas.pop(clave)
+        self._bytes -= self._tamano_de(entrada)
+
+    @staticmethod
+    def _tamano_de(entrada) -> int:
+        return len(entrada[2]) + SOBRECOSTO_ENTRADA
+
+
+cache_respuestas = CacheRespuestas()
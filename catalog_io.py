@@ -0,0 +1,148 @@
+import codecs
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, Tuple
+from uuid import uuid4
+from pydantic import ValidationError
+from products import Producto
+from utils import generar_timestamps, resumir_errores_validacion
+
+COLUMNAS_EXPORTACION = (
+    "id", "nombre", "descripcion", "precio", "stock", "categoria",
+    "disponible", "fecha_creacion", "fecha_actualizacion", "rating", "version"
+)
+
+
+async def leer_lineas(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Convierte un flujo de bytes en líneas de texto sin cargarlo completo en memoria"""
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+    pendiente = ""
+    async for chunk in chunks:
+        pendiente += decodificador.decode(chunk)
+        *lineas, pendiente = pendiente.split("\n")
+        for linea in lineas:
+            yield linea.rstrip("\r")
+    pendiente += decodificador.decode(b"", final=True)
+    if pendiente:
+        yield pendiente.rstrip("\r")
+
+
+async def registros_ndjson(lineas: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    """Produce (número de fila, objeto) por cada línea NDJSON no vacía"""
+    numero = 0
+    async for linea in lineas:
+        if not linea.strip():
+            continue
+        numero += 1
+        try:
+            yield numero, json.loads(linea)
+        except ValueError as e:
+            yield numero, ValueError(f"JSON inválido: {e}")
+
+
+async def registros_csv(lineas: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    """Produce (número de fila, dict) por cada registro CSV, usando la primera fila como encabezado.
+
+    Un registro con un campo entre comillas puede ocupar varias líneas; se
+    acumulan hasta que las comillas quedan balanceadas.
+    """
+    encabezado = None
+    numero = 0
+    registro = ""
+    async for linea in lineas:
+        registro = f"{registro}\n{linea}" if registro else linea
+        if registro.count('"') % 2:
+            continue
+        texto, registro = registro, ""
+        if not texto.strip():
+            continue
+        valores = next(csv.reader([texto]))
+        if encabezado is None:
+            encabezado = [columna.strip() for columna in valores]
+            continue
+        numero += 1
+        if len(valores) != len(encabezado):
+            yield numero, ValueError(
+                f"Se esperaban {len(encabezado)} columnas y llegaron {len(valores)}"
+            )
+            continue
+        # Las celdas vacías se omiten para que apliquen los valores por defecto del modelo
+        yield numero, {columna: valor for columna, valor in zip(encabezado, valores) if valor != ""}
+    if registro:
+        numero += 1
+        yield numero, ValueError("Registro CSV incompleto: comillas sin cerrar")
+
+
+def fila_csv(valores: Iterable[Any]) -> str:
+    """Escribe una fila CSV con el mismo escapado que csv.writer"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(valores)
+    return buffer.getvalue()
+
+
+def producto_a_fila_csv(producto: Producto) -> str:
+    """Serializa un producto en el orden de COLUMNAS_EXPORTACION"""
+    datos: Dict[str, Any] = producto.model_dump()
+    valores = []
+    for columna in COLUMNAS_EXPORTACION:
+        valor = datos[columna]
+        if valor is None:
+            valor = ""
+        elif hasattr(valor, "isoformat"):
+            valor = valor.isoformat()
+        elif isinstance(valor, bool):
+            valor = "true" if valor else "false"
+        valores.append(valor)
+    return fila_csv(valores)
+
+
+async def importar_registros(
+    registros: AsyncIterator[Tuple[int, Any]],
+    repositorio,
+    tamano_lote: int,
+    max_errores: int
+) -> Dict[str, Any]:
+    """Valida los registros a medida que llegan y los guarda por lotes con éxito parcial"""
+    resumen = {"filas": 0, "importados": 0, "fallidos": 0, "errores": [], "errores_truncados": False}
+
+    def registrar_error(fila: int, mensaje: str):
+        resumen["fallidos"] += 1
+        if len(resumen["errores"]) < max_errores:
+            resumen["errores"].append({"fila": fila, "error": mensaje})
+        else:
+            resumen["errores_truncados"] = True
+
+    async def guardar(lote):
+        errores = await repositorio.crear_lote([producto for _, producto in lote], atomico=False)
+        for (fila, _), error in zip(lote, errores):
+            if error is None:
+                resumen["importados"] += 1
+            else:
+                registrar_error(fila, error)
+
+    lote = []
+    async for fila, datos in registros:
+        resumen["filas"] += 1
+        if isinstance(datos, Exception):
+            registrar_error(fila, str(datos))
+            continue
+        if not isinstance(datos, dict):
+            registrar_error(fila, "Cada registro debe ser un objeto")
+            continue
+        try:
+            producto = Producto.model_validate(datos)
+        except ValidationError as e:
+            registrar_error(fila, resumir_errores_validacion(e))
+            continue
+        producto.id = uuid4()
+        timestamps = generar_timestamps()
+        producto.fecha_creacion = timestamps["fecha_creacion"]
+        producto.fecha_actualizacion = timestamps["fecha_actualizacion"]
+        lote.append((fila, producto))
+        if len(lote) >= tamano_lote:
+            await guardar(lote)
+            lote = []
+    if lote:
+        await guardar(lote)
+    return resumen
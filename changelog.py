@@ -0,0 +1,130 @@
+import asyncio
+import os
+import threading
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from products import Producto
+from exceptions import ResincronizacionRequeridaError
+from utils import serializar_json
+
+MAX_CAMBIOS = int(os.getenv("MAX_CAMBIOS", "10000"))
+LATIDO_SSE = float(os.getenv("LATIDO_SSE", "15"))
+
+
+class RegistroCambios:
+    """Registro acotado y de solo anexado de las escrituras del catálogo.
+
+    Cada cambio recibe un número de secuencia creciente: el siguiente al
+    último o, con un almacén compartido entre workers, el de su registro de
+    cambios, que puede saltear los que ya no tienen producto. Al llenarse se
+    descartan los más antiguos y quien pida cambios anteriores a los que
+    quedan debe resincronizar el catálogo completo.
+    """
+
+    def __init__(self, max_entradas: int = MAX_CAMBIOS):
+        self._entradas: Deque[Dict[str, Any]] = deque(maxlen=max_entradas)
+        self.ultima_secuencia = 0
+        # Secuencia hasta la que los cambios ya no están en el registro
+        self._olvidada = 0
+        self._lock = threading.Lock()
+        # (loop, evento) de cada consumidor esperando cambios nuevos
+        self._esperas: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def reiniciar(self, secuencia: int):
+        """Vacía el registro y sigue desde `secuencia`; quien esté más atrás debe resincronizar"""
+        with self._lock:
+            self._entradas.clear()
+            self.ultima_secuencia = self._olvidada = secuencia
+
+    def registrar(self, operacion: str, producto: Optional[Producto], secuencia: Optional[int] = None):
+        """Oyente del repositorio; sin secuencia toma la siguiente a la última"""
+        if operacion == "resincronizar":
+            # El registro compartido se recortó antes de leerlo: los cambios intermedios se perdieron
+            self.reiniciar(secuencia)
+            return
+        with self._lock:
+            if secuencia is None:
+                secuencia = self.ultima_secuencia + 1
+            elif secuencia <= self.ultima_secuencia:
+                return
+            if len(self._entradas) == self._entradas.maxlen:
+                self._olvidada = self._entradas[0]["secuencia"]
+            self.ultima_secuencia = secuencia
+            self._entradas.append({
+                "secuencia": secuencia,
+                "operacion": operacion,
+                "id": producto.id if producto is not None else None,
+                "fecha": datetime.now(),
+                # Copia: el almacén en memoria modifica sus productos en el lugar
+                "producto": producto.copia() if producto is not None and operacion != "eliminar" else None
+            })
+            esperas = list(self._esperas)
+        for loop, evento in esperas:
+            try:
+                loop.call_soon_threadsafe(evento.set)
+            except RuntimeError:
+                # El loop del consumidor ya se cerró
+                pass
+
+    def desde(self, secuencia: int, limite: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Retorna hasta `limite` cambios posteriores a `secuencia` y la última secuencia registrada"""
+        with self._lock:
+            if secuencia < self._olvidada or secuencia > self.ultima_secuencia:
+                raise ResincronizacionRequeridaError(
+                    f"Resincronización requerida: el registro no contiene los cambios posteriores a {secuencia}; "
+                    f"descargue el catálogo completo y continúe desde la secuencia {self.ultima_secuencia}",
+                    ultima_secuencia=self.ultima_secuencia
+                )
+            inicio = bisect_right(self._entradas, secuencia, key=lambda entrada: entrada["secuencia"])
+            return list(islice(self._entradas, inicio, inicio + limite)), self.ultima_secuencia
+
+    async def esperar(self, secuencia: int, timeout: float) -> bool:
+        """Espera hasta que haya cambios posteriores a `secuencia`; False si vence el timeout"""
+        par = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self.ultima_secuencia > secuencia:
+                return True
+            self._esperas.add(par)
+        try:
+            await asyncio.wait_for(par[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._esperas.discard(par)
+
+
+def evento_sse(evento: str, datos: Any, identificador: Optional[int] = None) -> str:
+    lineas = [] if identificador is None else [f"id: {identificador}"]
+    lineas += [f"event: {evento}", f"data: {serializar_json(datos).decode('utf-8')}"]
+    return "\n".join(lineas) + "\n\n"
+
+
+async def eventos_sse(
+    registro: RegistroCambios,
+    desde: int,
+    desconectado: Callable[[], Awaitable[bool]],
+    latido: float = LATIDO_SSE,
+    tamano_lote: int = 500
+) -> AsyncIterator[str]:
+    """Transmite los cambios posteriores a `desde` y luego los nuevos a medida que llegan"""
+    secuencia = desde
+    while not await desconectado():
+        try:
+            cambios, _ = registro.desde(secuencia, tamano_lote)
+        except ResincronizacionRequeridaError as e:
+            yield evento_sse("resync", {"detalle": str(e), "ultima_secuencia": e.ultima_secuencia})
+            return
+        for cambio in cambios:
+            yield evento_sse(cambio["operacion"], cambio, cambio["secuencia"])
+            secuencia = cambio["secuencia"]
+        if not cambios and not await registro.esperar(secuencia, latido):
+            # Comentario SSE para que proxies y clientes no cierren la conexión inactiva
+            yield ": latido\n\n"
+
+
+registro_cambios = RegistroCambios()
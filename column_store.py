@@ -0,0 +1,327 @@
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+from products import Producto, normalizar
+from store import StorageBackend
+from exceptions import ProductoNoEncontradoError, ProductoDuplicadoError
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: solo lo necesita este backend
+    np = None
+
+EPOCA = datetime(1970, 1, 1)
+SIN_FECHA = -(2 ** 63)
+UN_MICROSEGUNDO = timedelta(microseconds=1)
+
+# Columnas numéricas; las fechas se guardan como microsegundos desde EPOCA: nombre -> dtype de NumPy
+TIPOS_COLUMNAS = {
+    "precio": "float64",
+    "stock": "int64",
+    "rating": "float64",
+    "disponible": "bool",
+    "categoria": "int32",
+    "fecha_creacion": "int64",
+    "fecha_actualizacion": "int64",
+    "seq": "int64",
+    "version": "int64",
+    "vivo": "bool",
+}
+COLUMNA_ORDEN = {None: "seq", "precio": "precio", "rating": "rating", "fecha_creacion": "fecha_creacion"}
+
+
+def _a_micros(fecha: Optional[datetime]) -> int:
+    return SIN_FECHA if fecha is None else (fecha - EPOCA) // UN_MICROSEGUNDO
+
+
+class ColumnStore(StorageBackend):
+    """Catálogo en columnas: arrays NumPy para los campos numéricos, categorías
+    codificadas por diccionario y nombres internados.
+
+    Los filtros se evalúan como máscaras vectorizadas y los Producto solo se
+    construyen para las filas que se devuelven. Las filas borradas quedan como
+    huecos hasta que superan la mitad de la tabla y se compacta.
+    """
+
+    def __init__(self, capacidad_inicial: int = 1024):
+        if np is None:
+            raise RuntimeError("ColumnStore requiere numpy: pip install numpy")
+        self._capacidad_inicial = capacidad_inicial
+        self.clear()
+
+    def clear(self):
+        self._capacidad = self._capacidad_inicial
+        self._columnas = {
+            nombre: np.zeros(self._capacidad, dtype=tipo)
+            for nombre, tipo in TIPOS_COLUMNAS.items()
+        }
+        self._n = 0
+        self._vivos = 0
+        self._siguiente_seq = 0
+        self._ids: List[Optional[UUID]] = []
+        self._nombres: List[Optional[str]] = []
+        self._descripciones: List[Optional[str]] = []
+        self._fila_por_id: Dict[UUID, int] = {}
+        self._por_nombre: Dict[str, UUID] = {}
+        self._categorias: List[str] = []
+        self._codigo_categoria: Dict[str, int] = {}
+        self._codigos_por_clave: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return self._vivos
+
+    def __iter__(self) -> Iterator[Producto]:
+        return iter(self._materializar_filas(np.flatnonzero(self._columnas["vivo"][:self._n])))
+
+    def __contains__(self, producto_id: UUID) -> bool:
+        return producto_id in self._fila_por_id
+
+    def obtener(self, producto_id: UUID) -> Optional[Producto]:
+        fila = self._fila_por_id.get(producto_id)
+        return self._materializar(fila) if fila is not None else None
+
+    def obtener_por_nombre(self, nombre: str) -> Optional[Producto]:
+        producto_id = self._por_nombre.get(normalizar(nombre))
+        return self.obtener(producto_id) if producto_id is not None else None
+
+    def existe_nombre(self, nombre: str, exclude_id: Optional[UUID] = None) -> bool:
+        producto_id = self._por_nombre.get(normalizar(nombre))
+        return producto_id is not None and producto_id != exclude_id
+
+    def agregar(self, producto: Producto) -> Producto:
+        if self.existe_nombre(producto.nombre):
+            raise ProductoDuplicadoError("Ya existe un producto con ese nombre")
+        if self._n == self._capacidad:
+            self._crecer()
+
+        fila = self._n
+        self._n += 1
+        self._vivos += 1
+        columnas = self._columnas
+        columnas["precio"][fila] = producto.precio
+        columnas["stock"][fila] = producto.stock
+        columnas["rating"][fila] = producto.rating
+        columnas["disponible"][fila] = producto.disponible
+        columnas["categoria"][fila] = self._codificar_categoria(producto.categoria)
+        columnas["fecha_creacion"][fila] = _a_micros(producto.fecha_creacion)
+        columnas["fecha_actualizacion"][fila] = _a_micros(producto.fecha_actualizacion)
+        columnas["seq"][fila] = self._siguiente_seq
+        columnas["version"][fila] = producto.version
+        columnas["vivo"][fila] = True
+        self._siguiente_seq += 1
+
+        self._ids.append(producto.id)
+        self._nombres.append(sys.intern(producto.nombre))
+        self._descripciones.append(producto.descripcion)
+        self._fila_por_id[producto.id] = fila
+        self._por_nombre[producto.nombre_clave] = producto.id
+        return producto
+
+    def actualizar(self, producto_id: UUID, cambios: Dict[str, Any]) -> Producto:
+        fila = self._fila_por_id.get(producto_id)
+        if fila is None:
+            raise ProductoNoEncontradoError(f"Producto con ID {producto_id} no encontrado")
+
+        nombre = cambios.get("nombre")
+        if nombre is not None and self.existe_nombre(nombre, exclude_id=producto_id):
+            raise ProductoDuplicadoError("Ya existe un producto con ese nombre")
+
+        columnas = self._columnas
+        for campo, valor in cambios.items():
+            if campo == "nombre":
+                del self._por_nombre[normalizar(self._nombres[fila])]
+                self._nombres[fila] = sys.intern(valor)
+                self._por_nombre[normalizar(valor)] = producto_id
+            elif campo == "descripcion":
+                self._descripciones[fila] = valor
+            elif campo == "categoria":
+                columnas["categoria"][fila] = self._codificar_categoria(valor)
+            elif campo in ("fecha_creacion", "fecha_actualizacion"):
+                columnas[campo][fila] = _a_micros(valor)
+            elif campo in ("precio", "stock", "rating", "disponible", "version"):
+                columnas[campo][fila] = valor
+        return self._materializar(fila)
+
+    def eliminar(self, producto_id: UUID) -> Producto:
+        fila = self._fila_por_id.pop(producto_id, None)
+        if fila is None:
+            raise ProductoNoEncontradoError(f"Producto con ID {producto_id} no encontrado")
+        producto = self._materializar(fila)
+        del self._por_nombre[normalizar(self._nombres[fila])]
+        self._columnas["vivo"][fila] = False
+        self._ids[fila] = None
+        self._nombres[fila] = None
+        self._descripciones[fila] = None
+        self._vivos -= 1
+        if self._n > self._capacidad_inicial and self._vivos < self._n // 2:
+            self._compactar()
+        return producto
+
+    def filtrar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> List[Producto]:
+        mascara = self._mascara(disponible, categoria, precio_max, precio_min, min_rating, stock_min)
+        return self._materializar_filas(np.flatnonzero(mascara))
+
+    def explicar(self, **filtros) -> Dict[str, Any]:
+        """Sin índices secundarios: cada filtro es una comparación vectorizada sobre todas las filas"""
+        filas = np.flatnonzero(self._mascara(**filtros))
+        return {
+            "backend": "columnar",
+            "indice": "escaneo vectorizado",
+            "filas_escaneadas": self._n,
+            "filas_retornadas": len(filas)
+        }
+
+    def paginar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        ordenar_por: Optional[str] = None,
+        descendente: bool = False,
+        despues_de: Optional[Tuple[Any, int]] = None,
+        limite: Optional[int] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> Tuple[List[Producto], Optional[Tuple[Any, int]]]:
+        """Ordena solo las filas que pasan la máscara y materializa la página"""
+        mascara = self._mascara(disponible, categoria, precio_max, precio_min, min_rating, stock_min)
+        filas = np.flatnonzero(mascara)
+        valores = self._columnas[COLUMNA_ORDEN[ordenar_por]][filas]
+        seqs = self._columnas["seq"][filas]
+
+        if despues_de is not None:
+            valor, seq = despues_de
+            if descendente:
+                seleccion = (valores < valor) | ((valores == valor) & (seqs < seq))
+            else:
+                seleccion = (valores > valor) | ((valores == valor) & (seqs > seq))
+            filas, valores, seqs = filas[seleccion], valores[seleccion], seqs[seleccion]
+
+        if limite is not None and len(valores) > limite + 1:
+            # Top-K: solo se ordenan las filas que pueden caer en la página
+            if descendente:
+                posicion = len(valores) - limite - 1
+                candidatas = valores >= np.partition(valores, posicion)[posicion]
+            else:
+                candidatas = valores <= np.partition(valores, limite)[limite]
+            filas, valores, seqs = filas[candidatas], valores[candidatas], seqs[candidatas]
+
+        orden = np.lexsort((seqs, valores))
+        if descendente:
+            orden = orden[::-1]
+
+        siguiente = None
+        if limite is not None and len(orden) > limite:
+            orden = orden[:limite]
+            ultimo = orden[-1]
+            siguiente = (valores[ultimo].item(), int(seqs[ultimo]))
+        return self._materializar_filas(filas[orden]), siguiente
+
+    def _mascara(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ):
+        n = self._n
+        columnas = self._columnas
+        mascara = columnas["vivo"][:n].copy()
+        if disponible is not None:
+            mascara &= columnas["disponible"][:n] == disponible
+        if categoria:
+            codigos = self._codigos_por_clave.get(normalizar(categoria))
+            if not codigos:
+                return np.zeros(n, dtype=bool)
+            if len(codigos) == 1:
+                mascara &= columnas["categoria"][:n] == codigos[0]
+            else:
+                mascara &= np.isin(columnas["categoria"][:n], codigos)
+        if precio_max is not None:
+            mascara &= columnas["precio"][:n] <= precio_max
+        if precio_min is not None:
+            mascara &= columnas["precio"][:n] >= precio_min
+        if min_rating is not None:
+            mascara &= columnas["rating"][:n] >= min_rating
+        if stock_min is not None:
+            mascara &= columnas["stock"][:n] >= stock_min
+        return mascara
+
+    def _materializar(self, fila: int) -> Producto:
+        return self._materializar_filas([fila])[0]
+
+    def _materializar_filas(self, filas) -> List[Producto]:
+        """Construye los Producto de las filas indicadas sin volver a validarlos.
+
+        Cada columna se extrae una sola vez para todas las filas; las fechas se
+        reinterpretan como datetime64[us], donde SIN_FECHA es NaT y vuelve como None.
+        """
+        columnas = self._columnas
+        filas = np.asarray(filas, dtype=np.int64)
+        ids, nombres, descripciones = self._ids, self._nombres, self._descripciones
+        categorias = self._categorias
+        return [
+            Producto.sin_validar(
+                id=ids[fila],
+                nombre=nombres[fila],
+                descripcion=descripciones[fila],
+                precio=precio,
+                stock=stock,
+                categoria=categorias[codigo],
+                disponible=disponible,
+                fecha_creacion=creacion,
+                fecha_actualizacion=actualizacion,
+                rating=rating,
+                version=version
+            )
+            for fila, precio, stock, codigo, disponible, creacion, actualizacion, rating, version in zip(
+                filas.tolist(),
+                columnas["precio"][filas].tolist(),
+                columnas["stock"][filas].tolist(),
+                columnas["categoria"][filas].tolist(),
+                columnas["disponible"][filas].tolist(),
+                columnas["fecha_creacion"][filas].view("datetime64[us]").tolist(),
+                columnas["fecha_actualizacion"][filas].view("datetime64[us]").tolist(),
+                columnas["rating"][filas].tolist(),
+                columnas["version"][filas].tolist()
+            )
+        ]
+
+    def _codificar_categoria(self, categoria: str) -> int:
+        codigo = self._codigo_categoria.get(categoria)
+        if codigo is None:
+            codigo = self._codigo_categoria[categoria] = len(self._categorias)
+            self._categorias.append(sys.intern(categoria))
+            self._codigos_por_clave.setdefault(normalizar(categoria), []).append(codigo)
+        return codigo
+
+    def _crecer(self):
+        self._capacidad *= 2
+        for nombre, columna in self._columnas.items():
+            nueva = np.zeros(self._capacidad, dtype=columna.dtype)
+            nueva[:self._n] = columna[:self._n]
+            self._columnas[nombre] = nueva
+
+    def _compactar(self):
+        """Elimina los huecos dejados por los borrados conservando el orden de inserción"""
+        vivas = np.flatnonzero(self._columnas["vivo"][:self._n])
+        for columna in self._columnas.values():
+            columna[:len(vivas)] = columna[vivas]
+            columna[len(vivas):self._n] = 0
+        self._ids = [self._ids[fila] for fila in vivas]
+        self._nombres = [self._nombres[fila] for fila in vivas]
+        self._descripciones = [self._descripciones[fila] for fila in vivas]
+        self._n = len(vivas)
+        self._fila_por_id = {producto_id: fila for fila, producto_id in enumerate(self._ids)}
@@ -1,15 +1,16 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app
-from models import productos_db, Producto
+from products import Producto
+from repository import repositorio
 from uuid import uuid4
 
 @pytest.fixture(autouse=True)
 def limpiar_base_datos():
     """Fixture para limpiar la base de datos antes de cada test"""
-    productos_db.clear()
+    repositorio.limpiar()
     yield
-    productos_db.clear()
+    repositorio.limpiar()
 
 @pytest.fixture
 def cliente():
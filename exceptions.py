@@ -1,3 +1,5 @@
+from typing import Optional
+
 class ProductoNoEncontradoError(Exception):
     """Excepción cuando un producto no existe"""
     pass
@@ -16,4 +18,22 @@ class StockNegativoError(Exception):
 
 class BusquedaInvalidaError(Exception):
     """Excepción cuando la búsqueda es inválida"""
-    pass
\ No newline at end of file
+    pass
+
+class CursorInvalidoError(Exception):
+    """Excepción cuando el cursor de paginación no es válido"""
+    pass
+
+class ConflictoVersionError(Exception):
+    """Excepción cuando la versión esperada no coincide con la actual del producto"""
+
+    def __init__(self, mensaje: str, version_actual: Optional[int] = None):
+        super().__init__(mensaje)
+        self.version_actual = version_actual
+
+class ResincronizacionRequeridaError(Exception):
+    """Excepción cuando el registro de cambios ya no contiene los cambios pedidos"""
+
+    def __init__(self, mensaje: str, ultima_secuencia: int):
+        super().__init__(mensaje)
+        self.ultima_secuencia = ultima_secuencia
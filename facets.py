@@ -0,0 +1,120 @@
+import os
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from products import Producto
+
+# Límites superiores (exclusivos) de los rangos de precio; el último rango queda abierto
+RANGOS_PRECIO = tuple(float(limite) for limite in os.getenv("RANGOS_PRECIO", "50,100,500,1000,5000").split(","))
+
+# (categoria_clave, categoria, precio, stock, rating, disponible): lo único que las facetas necesitan
+Valores = Tuple[str, str, float, int, float, bool]
+
+
+def _valores(producto: Producto) -> Valores:
+    return (
+        producto.categoria_clave, producto.categoria, producto.precio,
+        producto.stock, producto.rating, producto.disponible
+    )
+
+
+def _nombre_visible(nombres: Dict[str, int]) -> str:
+    """La grafía más usada de la categoría; a igual uso, la primera en orden alfabético"""
+    return min(nombres.items(), key=lambda item: (-item[1], item[0]))[0]
+
+
+class AcumuladorFacetas:
+    """Agregados del catálogo que admiten sumar y restar productos sin recorrerlo de nuevo"""
+
+    def __init__(self, limites: Tuple[float, ...] = RANGOS_PRECIO):
+        self.limites = limites
+        self.total = 0
+        self.disponibles = 0
+        # categoria_clave -> [conteo, suma de ratings, {grafía: conteo}]; se agrupa igual que ?categoria=
+        self.por_categoria: Dict[str, List[Any]] = {}
+        self.por_rango = [0] * (len(limites) + 1)
+        # En centavos para que sumar y restar no acumule error de redondeo
+        self.valor_stock_centavos = 0
+
+    def sumar(self, valores: Valores, signo: int = 1):
+        clave, categoria, precio, stock, rating, disponible = valores
+        self.total += signo
+        self.disponibles += signo if disponible else 0
+        faceta = self.por_categoria.setdefault(clave, [0, 0.0, {}])
+        faceta[0] += signo
+        faceta[1] += signo * rating
+        nombres = faceta[2]
+        nombres[categoria] = nombres.get(categoria, 0) + signo
+        if not nombres[categoria]:
+            del nombres[categoria]
+        if not faceta[0]:
+            del self.por_categoria[clave]
+        self.por_rango[bisect_right(self.limites, precio)] += signo
+        self.valor_stock_centavos += signo * round(precio * 100) * stock
+
+    def resumen(self) -> Dict[str, Any]:
+        desde = (0.0,) + self.limites
+        hasta = self.limites + (None,)
+        return {
+            "total": self.total,
+            "disponibles": self.disponibles,
+            "categorias": {
+                _nombre_visible(nombres): {"conteo": conteo, "rating_promedio": round(suma_rating / conteo, 2)}
+                for _, (conteo, suma_rating, nombres) in sorted(self.por_categoria.items())
+            },
+            "rangos_precio": [
+                {"desde": inicio, "hasta": fin, "conteo": conteo}
+                for inicio, fin, conteo in zip(desde, hasta, self.por_rango)
+            ],
+            "valor_stock_total": self.valor_stock_centavos / 100
+        }
+
+
+def resumir_facetas(productos: Iterable[Producto]) -> Dict[str, Any]:
+    """Calcula todas las facetas en una sola pasada sobre los productos"""
+    acumulador = AcumuladorFacetas()
+    for producto in productos:
+        acumulador.sumar(_valores(producto))
+    return acumulador.resumen()
+
+
+class ContadorFacetas:
+    """Facetas del catálogo completo mantenidas con las notificaciones del repositorio.
+
+    Guarda los valores con que se contó cada producto para poder restarlos
+    cuando se actualiza o elimina.
+    """
+
+    def __init__(self):
+        self._acumulador = AcumuladorFacetas()
+        self._valores: Dict[UUID, Valores] = {}
+        self._lock = threading.Lock()
+
+    def reconstruir(self, productos: Iterable[Producto]):
+        with self._lock:
+            self._acumulador = AcumuladorFacetas()
+            self._valores.clear()
+            for producto in productos:
+                self._agregar(producto)
+
+    def aplicar(self, operacion: str, producto: Optional[Producto]):
+        """Oyente del repositorio"""
+        with self._lock:
+            if operacion == "limpiar":
+                self._acumulador = AcumuladorFacetas()
+                self._valores.clear()
+                return
+            anteriores = self._valores.pop(producto.id, None)
+            if anteriores is not None:
+                self._acumulador.sumar(anteriores, -1)
+            if operacion != "eliminar":
+                self._agregar(producto)
+
+    def resumen(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._acumulador.resumen()
+
+    def _agregar(self, producto: Producto):
+        valores = self._valores[producto.id] = _valores(producto)
+        self._acumulador.sumar(valores)
@@ -0,0 +1,101 @@
+from itertools import combinations
+from typing import Dict, Set
+
+# Las palabras más cortas no admiten errores: "tv" a distancia 1 coincide con medio vocabulario
+LARGO_MINIMO_UN_ERROR = 4
+LARGO_MINIMO_DOS_ERRORES = 8
+DISTANCIA_MAXIMA = 2
+# Un token largo genera O(largo²) borrados; los más largos solo se encuentran sin errores
+LARGO_MAXIMO_INDEXADO = 24
+
+
+def distancia_permitida(palabra: str) -> int:
+    """Errores tolerados según el largo de la palabra buscada"""
+    if len(palabra) >= LARGO_MINIMO_DOS_ERRORES:
+        return 2
+    if len(palabra) >= LARGO_MINIMO_UN_ERROR:
+        return 1
+    return 0
+
+
+def borrados(palabra: str, distancia: int) -> Set[str]:
+    """Todas las cadenas que se obtienen quitando hasta `distancia` caracteres"""
+    resultado = {palabra}
+    for cantidad in range(1, min(distancia, len(palabra) - 1) + 1):
+        for posiciones in combinations(range(len(palabra)), cantidad):
+            resultado.add("".join(c for i, c in enumerate(palabra) if i not in posiciones))
+    return resultado
+
+
+def distancia_edicion(a: str, b: str, maximo: int) -> int:
+    """Distancia de Damerau-Levenshtein (transposiciones adyacentes); maximo + 1 si la supera"""
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        minimo_fila = i
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            valor = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if (anterior2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                valor = min(valor, anterior2[j - 2] + 1)
+            actual[j] = valor
+            minimo_fila = min(minimo_fila, valor)
+        if minimo_fila > maximo:
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return anterior[-1] if anterior[-1] <= maximo else maximo + 1
+
+
+class IndiceDifuso:
+    """Índice de borrados al estilo SymSpell sobre el vocabulario.
+
+    Si dos palabras están a distancia <= d, quitando hasta d caracteres de
+    cada una se llega a una cadena común. Se indexan los borrados de cada
+    token una vez; una consulta genera los suyos, junta los tokens que
+    comparten alguno y verifica la distancia real solo sobre esos pocos, sin
+    recorrer el vocabulario. Los tokens numéricos no se indexan: un error en
+    un número de modelo es otro modelo.
+    """
+
+    def __init__(self):
+        self._por_borrado: Dict[str, Set[str]] = {}
+
+    def limpiar(self):
+        self._por_borrado.clear()
+
+    @staticmethod
+    def _indexable(token: str) -> bool:
+        return LARGO_MINIMO_UN_ERROR - 1 <= len(token) <= LARGO_MAXIMO_INDEXADO and not token.isdigit()
+
+    def agregar(self, token: str):
+        if self._indexable(token):
+            for borrado in borrados(token, DISTANCIA_MAXIMA):
+                self._por_borrado.setdefault(borrado, set()).add(token)
+
+    def quitar(self, token: str):
+        if self._indexable(token):
+            for borrado in borrados(token, DISTANCIA_MAXIMA):
+                tokens = self._por_borrado.get(borrado)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._por_borrado[borrado]
+
+    def similares(self, palabra: str) -> Dict[str, int]:
+        """Tokens del vocabulario a distancia permitida de la palabra -> su distancia"""
+        maximo = distancia_permitida(palabra)
+        if not maximo or palabra.isdigit():
+            return {}
+        candidatos: Set[str] = set()
+        for borrado in borrados(palabra, maximo):
+            candidatos.update(self._por_borrado.get(borrado, ()))
+        resultado = {}
+        for token in candidatos:
+            distancia = distancia_edicion(palabra, token, maximo)
+            if distancia <= maximo:
+                resultado[token] = distancia
+        return resultado
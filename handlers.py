@@ -14,7 +14,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
                 "timestamp": datetime.now().isoformat(),
                 "path": request.url.path
             }
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 async def producto_no_encontrado_handler(request: Request, exc: ProductoNoEncontradoError):
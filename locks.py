@@ -0,0 +1,59 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, List
+from uuid import UUID
+from products import normalizar
+
+
+def clave_producto(producto_id: UUID) -> tuple:
+    return ("producto", producto_id)
+
+
+def clave_nombre(nombre: str) -> tuple:
+    """Los nombres son únicos sin distinguir mayúsculas ni acentos, igual que en los almacenes"""
+    return ("nombre", normalizar(nombre))
+
+
+class GestorLocks:
+    """Locks por clave creados bajo demanda y descartados cuando nadie los usa.
+
+    Las operaciones que necesitan varias claves las toman en un orden total,
+    así dos escrituras sobre conjuntos solapados no pueden interbloquearse.
+    """
+
+    def __init__(self):
+        # clave -> [lock, operaciones que lo esperan o lo tienen]
+        self._locks: Dict[Hashable, List] = {}
+        self._mutex = threading.Lock()
+
+    @contextmanager
+    def bloquear(self, *claves: Hashable) -> Iterator[None]:
+        tomadas = []
+        try:
+            for clave in sorted(set(claves), key=repr):
+                self._reservar(clave).acquire()
+                tomadas.append(clave)
+            yield
+        finally:
+            for clave in reversed(tomadas):
+                self._liberar(clave)
+
+    def __len__(self) -> int:
+        """Claves con algún lock tomado o en espera"""
+        return len(self._locks)
+
+    def _reservar(self, clave: Hashable) -> threading.Lock:
+        with self._mutex:
+            entrada = self._locks.get(clave)
+            if entrada is None:
+                entrada = self._locks[clave] = [threading.Lock(), 0]
+            entrada[1] += 1
+            return entrada[0]
+
+    def _liberar(self, clave: Hashable):
+        with self._mutex:
+            entrada = self._locks[clave]
+            entrada[0].release()
+            entrada[1] -= 1
+            if not entrada[1]:
+                del self._locks[clave]
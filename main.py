@@ -1,27 +1,224 @@
-from fastapi import FastAPI, HTTPException, status
-from typing import List, Optional
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Literal, Optional
 from uuid import UUID, uuid4
 from datetime import datetime
+import asyncio
+import logging
+import os
 import time
-from products import Producto, ProductoUpdate, productos_db
+from pydantic import ValidationError
+from products import (
+    Producto, ProductoUpdate, ResultadoLote, ResultadoOperacion, ResultadoImportacion, Facetas,
+    PaginaCambios, Sugerencia
+)
+from repository import repositorio
+from exceptions import (
+    ProductoNoEncontradoError, ProductoDuplicadoError, CursorInvalidoError, ConflictoVersionError,
+    ResincronizacionRequeridaError
+)
+from utils import (
+    codificar_cursor, decodificar_cursor, serializar_json,
+    generar_timestamps, actualizar_timestamp, resumir_errores_validacion,
+    etag_producto, version_de_if_match, fecha_http, es_no_modificado
+)
+from cache import cache_respuestas
+from changelog import registro_cambios, eventos_sse
+from metrics import metricas
+from catalog_io import (
+    COLUMNAS_EXPORTACION, leer_lineas, registros_csv, registros_ndjson,
+    importar_registros, fila_csv, producto_a_fila_csv
+)
+from handlers import http_exception_handler
+from serialization import SERIALIZACION_RAPIDA, RespuestaJSONRapida, json_productos, serializar_rapido
+from admission import REINTENTO_SATURADO, RUTAS_EXENTAS, limites, segundos_retry_after
+from profiling import RutaPerfilada, perfilador, tramo
+from trie import TOP_K_NODO
+
+SINCRONIZACION_INTERVALO = float(os.getenv("SINCRONIZACION_INTERVALO", "0.1"))
+
+async def sincronizar_periodicamente():
+    """Con un almacén compartido entre workers, aplica aquí las escrituras de los demás"""
+    while True:
+        await asyncio.sleep(SINCRONIZACION_INTERVALO)
+        try:
+            await repositorio.sincronizar()
+        except Exception:
+            logging.getLogger(__name__).exception("Error al sincronizar con el almacén compartido")
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """Sincroniza con los demás workers mientras corre y libera los recursos del repositorio al apagar"""
+    tarea = None
+    if repositorio.store.compartido and SINCRONIZACION_INTERVALO > 0:
+        tarea = asyncio.create_task(sincronizar_periodicamente())
+    yield
+    if tarea is not None:
+        tarea.cancel()
+    repositorio.cerrar()
 
 app = FastAPI(
     title="API de Productos - Tienda Online",
     description="API para gestión de productos de una tienda online",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=ciclo_de_vida
 )
+# Las rutas se registran más abajo: todas miden sus tramos cuando el perfilado está activo
+app.router.route_class = RutaPerfilada
+
+MAX_LOTE = int(os.getenv("MAX_LOTE", "5000"))
+MAX_ERRORES_IMPORTACION = int(os.getenv("MAX_ERRORES_IMPORTACION", "1000"))
+CACHE_CONTROL_PRODUCTO = os.getenv("CACHE_CONTROL_PRODUCTO", "no-cache")
+CACHE_CONTROL_LISTADO = os.getenv("CACHE_CONTROL_LISTADO", "no-cache")
+HEADERS_VALIDACION = ("ETag", "Last-Modified", "Cache-Control")
+
+repositorio.suscribir(cache_respuestas.invalidar)
+repositorio.suscribir(json_productos.olvidar)
+repositorio.suscribir_con_secuencia(registro_cambios.registrar)
+# Con un almacén compartido la numeración sigue la de su registro de cambios, la misma en todos los workers
+registro_cambios.reiniciar(repositorio.version_catalogo()[0])
+
+def validadores_catalogo() -> Dict[str, str]:
+    """ETag y Last-Modified de los listados, derivados del número de cambio del catálogo"""
+    secuencia, modificado = repositorio.version_catalogo()
+    return {
+        "ETag": f'"{repositorio.epoca}-{secuencia}"',
+        "Last-Modified": fecha_http(modificado),
+        "Cache-Control": CACHE_CONTROL_LISTADO
+    }
+
+def no_modificado(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """304 sin cuerpo si las condiciones de la solicitud coinciden con los validadores"""
+    if not es_no_modificado(request.headers, headers.get("ETag"), headers.get("Last-Modified")):
+        return None
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={nombre: headers[nombre] for nombre in HEADERS_VALIDACION if nombre in headers}
+    )
+
+async def responder_con_cache(
+    request: Request,
+    calcular,
+    validadores: Optional[Callable[[], Dict[str, str]]] = None
+) -> Response:
+    """Sirve la respuesta desde la caché o la calcula con calcular() -> (contenido, headers).
+
+    Con validadores() conocidos de antemano el 304 se decide sin calcular nada;
+    si no, se decide con los que retorne calcular(), antes de serializar.
+    """
+    # La generación se lee antes que los validadores: si una escritura se cuela entre
+    # ambos, la caché rechaza guardar el cuerpo nuevo bajo el ETag anterior
+    generacion = cache_respuestas.generacion
+    actuales = validadores() if validadores is not None else None
+    if actuales is not None:
+        respuesta = no_modificado(request, actuales)
+        if respuesta is not None:
+            return respuesta
+
+    clave = cache_respuestas.clave(request.url.path, request.query_params.multi_items())
+    guardada = cache_respuestas.obtener(clave)
+    if guardada is not None:
+        cuerpo, headers = guardada
+        if actuales is not None:
+            # El 304 ya se descartó con los validadores vigentes; no se decide con los guardados
+            return Response(cuerpo, media_type="application/json", headers={**headers, **actuales})
+        return no_modificado(request, headers) or Response(cuerpo, media_type="application/json", headers=headers)
+
+    contenido, headers = await calcular()
+    if actuales is not None:
+        headers = {**actuales, **headers}
+    else:
+        respuesta = no_modificado(request, headers)
+        if respuesta is not None:
+            return respuesta
+    with tramo("serializacion"):
+        cuerpo = serializar_rapido(contenido) if SERIALIZACION_RAPIDA else serializar_json(contenido)
+    cache_respuestas.guardar(clave, generacion, cuerpo, headers)
+    return Response(cuerpo, media_type="application/json", headers=headers)
+
+def responder(response: Response, contenido: Any, status_code: int = status.HTTP_200_OK):
+    """Con SERIALIZACION_RAPIDA retorna la respuesta ya codificada y FastAPI no revalida el response_model"""
+    if SERIALIZACION_RAPIDA:
+        return RespuestaJSONRapida(contenido, status_code=status_code, headers=dict(response.headers))
+    return contenido
+
+def validar_rangos(precio_min: Optional[float], precio_max: Optional[float]):
+    """400 si los límites de precio no forman un rango válido"""
+    if precio_max is not None and precio_max <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El precio máximo debe ser mayor a 0"
+        )
+    if precio_min is not None and precio_max is not None and precio_min > precio_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El precio mínimo no puede ser mayor al precio máximo"
+        )
+
+def conflicto_de_version(e: ConflictoVersionError) -> HTTPException:
+    """412 con el ETag vigente para que el cliente pueda releer y reintentar"""
+    headers = {"ETag": etag_producto(e.version_actual)} if e.version_actual is not None else None
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=str(e),
+        headers=headers
+    )
+
+@app.middleware("http")
+async def limitar_solicitudes(request, call_next):
+    """Rate limiting por cliente y por ruta y control de admisión; corre dentro del de métricas"""
+    ruta = request.url.path
+    if not limites.habilitados or ruta in RUTAS_EXENTAS:
+        return await call_next(request)
 
-def simular_retraso_db():
-    """Simula un pequeño retraso de base de datos"""
-    time.sleep(0.1)
+    espera = limites.tasa.admitir(limites.cliente(request), ruta)
+    if espera:
+        return await http_exception_handler(request, HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Límite de solicitudes excedido",
+            headers={"Retry-After": segundos_retry_after(espera)}
+        ))
+    if not await limites.admision.entrar():
+        return await http_exception_handler(request, HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor saturado, reintente más tarde",
+            headers={"Retry-After": str(REINTENTO_SATURADO)}
+        ))
+    try:
+        respuesta = await call_next(request)
+    except BaseException:
+        limites.admision.salir()
+        raise
+    # El cuerpo se envía después de retornar: exportar, NDJSON o SSE ocupan el lugar hasta terminar
+    respuesta.body_iterator = limites.admision.salir_al_terminar(respuesta.body_iterator)
+    return respuesta
 
 @app.middleware("http")
 async def manejar_tiempo_solicitud(request, call_next):
-    """Middleware para medir el tiempo de procesamiento de solicitudes"""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
+    """Middleware que mide cada solicitud con perf_counter_ns, alimenta las métricas y el perfilado"""
+    metodo = request.method
+    inicio = time.perf_counter_ns()
+    if metricas.habilitadas:
+        metricas.inicio_solicitud(metodo)
+    perfil = perfilador.iniciar(request) if perfilador.habilitado else None
+    estado = 500
+    server_timing = None
+    try:
+        response = await call_next(request)
+        estado = response.status_code
+    finally:
+        duracion_ns = time.perf_counter_ns() - inicio
+        if metricas.habilitadas or perfil is not None:
+            ruta = request.scope.get("route")
+            plantilla = ruta.path if ruta is not None else "sin_ruta"
+            if metricas.habilitadas:
+                metricas.fin_solicitud(metodo, plantilla, estado, duracion_ns)
+            if perfil is not None:
+                server_timing = perfilador.terminar(perfil, metodo, str(request.url), plantilla, estado, duracion_ns)
+    response.headers["X-Process-Time"] = str(duracion_ns / 1e9)
+    if server_timing:
+        response.headers["Server-Timing"] = server_timing
     return response
 
 @app.get("/")
@@ -36,58 +233,333 @@ async def root():
             "Crear producto": "POST /productos",
             "Actualizar producto": "PUT /productos/{id}",
             "Eliminar producto": "DELETE /productos/{id}",
-            "Buscar productos": "GET /productos/buscar"
+            "Operaciones en lote": "POST | PATCH | DELETE /productos/bulk",
+            "Importar catálogo": "POST /productos/importar",
+            "Exportar catálogo": "GET /productos/exportar",
+            "Buscar productos": "GET /productos/buscar?q={texto}&difusa=true",
+            "Autocompletar": "GET /productos/autocompletar?q={prefijo}&k=10",
+            "Top de productos": "GET /productos/top?por=rating&k=10&categoria={categoria}",
+            "Facetas del catálogo": "GET /productos/facetas",
+            "Cambios del catálogo": "GET /productos/cambios?desde={secuencia}",
+            "Cambios en vivo (SSE)": "GET /productos/cambios/stream",
+            "Estadísticas de caché": "GET /cache/estadisticas",
+            "Estadísticas de límites": "GET /limites/estadisticas",
+            "Solicitudes lentas": "GET /debug/solicitudes-lentas",
+            "Métricas": "GET /metrics"
         }
     }
 
 @app.get("/productos", response_model=List[Producto], status_code=status.HTTP_200_OK)
 async def obtener_todos_los_productos(
+    request: Request,
     disponible: Optional[bool] = None, 
     categoria: Optional[str] = None,
-    precio_max: Optional[float] = None
+    precio_max: Optional[float] = None,
+    precio_min: Optional[float] = Query(None, ge=0),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    stock_min: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    ordenar_por: Optional[Literal["precio", "rating", "fecha_creacion"]] = None,
+    orden: Literal["asc", "desc"] = "asc",
+    formato: Literal["json", "ndjson"] = "json",
+    explain: bool = False
 ):
-    """Obtiene todos los productos, con filtros opcionales"""
+    """Obtiene todos los productos, con filtros opcionales, paginación por cursor y streaming NDJSON.
+
+    Con explain=true retorna el plan de filtrado elegido y las filas recorridas en lugar de los productos.
+    """
     try:
-        simular_retraso_db()
-        
-        productos_filtrados = productos_db
-        
-        if disponible is not None:
-            productos_filtrados = [p for p in productos_filtrados if p.disponible == disponible]
-            
-        if categoria:
-            categoria_lower = categoria.lower()
-            productos_filtrados = [p for p in productos_filtrados if p.categoria.lower() == categoria_lower]
-        
-        if precio_max is not None:
-            if precio_max <= 0:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="El precio máximo debe ser mayor a 0"
-                )
-            productos_filtrados = [p for p in productos_filtrados if p.precio <= precio_max]
+        validar_rangos(precio_min, precio_max)
+
+        filtros = {
+            "disponible": disponible,
+            "categoria": categoria,
+            "precio_max": precio_max,
+            "precio_min": precio_min,
+            "min_rating": min_rating,
+            "stock_min": stock_min
+        }
+        descendente = orden == "desc"
+        if explain:
+            return Response(serializar_json(await repositorio.explicar(**filtros)), media_type="application/json")
+        if formato == "ndjson":
+            validadores = validadores_catalogo()
+            respuesta = no_modificado(request, validadores)
+            if respuesta is not None:
+                return respuesta
+
+            async def lineas():
+                async for producto in repositorio.iterar(
+                    ordenar_por=ordenar_por, descendente=descendente, **filtros
+                ):
+                    yield producto.model_dump_json() + "\n"
+
+            return StreamingResponse(lineas(), media_type="application/x-ndjson", headers=validadores)
+
+        async def calcular():
+            if limit is None and cursor is None and ordenar_por is None:
+                return await repositorio.listar(**filtros), {}
+
+            despues_de = decodificar_cursor(cursor, ordenar_por, descendente) if cursor else None
+            productos_filtrados, siguiente = await repositorio.paginar(
+                ordenar_por=ordenar_por,
+                descendente=descendente,
+                despues_de=despues_de,
+                limite=limit,
+                **filtros
+            )
+            headers = {}
+            if siguiente is not None:
+                headers["X-Next-Cursor"] = codificar_cursor(ordenar_por, descendente, siguiente)
+            return productos_filtrados, headers
         
-        return productos_filtrados
+        return await responder_con_cache(request, calcular, validadores_catalogo)
+    except CursorInvalidoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-@app.get("/productos/{producto_id}", response_model=Producto, status_code=status.HTTP_200_OK)
-async def obtener_producto(producto_id: UUID):
-    """Obtiene un producto específico por su ID."""
+@app.get("/productos/buscar", response_model=List[Producto])
+async def buscar_productos(
+    request: Request,
+    q: str,
+    min_rating: Optional[float] = None,
+    difusa: bool = False
+):
+    """Busca productos por término en nombre o descripción; con difusa=true tolera errores de tipeo"""
     try:
-        simular_retraso_db()
+        if len(q.strip()) < 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El término de búsqueda debe tener al menos 2 caracteres"
+            )
         
-        for producto in productos_db:
-            if producto.id == producto_id:
-                return producto
+        async def calcular():
+            return await repositorio.buscar(q, min_rating, difusa), {}
         
+        return await responder_con_cache(request, calcular, validadores_catalogo)
+    except HTTPException:
+        raise
+    except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Producto con ID {producto_id} no encontrado"
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error en la búsqueda: {str(e)}"
         )
+
+@app.get("/productos/autocompletar", response_model=List[Sugerencia])
+async def autocompletar_productos(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    k: int = Query(10, ge=1, le=TOP_K_NODO)
+):
+    """Sugerencias para lo que se está escribiendo: los k mejor valorados cuyo nombre tiene una palabra con ese prefijo"""
+    try:
+        async def calcular():
+            productos = await repositorio.autocompletar(q, k)
+            return [
+                {"id": p.id, "nombre": p.nombre, "categoria": p.categoria, "rating": p.rating}
+                for p in productos
+            ], {}
+
+        return await responder_con_cache(request, calcular, validadores_catalogo)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al autocompletar: {str(e)}"
+        )
+
+@app.get("/productos/top", response_model=List[Producto], status_code=status.HTTP_200_OK)
+async def obtener_top_productos(
+    request: Request,
+    por: Literal["precio", "rating", "fecha_creacion"] = "rating",
+    k: int = Query(10, ge=1, le=100),
+    orden: Literal["asc", "desc"] = "desc",
+    disponible: Optional[bool] = None,
+    categoria: Optional[str] = None,
+    precio_max: Optional[float] = None,
+    precio_min: Optional[float] = Query(None, ge=0),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    stock_min: Optional[int] = Query(None, ge=0)
+):
+    """Los k mejores según `por` entre los productos filtrados, p. ej. los 10 mejor valorados de una categoría"""
+    try:
+        validar_rangos(precio_min, precio_max)
+
+        async def calcular():
+            return await repositorio.top(
+                k,
+                por,
+                descendente=orden == "desc",
+                disponible=disponible,
+                categoria=categoria,
+                precio_max=precio_max,
+                precio_min=precio_min,
+                min_rating=min_rating,
+                stock_min=stock_min
+            ), {}
+
+        return await responder_con_cache(request, calcular, validadores_catalogo)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener el top de productos: {str(e)}"
+        )
+
+@app.get("/productos/facetas", response_model=Facetas, status_code=status.HTTP_200_OK)
+async def obtener_facetas(
+    request: Request,
+    disponible: Optional[bool] = None,
+    categoria: Optional[str] = None,
+    precio_max: Optional[float] = None,
+    precio_min: Optional[float] = Query(None, ge=0),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    stock_min: Optional[int] = Query(None, ge=0)
+):
+    """Conteos por categoría y rango de precio, rating promedio y valor total del stock"""
+    try:
+        validar_rangos(precio_min, precio_max)
+
+        async def calcular():
+            return await repositorio.facetas(
+                disponible=disponible,
+                categoria=categoria,
+                precio_max=precio_max,
+                precio_min=precio_min,
+                min_rating=min_rating,
+                stock_min=stock_min
+            ), {}
+
+        return await responder_con_cache(request, calcular, validadores_catalogo)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al calcular las facetas: {str(e)}"
+        )
+
+@app.get("/productos/cambios", response_model=PaginaCambios, status_code=status.HTTP_200_OK)
+async def obtener_cambios(
+    desde: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=MAX_LOTE)
+):
+    """Cambios posteriores a la secuencia `desde`; 410 si el registro ya no los contiene"""
+    try:
+        cambios, ultima_secuencia = registro_cambios.desde(desde, limit)
+        return {
+            "cambios": cambios,
+            "ultima_secuencia": ultima_secuencia,
+            "hay_mas": bool(cambios) and cambios[-1]["secuencia"] < ultima_secuencia
+        }
+    except ResincronizacionRequeridaError as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e),
+            headers={"X-Resync-Required": "true", "X-Ultima-Secuencia": str(e.ultima_secuencia)}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al leer los cambios: {str(e)}"
+        )
+
+@app.get("/productos/cambios/stream")
+async def transmitir_cambios(
+    request: Request,
+    desde: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-Sent Events con los cambios del catálogo; sin `desde` empieza en el cambio actual"""
+    if desde is None:
+        desde = int(last_event_id) if last_event_id and last_event_id.isdigit() else registro_cambios.ultima_secuencia
+    return StreamingResponse(
+        eventos_sse(registro_cambios, desde, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def validar_tamano_lote(items: list):
+    """Rechaza lotes vacíos o más grandes que MAX_LOTE"""
+    if not items or len(items) > MAX_LOTE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El lote debe tener entre 1 y {MAX_LOTE} elementos"
+        )
+
+def armar_resultado_lote(
+    response: Response,
+    atomico: bool,
+    total: int,
+    errores: Dict[int, str],
+    ids: Dict[int, UUID],
+    estado_exito: str
+) -> ResultadoLote:
+    """Arma el estado de cada elemento; un lote atómico con errores responde 400 sin aplicar nada"""
+    aplicado = not (atomico and errores)
+    resultados = []
+    for indice in range(total):
+        if indice in errores:
+            resultados.append(ResultadoOperacion(indice=indice, estado="error", id=ids.get(indice), error=errores[indice]))
+        elif aplicado:
+            resultados.append(ResultadoOperacion(indice=indice, estado=estado_exito, id=ids.get(indice)))
+        else:
+            # Nada se aplicó: en un alta el id generado nunca existió y al reintentar saldría otro
+            resultados.append(ResultadoOperacion(indice=indice, estado="omitido", id=None))
+    if not aplicado:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    return ResultadoLote(
+        atomico=atomico,
+        aplicado=aplicado,
+        exitosos=total - len(errores) if aplicado else 0,
+        fallidos=len(errores),
+        resultados=resultados
+    )
+
+@app.post("/productos/bulk", response_model=ResultadoLote, status_code=status.HTTP_200_OK)
+async def crear_productos_lote(
+    response: Response,
+    items: List[Dict[str, Any]] = Body(...),
+    atomico: bool = True
+):
+    """Crea varios productos validando el lote en una sola pasada"""
+    try:
+        validar_tamano_lote(items)
+
+        errores: Dict[int, str] = {}
+        ids: Dict[int, UUID] = {}
+        validos = []
+        timestamps = generar_timestamps()
+        for indice, datos in enumerate(items):
+            try:
+                producto = Producto.model_validate(datos)
+            except ValidationError as e:
+                errores[indice] = resumir_errores_validacion(e)
+                continue
+            producto.id = uuid4()
+            producto.fecha_creacion = timestamps["fecha_creacion"]
+            producto.fecha_actualizacion = timestamps["fecha_actualizacion"]
+            ids[indice] = producto.id
+            validos.append((indice, producto))
+
+        if validos and not (atomico and errores):
+            errores_lote = await repositorio.crear_lote([p for _, p in validos], atomico)
+            for (indice, _), error in zip(validos, errores_lote):
+                if error is not None:
+                    errores[indice] = error
+                    ids.pop(indice)
+
+        return armar_resultado_lote(response, atomico, len(items), errores, ids, "creado")
     except HTTPException:
         raise
     except Exception as e:
@@ -96,27 +568,44 @@ async def obtener_producto(producto_id: UUID):
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-@app.post("/productos", response_model=Producto, status_code=status.HTTP_201_CREATED)
-async def crear_producto(producto: Producto):
-    """Crea un nuevo producto."""
+@app.patch("/productos/bulk", response_model=ResultadoLote, status_code=status.HTTP_200_OK)
+async def actualizar_productos_lote(
+    response: Response,
+    items: List[Dict[str, Any]] = Body(...),
+    atomico: bool = True
+):
+    """Actualiza varios productos; cada elemento lleva su id y los campos a cambiar"""
     try:
-        simular_retraso_db()
+        validar_tamano_lote(items)
 
-        producto.id = uuid4()
-        ahora = datetime.now()
-        producto.fecha_creacion = ahora
-        producto.fecha_actualizacion = ahora
+        errores: Dict[int, str] = {}
+        ids: Dict[int, UUID] = {}
+        validos = []
+        ahora = actualizar_timestamp()
+        for indice, datos in enumerate(items):
+            datos = dict(datos)
+            try:
+                producto_id = UUID(str(datos.pop("id")))
+            except (KeyError, ValueError):
+                errores[indice] = "id: se requiere un UUID válido"
+                continue
+            ids[indice] = producto_id
+            try:
+                cambios = ProductoUpdate.model_validate(datos)
+            except ValidationError as e:
+                errores[indice] = resumir_errores_validacion(e)
+                continue
+            update_data = cambios.cambios()
+            update_data["fecha_actualizacion"] = ahora
+            validos.append((indice, (producto_id, update_data)))
 
-        for producto_existente in productos_db:
-            if producto_existente.nombre.lower() == producto.nombre.lower():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Ya existe un producto con ese nombre"
-                )
+        if validos and not (atomico and errores):
+            errores_lote = await repositorio.actualizar_lote([c for _, c in validos], atomico)
+            for (indice, _), error in zip(validos, errores_lote):
+                if error is not None:
+                    errores[indice] = error
 
-        productos_db.append(producto)
-        
-        return producto
+        return armar_resultado_lote(response, atomico, len(items), errores, ids, "actualizado")
     except HTTPException:
         raise
     except Exception as e:
@@ -125,41 +614,89 @@ async def crear_producto(producto: Producto):
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-@app.put("/productos/{producto_id}", response_model=Producto, status_code=status.HTTP_200_OK)
-async def actualizar_producto(producto_id: UUID, producto_actualizado: ProductoUpdate):
-    """Actualiza un producto existente."""
+@app.delete("/productos/bulk", response_model=ResultadoLote, status_code=status.HTTP_200_OK)
+async def eliminar_productos_lote(
+    response: Response,
+    ids_productos: List[UUID] = Body(...),
+    atomico: bool = True
+):
+    """Elimina varios productos por su ID"""
     try:
-        simular_retraso_db()
+        validar_tamano_lote(ids_productos)
 
-        producto_encontrado = None
-        for producto in productos_db:
-            if producto.id == producto_id:
-                producto_encontrado = producto
-                break
-        
-        if not producto_encontrado:
+        errores: Dict[int, str] = {}
+        errores_lote = await repositorio.eliminar_lote(ids_productos, atomico)
+        for indice, error in enumerate(errores_lote):
+            if error is not None:
+                errores[indice] = error
+
+        ids = dict(enumerate(ids_productos))
+        return armar_resultado_lote(response, atomico, len(ids_productos), errores, ids, "eliminado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+@app.post("/productos/importar", response_model=ResultadoImportacion, status_code=status.HTTP_200_OK)
+async def importar_productos(
+    request: Request,
+    formato: Literal["csv", "ndjson"] = "csv",
+    tamano_lote: int = Query(500, ge=1, le=MAX_LOTE)
+):
+    """Importa productos desde un cuerpo CSV o NDJSON leído en streaming"""
+    try:
+        lineas = leer_lineas(request.stream())
+        registros = registros_csv(lineas) if formato == "csv" else registros_ndjson(lineas)
+        return await importar_registros(registros, repositorio, tamano_lote, MAX_ERRORES_IMPORTACION)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+@app.get("/productos/exportar", status_code=status.HTTP_200_OK)
+async def exportar_productos(
+    formato: Literal["csv", "ndjson"] = "csv",
+    disponible: Optional[bool] = None,
+    categoria: Optional[str] = None
+):
+    """Exporta el catálogo en streaming con memoria constante"""
+    async def contenido():
+        if formato == "csv":
+            yield fila_csv(COLUMNAS_EXPORTACION)
+        async for producto in repositorio.iterar(disponible=disponible, categoria=categoria):
+            yield producto_a_fila_csv(producto) if formato == "csv" else producto.model_dump_json() + "\n"
+
+    media_type = "text/csv" if formato == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        contenido(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="productos.{formato}"'}
+    )
+
+@app.get("/productos/{producto_id}", response_model=Producto, status_code=status.HTTP_200_OK)
+async def obtener_producto(request: Request, producto_id: UUID):
+    """Obtiene un producto específico por su ID."""
+    try:
+        async def calcular():
+            producto = await repositorio.obtener(producto_id)
+            if producto is not None:
+                headers = {"ETag": etag_producto(producto.version), "Cache-Control": CACHE_CONTROL_PRODUCTO}
+                if producto.fecha_actualizacion is not None:
+                    headers["Last-Modified"] = fecha_http(producto.fecha_actualizacion)
+                return producto, headers
+            
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Producto con ID {producto_id} no encontrado"
             )
-
-        if producto_actualizado.nombre is not None:
-            for producto_existente in productos_db:
-                if (producto_existente.id != producto_id and 
-                    producto_existente.nombre.lower() == producto_actualizado.nombre.lower()):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Ya existe un producto con ese nombre"
-                    )
-
-        update_data = producto_actualizado.dict(exclude_unset=True)
-        for campo, valor in update_data.items():
-            if valor is not None:
-                setattr(producto_encontrado, campo, valor)
-
-        producto_encontrado.fecha_actualizacion = datetime.now()
         
-        return producto_encontrado
+        return await responder_con_cache(request, calcular)
     except HTTPException:
         raise
     except Exception as e:
@@ -168,23 +705,23 @@ async def actualizar_producto(producto_id: UUID, producto_actualizado: ProductoU
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-@app.delete("/productos/{producto_id}", status_code=status.HTTP_200_OK)
-async def eliminar_producto(producto_id: UUID):
-    """Elimina un producto existente."""
-    try:
-        simular_retraso_db()
-
-        for i, producto in enumerate(productos_db):
-            if producto.id == producto_id:
-                producto_eliminado = productos_db.pop(i)
-                return {
-                    "message": "Producto eliminado correctamente",
-                    "producto_eliminado": producto_eliminado
-                }
+@app.post("/productos", response_model=Producto, status_code=status.HTTP_201_CREATED)
+async def crear_producto(producto: Producto, response: Response):
+    """Crea un nuevo producto."""
+    try:
+        producto.id = uuid4()
+        ahora = datetime.now()
+        producto.fecha_creacion = ahora
+        producto.fecha_actualizacion = ahora
+
+        await repositorio.crear(producto)
         
+        response.headers["ETag"] = etag_producto(producto.version)
+        return responder(response, producto, status.HTTP_201_CREATED)
+    except ProductoDuplicadoError as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Producto con ID {producto_id} no encontrado"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except HTTPException:
         raise
@@ -194,46 +731,90 @@ async def eliminar_producto(producto_id: UUID):
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-@app.get("/productos/buscar", response_model=List[Producto])
-async def buscar_productos(q: str, min_rating: Optional[float] = None):
-    """Busca productos por término en nombre o descripción"""
+@app.put("/productos/{producto_id}", response_model=Producto, status_code=status.HTTP_200_OK)
+async def actualizar_producto(
+    producto_id: UUID,
+    producto_actualizado: ProductoUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
+    """Actualiza un producto existente; con If-Match solo si sigue en esa versión."""
     try:
-        if len(q.strip()) < 2:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El término de búsqueda debe tener al menos 2 caracteres"
-            )
-        
-        q_lower = q.lower()
-        resultados = []
-        
-        for producto in productos_db:
-            if (q_lower in producto.nombre.lower() or 
-                (producto.descripcion and q_lower in producto.descripcion.lower())):
-                
-                if min_rating is None or producto.rating >= min_rating:
-                    resultados.append(producto)
+        version_esperada = version_de_if_match(if_match)
+        update_data = producto_actualizado.cambios()
+        update_data["fecha_actualizacion"] = datetime.now()
+
+        producto_encontrado = await repositorio.actualizar(producto_id, update_data, version_esperada)
         
-        return resultados
+        response.headers["ETag"] = etag_producto(producto_encontrado.version)
+        return responder(response, producto_encontrado)
+    except ProductoNoEncontradoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ConflictoVersionError as e:
+        raise conflicto_de_version(e)
+    except ProductoDuplicadoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error en la búsqueda: {str(e)}"
+            detail=f"Error interno del servidor: {str(e)}"
         )
 
-@app.exception_handler(HTTPException)
-async def http_exception_handler(request, exc):
-    """Manejador global de excepciones HTTP"""
-    return {
-        "error": {
-            "message": exc.detail,
-            "status_code": exc.status_code,
-            "timestamp": datetime.now().isoformat()
+@app.delete("/productos/{producto_id}", status_code=status.HTTP_200_OK)
+async def eliminar_producto(producto_id: UUID, if_match: Optional[str] = Header(None)):
+    """Elimina un producto existente; con If-Match solo si sigue en esa versión."""
+    try:
+        producto_eliminado = await repositorio.eliminar(producto_id, version_de_if_match(if_match))
+        return {
+            "message": "Producto eliminado correctamente",
+            "producto_eliminado": producto_eliminado
         }
-    }
+    except ProductoNoEncontradoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ConflictoVersionError as e:
+        raise conflicto_de_version(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def exportar_metricas():
+    """Métricas en formato de texto de Prometheus"""
+    return PlainTextResponse(
+        metricas.exportar(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/cache/estadisticas")
+async def estadisticas_cache():
+    """Contadores de aciertos, fallos y expulsiones de la caché de respuestas"""
+    return cache_respuestas.estadisticas()
+
+@app.get("/limites/estadisticas")
+async def estadisticas_limites():
+    """Rechazos por presupuesto y por saturación, solicitudes en curso y en cola"""
+    return limites.estadisticas()
+
+@app.get("/debug/solicitudes-lentas")
+async def solicitudes_lentas(limite: Optional[int] = Query(None, ge=1)):
+    """Solicitudes lentas o perfiladas a pedido, con sus tramos y las funciones más costosas"""
+    return {**perfilador.estadisticas(), "solicitudes": perfilador.solicitudes_lentas(limite)}
+
+app.add_exception_handler(HTTPException, http_exception_handler)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    from server import main as ejecutar_servidor
+    ejecutar_servidor(app)
\ No newline at end of file
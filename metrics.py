@@ -0,0 +1,122 @@
+import os
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+METRICAS_HABILITADAS = os.getenv("METRICAS_HABILITADAS", "1") != "0"
+
+# Límites de los buckets en segundos, al estilo de los clientes de Prometheus
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma de buckets fijos; observa nanosegundos enteros para no redondear en cada solicitud"""
+
+    __slots__ = ("limites_ns", "conteos", "suma_ns", "total")
+
+    def __init__(self, limites_ns: Tuple[int, ...]):
+        self.limites_ns = limites_ns
+        # Un conteo por bucket más el desborde (+Inf); se acumulan al exportar
+        self.conteos = [0] * (len(limites_ns) + 1)
+        self.suma_ns = 0
+        self.total = 0
+
+    def observar(self, duracion_ns: int):
+        self.conteos[bisect_left(self.limites_ns, duracion_ns)] += 1
+        self.suma_ns += duracion_ns
+        self.total += 1
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(**valores) -> str:
+    return "{" + ",".join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in valores.items()) + "}"
+
+
+class Metricas:
+    """Contadores, histogramas y gauges de la API en formato de texto de Prometheus.
+
+    Solo se actualiza desde el event loop, así que no necesita locks.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS_SEGUNDOS, habilitadas: bool = METRICAS_HABILITADAS):
+        self.habilitadas = habilitadas
+        self.buckets = buckets
+        self._limites_ns = tuple(int(b * 1e9) for b in buckets)
+        self.solicitudes: Dict[Tuple[str, str, int], int] = {}
+        self.latencias: Dict[Tuple[str, str], Histograma] = {}
+        self.en_curso: Dict[str, int] = {}
+        self.operaciones: Dict[str, Histograma] = {}
+
+    def reiniciar(self):
+        """Pone todas las series en cero"""
+        self.solicitudes.clear()
+        self.latencias.clear()
+        self.en_curso.clear()
+        self.operaciones.clear()
+
+    def inicio_solicitud(self, metodo: str):
+        self.en_curso[metodo] = self.en_curso.get(metodo, 0) + 1
+
+    def fin_solicitud(self, metodo: str, ruta: str, estado: int, duracion_ns: int):
+        self.en_curso[metodo] -= 1
+        clave = (metodo, ruta, estado)
+        self.solicitudes[clave] = self.solicitudes.get(clave, 0) + 1
+        histograma = self.latencias.get((metodo, ruta))
+        if histograma is None:
+            histograma = self.latencias[(metodo, ruta)] = Histograma(self._limites_ns)
+        histograma.observar(duracion_ns)
+
+    def observar_operacion(self, operacion: str, duracion_ns: int):
+        histograma = self.operaciones.get(operacion)
+        if histograma is None:
+            histograma = self.operaciones[operacion] = Histograma(self._limites_ns)
+        histograma.observar(duracion_ns)
+
+    def exportar(self) -> str:
+        """Genera el texto de exposición de Prometheus (versión 0.0.4)"""
+        lineas: List[str] = [
+            "# HELP http_requests_total Solicitudes HTTP atendidas por ruta y estado",
+            "# TYPE http_requests_total counter"
+        ]
+        for (metodo, ruta, estado), valor in sorted(self.solicitudes.items()):
+            lineas.append(f"http_requests_total{_etiquetas(method=metodo, route=ruta, status=estado)} {valor}")
+
+        lineas += [
+            "# HELP http_requests_in_flight Solicitudes HTTP en curso",
+            "# TYPE http_requests_in_flight gauge"
+        ]
+        for metodo, valor in sorted(self.en_curso.items()):
+            lineas.append(f"http_requests_in_flight{_etiquetas(method=metodo)} {valor}")
+
+        lineas += [
+            "# HELP http_request_duration_seconds Latencia de las solicitudes HTTP",
+            "# TYPE http_request_duration_seconds histogram"
+        ]
+        for (metodo, ruta), histograma in sorted(self.latencias.items()):
+            self._exportar_histograma(
+                lineas, "http_request_duration_seconds", histograma, method=metodo, route=ruta
+            )
+
+        lineas += [
+            "# HELP store_operation_duration_seconds Duración de las operaciones del repositorio",
+            "# TYPE store_operation_duration_seconds histogram"
+        ]
+        for operacion, histograma in sorted(self.operaciones.items()):
+            self._exportar_histograma(
+                lineas, "store_operation_duration_seconds", histograma, operation=operacion
+            )
+        return "\n".join(lineas) + "\n"
+
+    def _exportar_histograma(self, lineas: List[str], nombre: str, histograma: Histograma, **etiquetas: str):
+        acumulado = 0
+        for limite, conteo in zip(self.buckets, histograma.conteos):
+            acumulado += conteo
+            lineas.append(f"{nombre}_bucket{_etiquetas(**etiquetas, le=repr(limite))} {acumulado}")
+        lineas.append(f"{nombre}_bucket{_etiquetas(**etiquetas, le='+Inf')} {histograma.total}")
+        lineas.append(f"{nombre}_sum{_etiquetas(**etiquetas)} {histograma.suma_ns / 1e9}")
+        lineas.append(f"{nombre}_count{_etiquetas(**etiquetas)} {histograma.total}")
+
+
+metricas = Metricas()
@@ -0,0 +1,470 @@
+import gc
+import marshal
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+from products import Producto
+from store import ProductStore
+
+# Si es "1" cada escritura espera al fsync del lote que la contiene; con "0" se pierde como mucho un lote
+WAL_ESPERAR_FSYNC = os.getenv("WAL_ESPERAR_FSYNC", "1") == "1"
+# Ventana extra para juntar escrituras en un lote; con 0 se agrupan las que llegan durante el fsync anterior
+WAL_INTERVALO = float(os.getenv("WAL_INTERVALO", "0"))
+SNAPSHOT_INTERVALO = float(os.getenv("SNAPSHOT_INTERVALO", "60"))
+SNAPSHOT_MIN_CAMBIOS = int(os.getenv("SNAPSHOT_MIN_CAMBIOS", "10000"))
+# Productos por bloque del snapshot: acota la memoria al escribirlo y al leerlo
+TAMANO_BLOQUE_SNAPSHOT = 10000
+
+MAGIA_SNAPSHOT = b"PRODSNAP"
+FORMATO_SNAPSHOT = 1
+# magia, formato, versión de marshal, primer segmento del log que no cubre, productos
+CABECERA = struct.Struct("<8sHHQQ")
+# Cada registro del log y cada bloque del snapshot van precedidos de (largo, crc32)
+MARCO = struct.Struct("<II")
+ARCHIVO_SNAPSHOT = "catalogo.snap"
+PATRON_SEGMENTO = re.compile(r"^wal\.(\d{8})$")
+
+Tupla = Tuple[Any, ...]
+
+
+class LogCorruptoError(Exception):
+    """Un segmento del log que no es el último está dañado: reproducirlo perdería cambios en silencio"""
+
+
+def a_tupla(producto: Producto) -> Tupla:
+    """Forma compacta de un producto, con solo tipos que marshal codifica directamente"""
+    return (
+        producto.id.bytes,
+        producto.nombre,
+        producto.descripcion,
+        producto.precio,
+        producto.stock,
+        producto.categoria,
+        producto.disponible,
+        _fecha_a_texto(producto.fecha_creacion),
+        _fecha_a_texto(producto.fecha_actualizacion),
+        producto.rating,
+        producto.version
+    )
+
+
+def de_tupla(tupla: Tupla) -> Producto:
+    """Reconstruye el producto sin validar: los datos ya se validaron al escribirlos"""
+    (id_bytes, nombre, descripcion, precio, stock, categoria, disponible,
+     creacion, actualizacion, rating, version) = tupla
+    return Producto.sin_validar(
+        id=UUID(bytes=id_bytes),
+        nombre=nombre,
+        descripcion=descripcion,
+        precio=precio,
+        stock=stock,
+        categoria=categoria,
+        disponible=disponible,
+        fecha_creacion=_texto_a_fecha(creacion),
+        fecha_actualizacion=_texto_a_fecha(actualizacion),
+        rating=rating,
+        version=version
+    )
+
+
+def _fecha_a_texto(fecha: Optional[datetime]) -> Optional[str]:
+    return fecha.isoformat() if fecha is not None else None
+
+
+def _texto_a_fecha(texto: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(texto) if texto is not None else None
+
+
+def _enmarcar(datos: bytes) -> bytes:
+    return MARCO.pack(len(datos), zlib.crc32(datos)) + datos
+
+
+def _leer_marcos(buffer, inicio: int = 0) -> Iterator[Tuple[int, Any]]:
+    """(posición siguiente, contenido) de cada marco válido; se detiene en el primero incompleto o dañado"""
+    vista = memoryview(buffer)
+    total = len(vista)
+    posicion = inicio
+    while posicion + MARCO.size <= total:
+        largo, crc = MARCO.unpack_from(vista, posicion)
+        fin = posicion + MARCO.size + largo
+        if fin > total:
+            return
+        datos = vista[posicion + MARCO.size:fin]
+        if zlib.crc32(datos) != crc:
+            return
+        posicion = fin
+        yield posicion, marshal.loads(datos)
+
+
+def _fsync_directorio(directorio: str):
+    fd = os.open(directorio, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class LogEscritura:
+    """Write-ahead log en segmentos con group commit.
+
+    Las escrituras se encolan en memoria y un hilo las vuelca juntas con un
+    solo write + fsync; quien necesita durabilidad espera el número de lote
+    que cubre su registro. El hilo se crea al primer uso, así que un proceso
+    creado con fork después de cargar el almacén arranca el suyo propio.
+    """
+
+    def __init__(self, directorio: str, segmento: int, intervalo: float = WAL_INTERVALO):
+        self.directorio = directorio
+        self.segmento = segmento
+        self.intervalo = intervalo
+        self._archivo = open(self._ruta(segmento), "ab")
+        self._pendientes: List[bytes] = []
+        self._emitidos = 0
+        self._confirmados = 0
+        # Último registro del segmento actual cuando se pidió rotar; el cambio de archivo lo hace el próximo volcado
+        self._corte: Optional[int] = None
+        self._cond = threading.Condition()
+        # Serializa los volcados con la rotación para que ningún lote cambie de segmento a medias
+        self._lock_archivo = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self._cerrado = False
+        self.lotes = 0
+        self.registros = 0
+
+    def _ruta(self, segmento: int) -> str:
+        return os.path.join(self.directorio, f"wal.{segmento:08d}")
+
+    def anexar(self, registro: Any) -> int:
+        """Encola un registro y retorna el número que hay que esperar para tenerlo en disco"""
+        datos = _enmarcar(marshal.dumps(registro))
+        with self._cond:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._cerrado = False
+                self._hilo = threading.Thread(target=self._escribir, name="wal", daemon=True)
+                self._hilo.start()
+            self._pendientes.append(datos)
+            self._emitidos += 1
+            self._cond.notify_all()
+            return self._emitidos
+
+    def esperar(self, numero: int):
+        """Bloquea hasta que el registro `numero` esté sincronizado en disco"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._confirmados >= numero or self._cerrado)
+
+    def _escribir(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pendientes or self._cerrado)
+                if self._cerrado and not self._pendientes:
+                    return
+            if self.intervalo:
+                time.sleep(self.intervalo)
+            self._volcar()
+
+    def _volcar(self):
+        with self._lock_archivo:
+            with self._cond:
+                lote, self._pendientes = self._pendientes, []
+                hasta = self._emitidos
+                corte, self._corte = self._corte, None
+            if corte is not None:
+                # Los registros hasta el corte cierran el segmento anterior; el resto va al nuevo
+                anteriores = len(lote) - (hasta - corte)
+                self._escribir_lote(lote[:anteriores])
+                self._archivo.close()
+                self._archivo = open(self._ruta(self.segmento), "ab")
+                _fsync_directorio(self.directorio)
+                lote = lote[anteriores:]
+            self._escribir_lote(lote)
+        with self._cond:
+            self._confirmados = max(self._confirmados, hasta)
+            self._cond.notify_all()
+
+    def _escribir_lote(self, lote: List[bytes]):
+        if lote:
+            self._archivo.write(b"".join(lote))
+            self._archivo.flush()
+            os.fsync(self._archivo.fileno())
+            self.lotes += 1
+            self.registros += len(lote)
+
+    def cortar(self) -> int:
+        """Cierra el segmento actual en el último registro anexado, sin tocar el disco.
+
+        Retorna el número del segmento nuevo, donde van los registros que
+        se anexen después. El próximo volcado escribe lo pendiente del
+        anterior, hace su fsync y abre el nuevo.
+        """
+        with self._cond:
+            self._corte = self._emitidos
+            self.segmento += 1
+            return self.segmento
+
+    def volcar(self):
+        """Escribe y sincroniza lo pendiente ahora, cambiando de segmento si hubo un corte"""
+        self._volcar()
+
+    def cerrar(self):
+        """Vuelca lo pendiente y detiene el hilo; se reabre solo con el próximo registro"""
+        self._volcar()
+        with self._cond:
+            self._cerrado = True
+            self._cond.notify_all()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "segmento": self.segmento,
+            "registros": self.registros,
+            "lotes_fsync": self.lotes,
+            "registros_por_lote": round(self.registros / self.lotes, 2) if self.lotes else 0.0
+        }
+
+
+def segmentos(directorio: str) -> List[int]:
+    """Números de los segmentos del log presentes en el directorio, en orden"""
+    return sorted(
+        int(coincidencia.group(1))
+        for coincidencia in map(PATRON_SEGMENTO.match, os.listdir(directorio))
+        if coincidencia
+    )
+
+
+def escribir_snapshot(ruta: str, productos: List[Producto], segmento: int):
+    """Escribe el snapshot en un temporal y lo reemplaza de forma atómica"""
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as archivo:
+        archivo.write(CABECERA.pack(MAGIA_SNAPSHOT, FORMATO_SNAPSHOT, marshal.version, segmento, len(productos)))
+        for inicio in range(0, len(productos), TAMANO_BLOQUE_SNAPSHOT):
+            bloque = [a_tupla(p) for p in productos[inicio:inicio + TAMANO_BLOQUE_SNAPSHOT]]
+            archivo.write(_enmarcar(marshal.dumps(bloque)))
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+    _fsync_directorio(os.path.dirname(ruta) or ".")
+
+
+def leer_snapshot(ruta: str) -> Tuple[int, Dict[bytes, Tupla]]:
+    """(primer segmento a reproducir, id -> tupla) leyendo el archivo mapeado en memoria"""
+    if not os.path.exists(ruta) or os.path.getsize(ruta) < CABECERA.size:
+        return 0, {}
+    with open(ruta, "rb") as archivo, mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        magia, formato, version_marshal, segmento, cantidad = CABECERA.unpack_from(mapa, 0)
+        if magia != MAGIA_SNAPSHOT or formato != FORMATO_SNAPSHOT or version_marshal != marshal.version:
+            raise ValueError(f"Snapshot con formato no soportado: {ruta}")
+        estado: Dict[bytes, Tupla] = {}
+        for _, bloque in _leer_marcos(mapa, CABECERA.size):
+            for tupla in bloque:
+                estado[tupla[0]] = tupla
+    if len(estado) != cantidad:
+        raise ValueError(f"Snapshot incompleto: {len(estado)} de {cantidad} productos")
+    return segmento, estado
+
+
+def aplicar_registro(estado: Dict[bytes, Tupla], registro: Tuple) -> None:
+    """Aplica un registro del log sobre id -> tupla; repetirlo da el mismo resultado"""
+    for operacion, dato in registro:
+        if operacion == "poner":
+            estado[dato[0]] = dato
+        elif operacion == "eliminar":
+            estado.pop(dato, None)
+        elif operacion == "limpiar":
+            estado.clear()
+
+
+def reproducir_log(directorio: str, desde: int, estado: Dict[bytes, Tupla]) -> int:
+    """Aplica los segmentos >= desde y retorna cuántos registros leyó.
+
+    Solo el último segmento puede terminar en un registro incompleto (una
+    caída a mitad de escritura); se trunca ahí para no anexar detrás de él.
+    """
+    numeros = [n for n in segmentos(directorio) if n >= desde]
+    leidos = 0
+    for i, numero in enumerate(numeros):
+        ruta = os.path.join(directorio, f"wal.{numero:08d}")
+        with open(ruta, "rb") as archivo:
+            datos = archivo.read()
+        valido = 0
+        for valido, registro in _leer_marcos(datos):
+            aplicar_registro(estado, registro)
+            leidos += 1
+        if valido < len(datos):
+            if i < len(numeros) - 1:
+                raise LogCorruptoError(f"Registro dañado en {ruta}, byte {valido}")
+            with open(ruta, "r+b") as archivo:
+                archivo.truncate(valido)
+    return leidos
+
+
+class AlmacenDurable(ProductStore):
+    """Almacén en memoria que registra cada mutación en un WAL y guarda snapshots en segundo plano.
+
+    Al arrancar carga el último snapshot mapeado en memoria, reproduce el log
+    que vino después y construye los índices una sola vez. Los snapshots son
+    difusos: se toma la lista de productos al rotar el log y se serializa sin
+    bloquear las escrituras; los cambios que se cuelen después también están
+    en el segmento nuevo, y reproducirlos es idempotente.
+    """
+
+    def __init__(
+        self,
+        directorio: str,
+        esperar_fsync: bool = WAL_ESPERAR_FSYNC,
+        intervalo_snapshot: float = SNAPSHOT_INTERVALO,
+        min_cambios_snapshot: int = SNAPSHOT_MIN_CAMBIOS
+    ):
+        super().__init__()
+        self._wal: Optional[LogEscritura] = None
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.esperar_fsync = esperar_fsync
+        self.intervalo_snapshot = intervalo_snapshot
+        self.min_cambios_snapshot = min_cambios_snapshot
+        self._ruta_snapshot = os.path.join(directorio, ARCHIVO_SNAPSHOT)
+        # Las mutaciones y la toma del snapshot se excluyen mutuamente solo el instante de cortar el log
+        self._lock = threading.RLock()
+        self._lock_snapshot = threading.Lock()
+        self._local = threading.local()
+        self._cambios = 0
+        self._hilo_snapshot: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self.snapshots = 0
+        self.ultimo_snapshot_segundos = 0.0
+
+        inicio = time.perf_counter()
+        # La carga crea millones de objetos sin ciclos: el GC solo repetiría pasadas sobre ellos
+        gc_activo = gc.isenabled()
+        gc.disable()
+        try:
+            desde, estado = leer_snapshot(self._ruta_snapshot)
+            reproducidos = reproducir_log(directorio, desde, estado)
+            self.cargar(de_tupla(tupla) for tupla in estado.values())
+            del estado
+        finally:
+            if gc_activo:
+                gc.enable()
+        existentes = segmentos(directorio)
+        self._wal = LogEscritura(directorio, max(existentes + [desde]) + 1)
+        self._borrar_segmentos(desde)
+        self._cambios = reproducidos
+        self.arranque = {
+            "productos": len(self),
+            "registros_reproducidos": reproducidos,
+            "segundos": round(time.perf_counter() - inicio, 3)
+        }
+
+    def _registrar(self, *operaciones: Tuple[str, Any]):
+        self._local.numero = self._wal.anexar(operaciones)
+        self._cambios += 1
+        if self._hilo_snapshot is None or not self._hilo_snapshot.is_alive():
+            self._detener.clear()
+            self._hilo_snapshot = threading.Thread(target=self._snapshots_periodicos, name="snapshot", daemon=True)
+            self._hilo_snapshot.start()
+
+    def marca_durabilidad(self) -> int:
+        """Número en el WAL de la última escritura de este hilo"""
+        return getattr(self._local, "numero", 0)
+
+    def esperar_durabilidad(self, marca: Optional[int] = None):
+        """Espera el fsync del lote con la marca indicada o con la última escritura de este hilo"""
+        numero = self.marca_durabilidad() if marca is None else marca
+        if self.esperar_fsync and numero:
+            self._wal.esperar(numero)
+
+    def clear(self):
+        """Vacía el almacén y lo registra en el log"""
+        with self._lock:
+            super().clear()
+            if self._wal is not None:
+                self._registrar(("limpiar", None))
+
+    def agregar(self, producto: Producto) -> Producto:
+        with self._lock:
+            producto = super().agregar(producto)
+            self._registrar(("poner", a_tupla(producto)))
+            return producto
+
+    def actualizar(self, producto_id: UUID, cambios: Dict[str, Any]) -> Producto:
+        with self._lock:
+            producto = super().actualizar(producto_id, cambios)
+            self._registrar(("poner", a_tupla(producto)))
+            return producto
+
+    def eliminar(self, producto_id: UUID) -> Producto:
+        with self._lock:
+            producto = super().eliminar(producto_id)
+            self._registrar(("eliminar", producto_id.bytes))
+            return producto
+
+    # Un lote es un único registro del log: tras una caída se ve completo o no se ve
+    def agregar_lote(self, productos: List[Producto]) -> List[Producto]:
+        with self._lock:
+            agregados = [super(AlmacenDurable, self).agregar(producto) for producto in productos]
+            self._registrar(*(("poner", a_tupla(producto)) for producto in agregados))
+            return agregados
+
+    def actualizar_lote(self, cambios: List[Tuple[UUID, Dict[str, Any]]]) -> List[Producto]:
+        with self._lock:
+            actualizados = [super(AlmacenDurable, self).actualizar(producto_id, datos) for producto_id, datos in cambios]
+            self._registrar(*(("poner", a_tupla(producto)) for producto in actualizados))
+            return actualizados
+
+    def eliminar_lote(self, producto_ids: List[UUID]) -> List[Producto]:
+        with self._lock:
+            eliminados = [super(AlmacenDurable, self).eliminar(producto_id) for producto_id in producto_ids]
+            self._registrar(*(("eliminar", producto.id.bytes) for producto in eliminados))
+            return eliminados
+
+    def guardar_snapshot(self):
+        """Escribe un snapshot y borra los segmentos del log que ya cubre"""
+        with self._lock_snapshot:
+            inicio = time.perf_counter()
+            with self._lock:
+                segmento = self._wal.cortar()
+                productos = list(self._por_id.values())
+                self._cambios = 0
+            # El volcado del segmento anterior y los fsync quedan fuera del lock de las escrituras
+            self._wal.volcar()
+            escribir_snapshot(self._ruta_snapshot, productos, segmento)
+            self._borrar_segmentos(segmento)
+            self.snapshots += 1
+            self.ultimo_snapshot_segundos = round(time.perf_counter() - inicio, 3)
+
+    def _borrar_segmentos(self, hasta: int):
+        for numero in segmentos(self.directorio):
+            if numero < hasta:
+                os.remove(os.path.join(self.directorio, f"wal.{numero:08d}"))
+
+    def _snapshots_periodicos(self):
+        while not self._detener.wait(self.intervalo_snapshot):
+            if self._cambios >= self.min_cambios_snapshot:
+                self.guardar_snapshot()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "arranque": self.arranque,
+            "cambios_sin_snapshot": self._cambios,
+            "snapshots": self.snapshots,
+            "ultimo_snapshot_segundos": self.ultimo_snapshot_segundos,
+            "wal": self._wal.estadisticas()
+        }
+
+    def cerrar(self):
+        """Detiene los hilos y deja un snapshot si hubo cambios para acelerar el próximo arranque"""
+        self._detener.set()
+        if self._hilo_snapshot is not None:
+            self._hilo_snapshot.join()
+            self._hilo_snapshot = None
+        if self._cambios:
+            self.guardar_snapshot()
+        self._wal.cerrar()
@@ -1,60 +1,143 @@
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+import unicodedata
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator
+from typing import Any, Dict, List, Optional
 from uuid import UUID, uuid4
 from datetime import datetime
 
+# Campo -> atributo privado con su valor normalizado para comparar
+CLAVES_NORMALIZADAS = {
+    "nombre": "_nombre_clave",
+    "categoria": "_categoria_clave",
+    "descripcion": "_descripcion_clave",
+}
+
+
+def normalizar(texto: str) -> str:
+    """Quita acentos y pasa a minúsculas: 'Teléfono' -> 'telefono'"""
+    if texto.isascii():
+        # Nada que descomponer, y en ASCII casefold() equivale a lower()
+        return texto.lower()
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_acentos.casefold()
+
+
 class Producto(BaseModel):
     id: Optional[UUID] = None
-    nombre: str = Field(..., min_length=1, max_length=100, example="Laptop Gaming")
-    descripcion: Optional[str] = Field(None, max_length=500, example="Laptop para juegos con RTX 4060")
-    precio: float = Field(..., gt=0, example=1500.99)
-    stock: int = Field(0, ge=0, example=10)
-    categoria: str = Field(..., min_length=1, max_length=50, example="Tecnología")
-    disponible: bool = Field(True, example=True)
+    nombre: str = Field(..., min_length=1, max_length=100, examples=["Laptop Gaming"])
+    descripcion: Optional[str] = Field(None, max_length=500, examples=["Laptop para juegos con RTX 4060"])
+    precio: float = Field(..., gt=0, examples=[1500.99])
+    stock: int = Field(0, ge=0, examples=[10])
+    categoria: str = Field(..., min_length=1, max_length=50, examples=["Tecnología"])
+    disponible: bool = Field(True, examples=[True])
     fecha_creacion: Optional[datetime] = None
     fecha_actualizacion: Optional[datetime] = None
-    rating: float = Field(0.0, ge=0.0, le=5.0, example=4.5)
-    
-    @validator('nombre')
+    rating: float = Field(0.0, ge=0.0, le=5.0, examples=[4.5])
+    version: int = Field(1, ge=1, examples=[1])
+
+    _nombre_clave: Optional[str] = PrivateAttr(None)
+    _categoria_clave: Optional[str] = PrivateAttr(None)
+    _descripcion_clave: Optional[str] = PrivateAttr(None)
+
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "nombre": "smartphone samsung",
+            "descripcion": "Teléfono inteligente con 128GB de almacenamiento",
+            "precio": 899.99,
+            "stock": 25,
+            "categoria": "Electrónicos",
+            "disponible": True,
+            "rating": 4.3
+        }
+    })
+
+    def model_post_init(self, __context):
+        """Calcula las claves normalizadas una sola vez, al validar o reconstruir el producto"""
+        valores = self.__dict__
+        self.__pydantic_private__.update(
+            (privado, normalizar(valores[campo]) if valores.get(campo) is not None else None)
+            for campo, privado in CLAVES_NORMALIZADAS.items()
+        )
+
+    @classmethod
+    def sin_validar(cls, **valores) -> "Producto":
+        """Reconstruye un producto con datos que ya se validaron al escribirlos.
+
+        Para rehidratar desde un almacén: no corre validadores ni el manejo
+        de defaults de model_construct; con todos los campos arma el estado
+        de una vez por __setstate__, el mismo camino que usa pickle. Los
+        campos recibidos quedan como asignados; sin todos los campos recurre
+        a model_construct para los defaults.
+        """
+        if len(valores) != len(cls.model_fields):
+            return cls.model_construct(**valores)
+        producto = cls.__new__(cls)
+        producto.__setstate__({
+            "__dict__": valores,
+            "__pydantic_fields_set__": set(valores),
+            "__pydantic_extra__": None,
+            "__pydantic_private__": {
+                privado: normalizar(valores[campo]) if valores[campo] is not None else None
+                for campo, privado in CLAVES_NORMALIZADAS.items()
+            },
+        })
+        return producto
+
+    def copia(self) -> "Producto":
+        """Copia superficial que reutiliza las claves ya normalizadas y conserva los campos asignados"""
+        producto = type(self).__new__(type(self))
+        producto.__setstate__({
+            "__dict__": self.__dict__.copy(),
+            "__pydantic_fields_set__": self.__pydantic_fields_set__.copy(),
+            "__pydantic_extra__": None,
+            "__pydantic_private__": self.__pydantic_private__.copy(),
+        })
+        return producto
+
+    def __setattr__(self, nombre, valor):
+        super().__setattr__(nombre, valor)
+        privado = CLAVES_NORMALIZADAS.get(nombre)
+        if privado is not None:
+            self.__pydantic_private__[privado] = normalizar(valor) if valor is not None else None
+
+    @property
+    def nombre_clave(self) -> str:
+        """Nombre sin acentos ni mayúsculas, para unicidad y búsqueda"""
+        return self.__pydantic_private__["_nombre_clave"]
+
+    @property
+    def categoria_clave(self) -> str:
+        """Categoría sin acentos ni mayúsculas, para filtrar"""
+        return self.__pydantic_private__["_categoria_clave"]
+
+    @property
+    def descripcion_clave(self) -> Optional[str]:
+        """Descripción sin acentos ni mayúsculas, para indexar"""
+        return self.__pydantic_private__["_descripcion_clave"]
+
+    # Los rangos (precio > 0, stock >= 0, largos) los valida el núcleo de pydantic
+    # desde las restricciones de Field; en Python queda solo lo que transforma el valor
+    @field_validator('nombre')
+    @classmethod
     def nombre_no_puede_ser_solo_espacios(cls, v):
         """Valida que el nombre no esté vacío o contenga solo espacios"""
         if v.strip() == '':
             raise ValueError('El nombre del producto no puede estar vacío o contener solo espacios')
         return v.title()
-    
-    @validator('descripcion', pre=True, always=True)
+
+    @field_validator('descripcion', mode='before')
+    @classmethod
     def descripcion_puede_ser_nula(cls, v):
         """Convierte strings vacíos en None para descripciones opcionales"""
         if v is None or v == "":
             return None
         return v
-    
-    @validator('precio')
-    def precio_debe_ser_positivo(cls, v):
-        """Valida que el precio sea positivo"""
-        if v <= 0:
-            raise ValueError('El precio debe ser mayor a 0')
-        return round(v, 2)
-    
-    @validator('stock')
-    def stock_no_puede_ser_negativo(cls, v):
-        """Valida que el stock no sea negativo"""
-        if v < 0:
-            raise ValueError('El stock no puede ser negativo')
-        return v
 
-    class Config:
-        schema_extra = {
-            "example": {
-                "nombre": "smartphone samsung",
-                "descripcion": "Teléfono inteligente con 128GB de almacenamiento",
-                "precio": 899.99,
-                "stock": 25,
-                "categoria": "Electrónicos",
-                "disponible": True,
-                "rating": 4.3
-            }
-        }
+    @field_validator('precio')
+    @classmethod
+    def redondear_precio(cls, v):
+        """Redondea el precio a centavos"""
+        return round(v, 2)
 
 
 class ProductoUpdate(BaseModel):
@@ -65,26 +148,90 @@ class ProductoUpdate(BaseModel):
     categoria: Optional[str] = Field(None, min_length=1, max_length=50)
     disponible: Optional[bool] = None
     rating: Optional[float] = Field(None, ge=0.0, le=5.0)
-    
-    @validator('nombre')
+
+    def cambios(self) -> Dict[str, Any]:
+        """Campos enviados con valor, leídos directo del modelo en lugar de volcarlo entero"""
+        valores = self.__dict__
+        return {campo: valores[campo] for campo in self.model_fields_set if valores[campo] is not None}
+
+    @field_validator('nombre')
+    @classmethod
     def nombre_no_puede_ser_solo_espacios(cls, v):
         """Valida que el nombre no esté vacío (solo si se proporciona)"""
         if v is not None and v.strip() == '':
             raise ValueError('El nombre no puede estar vacío o contener solo espacios')
         return v.title() if v else v
-    
-    @validator('precio')
-    def precio_debe_ser_positivo(cls, v):
-        """Valida que el precio sea positivo"""
-        if v is not None and v <= 0:
-            raise ValueError('El precio debe ser mayor a 0')
+
+    @field_validator('precio')
+    @classmethod
+    def redondear_precio(cls, v):
+        """Redondea el precio a centavos (solo si se proporciona)"""
         return round(v, 2) if v else v
-    
-    @validator('stock')
-    def stock_no_puede_ser_negativo(cls, v):
-        """Valida que el stock no sea negativo"""
-        if v is not None and v < 0:
-            raise ValueError('El stock no puede ser negativo')
-        return v
 
-productos_db: List[Producto] = []
\ No newline at end of file
+
+class ResultadoOperacion(BaseModel):
+    indice: int
+    estado: str = Field(..., examples=["creado"])
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class Sugerencia(BaseModel):
+    id: UUID
+    nombre: str = Field(..., examples=["Laptop Gaming"])
+    categoria: str = Field(..., examples=["Tecnología"])
+    rating: float = Field(..., examples=[4.5])
+
+
+class ResultadoLote(BaseModel):
+    atomico: bool
+    aplicado: bool
+    exitosos: int
+    fallidos: int
+    resultados: List[ResultadoOperacion]
+
+
+class ErrorFila(BaseModel):
+    fila: int
+    error: str
+
+
+class ResultadoImportacion(BaseModel):
+    filas: int
+    importados: int
+    fallidos: int
+    errores: List[ErrorFila]
+    errores_truncados: bool
+
+
+class FacetaCategoria(BaseModel):
+    conteo: int
+    rating_promedio: float
+
+
+class RangoPrecio(BaseModel):
+    desde: float
+    hasta: Optional[float] = None
+    conteo: int
+
+
+class Facetas(BaseModel):
+    total: int
+    disponibles: int
+    categorias: Dict[str, FacetaCategoria]
+    rangos_precio: List[RangoPrecio]
+    valor_stock_total: float
+
+
+class CambioProducto(BaseModel):
+    secuencia: int
+    operacion: str = Field(..., examples=["actualizar"])
+    id: Optional[UUID] = None
+    fecha: datetime
+    producto: Optional[Producto] = None
+
+
+class PaginaCambios(BaseModel):
+    cambios: List[CambioProducto]
+    ultima_secuencia: int
+    hay_mas: bool
@@ -0,0 +1,229 @@
+import asyncio
+import cProfile
+import functools
+import os
+import random
+import time
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+from uuid import uuid4
+from fastapi.routing import APIRoute
+
+# Deshabilitado no se crea nada por solicitud: ni tramos, ni header, ni muestreo
+PERFILADO_HABILITADO = os.getenv("PERFILADO_HABILITADO", "0") == "1"
+# Fracción de solicitudes que además corren bajo cProfile
+PERFILADO_MUESTREO = float(os.getenv("PERFILADO_MUESTREO", "0"))
+# Con este header en "1" la solicitud se perfila, responde Server-Timing y queda en el buffer
+PERFILADO_HEADER = os.getenv("PERFILADO_HEADER", "X-Profile").lower()
+UMBRAL_LENTA_MS = float(os.getenv("UMBRAL_LENTA_MS", "500"))
+MAX_SOLICITUDES_LENTAS = int(os.getenv("MAX_SOLICITUDES_LENTAS", "100"))
+TOP_FUNCIONES = int(os.getenv("TOP_FUNCIONES", "20"))
+
+_perfil_actual: ContextVar[Optional["PerfilSolicitud"]] = ContextVar("perfil_actual", default=None)
+_SIN_TRAMO = nullcontext()
+
+
+class _Tramo:
+    __slots__ = ("perfil", "nombre", "inicio_ns")
+
+    def __init__(self, perfil: "PerfilSolicitud", nombre: str):
+        self.perfil = perfil
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio_ns = time.perf_counter_ns()
+
+    def __exit__(self, *excepcion):
+        self.perfil.agregar(self.nombre, self.inicio_ns, time.perf_counter_ns() - self.inicio_ns)
+
+
+class PerfilSolicitud:
+    """Tramos medidos durante una solicitud y, si le tocó, su perfil de cProfile"""
+
+    __slots__ = ("inicio_ns", "tramos", "forzado", "cprofile", "marca_ns", "token")
+
+    def __init__(self, forzado: bool = False):
+        self.inicio_ns = time.perf_counter_ns()
+        self.tramos: List[tuple] = []
+        self.forzado = forzado
+        self.cprofile: Optional[cProfile.Profile] = None
+        # Fin del último paso de la ruta: de ahí se mide el tramo siguiente
+        self.marca_ns = self.inicio_ns
+        self.token = None
+
+    def agregar(self, nombre: str, inicio_ns: int, duracion_ns: int):
+        self.tramos.append((nombre, inicio_ns, duracion_ns))
+
+    def resumen_tramos(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "tramo": nombre,
+                "inicio_ms": round((inicio_ns - self.inicio_ns) / 1e6, 3),
+                "duracion_ms": round(duracion_ns / 1e6, 3)
+            }
+            for nombre, inicio_ns, duracion_ns in self.tramos
+        ]
+
+    def server_timing(self) -> str:
+        """Header Server-Timing con la duración de cada tramo"""
+        return ", ".join(
+            f'{nombre.replace(".", "-")};dur={duracion_ns / 1e6:.3f}'
+            for nombre, _, duracion_ns in self.tramos
+        )
+
+
+def perfil_actual() -> Optional[PerfilSolicitud]:
+    return _perfil_actual.get()
+
+
+def tramo(nombre: str):
+    """Context manager que mide un tramo de la solicitud en curso; sin perfil activo no hace nada"""
+    perfil = _perfil_actual.get()
+    return _SIN_TRAMO if perfil is None else _Tramo(perfil, nombre)
+
+
+def funciones_principales(perfil: cProfile.Profile, cantidad: int) -> List[Dict[str, Any]]:
+    """Las funciones con más tiempo propio del perfil"""
+    perfil.create_stats()
+    filas = sorted(perfil.stats.items(), key=lambda item: item[1][2], reverse=True)[:cantidad]
+    return [
+        {
+            "funcion": f"{os.path.basename(archivo)}:{linea}({nombre})",
+            "llamadas": llamadas,
+            "propio_ms": round(propio * 1e3, 3),
+            "acumulado_ms": round(acumulado * 1e3, 3)
+        }
+        for (archivo, linea, nombre), (_, llamadas, propio, acumulado, _) in filas
+    ]
+
+
+class Perfilador:
+    """Perfilado opt-in por solicitud y buffer circular de las solicitudes lentas.
+
+    cProfile mide el hilo del event loop: con solicitudes concurrentes su perfil
+    incluye lo que corrió intercalado, y las operaciones que van al pool de
+    hilos aparecen como espera; su duración está en los tramos almacen.*.
+    Solo una solicitud a la vez corre bajo cProfile. Se usa solo desde el
+    event loop, así que no necesita locks.
+    """
+
+    def __init__(
+        self,
+        habilitado: bool = PERFILADO_HABILITADO,
+        muestreo: float = PERFILADO_MUESTREO,
+        umbral_ms: float = UMBRAL_LENTA_MS,
+        max_solicitudes: int = MAX_SOLICITUDES_LENTAS,
+        top_funciones: int = TOP_FUNCIONES
+    ):
+        self.habilitado = habilitado
+        self.muestreo = muestreo
+        self.umbral_ms = umbral_ms
+        self.top_funciones = top_funciones
+        self.lentas: Deque[Dict[str, Any]] = deque(maxlen=max_solicitudes)
+        self._cprofile_en_uso = False
+        self.perfiladas = 0
+
+    def iniciar(self, request) -> PerfilSolicitud:
+        """Crea el perfil de la solicitud y lo deja activo en su contexto"""
+        perfil = PerfilSolicitud(forzado=request.headers.get(PERFILADO_HEADER) == "1")
+        if (perfil.forzado or random.random() < self.muestreo) and not self._cprofile_en_uso:
+            self._cprofile_en_uso = True
+            perfil.cprofile = cProfile.Profile()
+            perfil.cprofile.enable()
+        perfil.token = _perfil_actual.set(perfil)
+        return perfil
+
+    def terminar(
+        self, perfil: PerfilSolicitud, metodo: str, url: str, ruta: str, estado: int, duracion_ns: int
+    ) -> Optional[str]:
+        """Guarda la solicitud si fue lenta o pedida por header; retorna el Server-Timing si lo pidió"""
+        _perfil_actual.reset(perfil.token)
+        if perfil.cprofile is not None:
+            perfil.cprofile.disable()
+            self._cprofile_en_uso = False
+            self.perfiladas += 1
+        duracion_ms = duracion_ns / 1e6
+        if perfil.forzado or duracion_ms >= self.umbral_ms:
+            self.lentas.append({
+                "id": uuid4().hex[:12],
+                "fecha": datetime.now(timezone.utc).isoformat(),
+                "metodo": metodo,
+                "url": url,
+                "ruta": ruta,
+                "estado": estado,
+                "duracion_ms": round(duracion_ms, 3),
+                "motivo": "header" if perfil.forzado else "lenta",
+                "tramos": perfil.resumen_tramos(),
+                "funciones": (
+                    funciones_principales(perfil.cprofile, self.top_funciones)
+                    if perfil.cprofile is not None else None
+                )
+            })
+        return perfil.server_timing() if perfil.forzado else None
+
+    def solicitudes_lentas(self, limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Las solicitudes guardadas, de la más reciente a la más antigua"""
+        recientes = list(reversed(self.lentas))
+        return recientes if limite is None else recientes[:limite]
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "habilitado": self.habilitado,
+            "muestreo": self.muestreo,
+            "umbral_ms": self.umbral_ms,
+            "guardadas": len(self.lentas),
+            "perfiladas": self.perfiladas
+        }
+
+
+def _medir_endpoint(endpoint):
+    """Envuelve el endpoint para cerrar el tramo de validación al entrar y marcar su salida"""
+    if not asyncio.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def medido(*args, **kwargs):
+        perfil = _perfil_actual.get()
+        if perfil is None:
+            return await endpoint(*args, **kwargs)
+        inicio_ns = time.perf_counter_ns()
+        perfil.agregar("validacion", perfil.marca_ns, inicio_ns - perfil.marca_ns)
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            perfil.marca_ns = time.perf_counter_ns()
+            perfil.agregar("endpoint", inicio_ns, perfil.marca_ns - inicio_ns)
+
+    return medido
+
+
+class RutaPerfilada(APIRoute):
+    """Ruta que separa en tramos la validación de la entrada, el endpoint y la respuesta.
+
+    El tramo "respuesta" es lo que hace FastAPI con lo que retorna el endpoint:
+    validar el response_model y codificarlo; con una Response ya armada es casi nulo.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _medir_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        manejador = super().get_route_handler()
+
+        async def manejar(request):
+            perfil = _perfil_actual.get()
+            if perfil is None:
+                return await manejador(request)
+            perfil.marca_ns = time.perf_counter_ns()
+            respuesta = await manejador(request)
+            fin_ns = time.perf_counter_ns()
+            perfil.agregar("respuesta", perfil.marca_ns, fin_ns - perfil.marca_ns)
+            return respuesta
+
+        return manejar
+
+
+perfilador = Perfilador()
@@ -0,0 +1,112 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+from products import Producto, normalizar
+
+# Atributos de Producto que pueden aparecer en un predicado; el código compilado solo los nombra a ellos
+CAMPOS_FILTRO = ("disponible", "categoria_clave", "precio", "rating", "stock")
+OPERADORES = ("==", ">=", "<=")
+
+
+class Predicado(NamedTuple):
+    campo: str
+    operador: str
+    valor: Any
+
+    def __str__(self) -> str:
+        return f"{self.campo} {self.operador} {self.valor!r}"
+
+
+class Fuente(NamedTuple):
+    """Un camino de acceso del almacén: cuántos ids entrega y qué predicados ya garantiza"""
+    nombre: str
+    cardinalidad: int
+    ids: Callable[[], Iterable[UUID]]
+    cubre: Tuple[Predicado, ...] = ()
+    # True si entrega los ids ordenados por valor y no por inserción
+    por_valor: bool = False
+
+
+def predicados_de_filtros(
+    disponible: Optional[bool] = None,
+    categoria: Optional[str] = None,
+    precio_max: Optional[float] = None,
+    precio_min: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    stock_min: Optional[int] = None
+) -> List[Predicado]:
+    """Traduce los parámetros de filtrado a predicados sobre los campos de Producto"""
+    predicados = []
+    if disponible is not None:
+        predicados.append(Predicado("disponible", "==", disponible))
+    if categoria:
+        predicados.append(Predicado("categoria_clave", "==", normalizar(categoria)))
+    if precio_min is not None:
+        predicados.append(Predicado("precio", ">=", precio_min))
+    if precio_max is not None:
+        predicados.append(Predicado("precio", "<=", precio_max))
+    if min_rating is not None:
+        predicados.append(Predicado("rating", ">=", min_rating))
+    if stock_min is not None:
+        predicados.append(Predicado("stock", ">=", stock_min))
+    return predicados
+
+
+@lru_cache(maxsize=256)
+def _fabrica(forma: Tuple[Tuple[str, str], ...]) -> Callable[[tuple], Callable[[Producto], bool]]:
+    """Compila una vez por forma de consulta una función que evalúa todos los predicados juntos"""
+    for campo, operador in forma:
+        if campo not in CAMPOS_FILTRO or operador not in OPERADORES:
+            raise ValueError(f"Predicado no soportado: {campo} {operador}")
+    condiciones = " and ".join(
+        f"p.{campo} {operador} v[{i}]" for i, (campo, operador) in enumerate(forma)
+    ) or "True"
+    return eval(compile(f"lambda v: lambda p: {condiciones}", "<filtro>", "eval"))
+
+
+def compilar(predicados: Iterable[Predicado]) -> Callable[[Producto], bool]:
+    """Función producto -> bool equivalente a la conjunción de los predicados"""
+    predicados = tuple(predicados)
+    forma = tuple((p.campo, p.operador) for p in predicados)
+    return _fabrica(forma)(tuple(p.valor for p in predicados))
+
+
+class PlanConsulta:
+    """Fuente elegida más los predicados que quedan por evaluar sobre cada fila que entrega"""
+
+    def __init__(self, fuente: Fuente, residuales: List[Predicado], alternativas: List[Fuente]):
+        self.fuente = fuente
+        self.residuales = residuales
+        self.alternativas = alternativas
+        self.cumple = compilar(residuales)
+        self.escaneadas = 0
+
+    def ejecutar(self, obtener: Callable[[UUID], Optional[Producto]]) -> Iterator[Producto]:
+        """Una sola pasada perezosa sobre la fuente, sin listas intermedias"""
+        cumple = self.cumple
+        escaneadas = 0
+        try:
+            for producto_id in self.fuente.ids():
+                escaneadas += 1
+                producto = obtener(producto_id)
+                if producto is not None and cumple(producto):
+                    yield producto
+        finally:
+            self.escaneadas += escaneadas
+
+    def explicar(self) -> Dict[str, Any]:
+        return {
+            "indice": self.fuente.nombre,
+            "cardinalidad_estimada": self.fuente.cardinalidad,
+            "alternativas": {fuente.nombre: fuente.cardinalidad for fuente in self.alternativas},
+            "predicados_indice": [str(p) for p in self.fuente.cubre],
+            "predicados_residuales": [str(p) for p in self.residuales],
+            "filas_escaneadas": self.escaneadas
+        }
+
+
+def planificar(predicados: List[Predicado], fuentes: List[Fuente]) -> PlanConsulta:
+    """Parte de la fuente con menos filas y deja como residuales los predicados que no cubre"""
+    fuente = min(fuentes, key=lambda f: f.cardinalidad)
+    residuales = [p for p in predicados if p not in fuente.cubre]
+    return PlanConsulta(fuente, residuales, fuentes)
@@ -0,0 +1,621 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+from products import Producto, normalizar
+from store import StorageBackend, productos_db
+from search import IndiceBusqueda
+from facets import ContadorFacetas, resumir_facetas
+from utils import autocompletar_productos, buscar_productos_por_texto
+from metrics import metricas
+from profiling import perfil_actual
+from locks import GestorLocks, clave_nombre, clave_producto
+from exceptions import ConflictoVersionError, ProductoNoEncontradoError
+
+RETRASO_DB = float(os.getenv("RETRASO_DB", "0.1"))
+MAX_HILOS_DB = int(os.getenv("MAX_HILOS_DB", "0"))
+BACKEND_DB = os.getenv("BACKEND_DB", "memoria")
+SQLITE_RUTA = os.getenv("SQLITE_RUTA", "productos.db")
+SQLITE_POOL = int(os.getenv("SQLITE_POOL", "4"))
+# Con BACKEND_DB=memoria, directorio del snapshot y el WAL; vacío deja el catálogo solo en memoria
+PERSISTENCIA_DIR = os.getenv("PERSISTENCIA_DIR", "")
+# Hilos que esperan el fsync del WAL con el almacén en memoria persistente; el almacén sigue en el event loop
+HILOS_DURABLE = int(os.getenv("HILOS_DURABLE", "8"))
+TAMANO_LOTE_STREAM = int(os.getenv("TAMANO_LOTE_STREAM", "500"))
+
+
+class ProductRepository:
+    """Capa de acceso a datos asíncrona sobre un almacén de productos.
+
+    La latencia simulada se espera con asyncio.sleep para no bloquear el
+    event loop. Con max_hilos > 0 las operaciones del almacén se ejecutan
+    en un pool de hilos acotado, pensado para backends bloqueantes. Con
+    hilos_durabilidad > 0 (y sin pool) el almacén se usa en el event loop
+    y solo la espera de que las escrituras lleguen a disco va a un pool
+    aparte, donde varias escrituras comparten el mismo fsync.
+
+    Las escrituras toman locks por producto y por nombre en lugar de uno
+    global: la verificación de versión, la de nombre único y la escritura
+    quedan atómicas frente a otras escrituras sobre las mismas claves.
+    """
+
+    def __init__(
+        self,
+        store: StorageBackend,
+        retraso: float = 0.0,
+        max_hilos: int = 0,
+        hilos_durabilidad: int = 0
+    ):
+        self.store = store
+        # Se lee antes de construir los índices: repetir un cambio ya indexado es inocuo, perderlo no
+        self._cambio_compartido = store.ultimo_cambio()
+        self.indice_busqueda = IndiceBusqueda()
+        self.indice_busqueda.reconstruir(store)
+        self.retraso = retraso
+        self.max_hilos = max_hilos
+        self._executor = None
+        # Con pool de operaciones la escritura ya espera en su hilo, que es el que conoce su marca
+        self.hilos_durabilidad = hilos_durabilidad if max_hilos <= 0 else 0
+        self._executor_durabilidad = None
+        self.locks = GestorLocks()
+        # Solo para backends que no son seguros entre hilos con max_hilos > 0: se toma lo que dura
+        # cada mutación y cada lectura que recorre sus estructuras
+        self._lock_almacen = threading.Lock()
+        self._oyentes: List[Callable[[str, Optional[Producto]], None]] = []
+        self._oyentes_secuencia: List[Callable[[str, Optional[Producto], int], None]] = []
+        # Número de cambio del catálogo; la época distingue procesos que reinician la cuenta.
+        # Los workers la heredan del maestro, así que con un almacén compartido coincide entre ellos
+        self.epoca = uuid4().hex[:8]
+        self.secuencia = 0
+        self.ultima_modificacion = datetime.now(timezone.utc)
+        self._lock_cambios = threading.Lock()
+        self._lock_sincronizar = threading.Lock()
+        self.facetas_catalogo = ContadorFacetas()
+        self.facetas_catalogo.reconstruir(store)
+        self.suscribir(self.facetas_catalogo.aplicar)
+
+    def suscribir(self, oyente: Callable[[str, Optional[Producto]], None]):
+        """Registra una función que se llama con (operación, producto) tras cada escritura"""
+        self._oyentes.append(oyente)
+
+    def suscribir_con_secuencia(self, oyente: Callable[[str, Optional[Producto], int], None]):
+        """Registra una función que se llama con (operación, producto, número de cambio del catálogo).
+
+        Con un almacén compartido el número es el de su registro de cambios,
+        igual en todos los workers, y se notifica al sincronizar; si no, es
+        la cuenta local del repositorio. La operación "resincronizar" avisa
+        que se perdieron los cambios hasta ese número.
+        """
+        self._oyentes_secuencia.append(oyente)
+
+    def version_catalogo(self) -> Tuple[int, datetime]:
+        """(número de cambio, fecha UTC del último cambio) leídos juntos"""
+        with self._lock_cambios:
+            secuencia = self._cambio_compartido if self.store.compartido else self.secuencia
+            return secuencia, self.ultima_modificacion
+
+    def _notificar(self, operacion: str, producto: Optional[Producto]):
+        with self._lock_cambios:
+            self.secuencia += 1
+            self.ultima_modificacion = datetime.now(timezone.utc)
+            if not self.store.compartido:
+                # Dentro del lock para que los números lleguen en orden
+                for oyente in self._oyentes_secuencia:
+                    oyente(operacion, producto, self.secuencia)
+        for oyente in self._oyentes:
+            oyente(operacion, producto)
+
+    async def _ejecutar(self, nombre: str, operacion, *args, **kwargs):
+        """Ejecuta la operación midiendo su duración con el nombre indicado"""
+        perfil = perfil_actual()
+        if not metricas.habilitadas and perfil is None:
+            return await self._despachar(operacion, *args, **kwargs)
+        inicio = time.perf_counter_ns()
+        try:
+            return await self._despachar(operacion, *args, **kwargs)
+        finally:
+            duracion_ns = time.perf_counter_ns() - inicio
+            if metricas.habilitadas:
+                metricas.observar_operacion(nombre, duracion_ns)
+            if perfil is not None:
+                perfil.agregar(f"almacen.{nombre}", inicio, duracion_ns)
+
+    async def _escribir(self, nombre: str, operacion, *args):
+        """Ejecuta una escritura; con un almacén compartido la lleva enseguida al número de cambio"""
+        resultado = await self._ejecutar(nombre, operacion, *args)
+        if self.hilos_durabilidad:
+            # Se lee en el mismo hilo que escribió, sin await de por medio
+            await self._esperar_durabilidad(self.store.marca_durabilidad())
+        if self.store.compartido:
+            # Sin esto el ETag de los listados y el registro de cambios no la verían hasta el próximo sondeo
+            await self._en_pool(self._sincronizar)
+        return resultado
+
+    async def _despachar(self, operacion, *args, **kwargs):
+        """Espera la latencia simulada y ejecuta la operación en línea o en el pool"""
+        if self.retraso:
+            await asyncio.sleep(self.retraso)
+        return await self._en_pool(operacion, *args, **kwargs)
+
+    async def _en_pool(self, operacion, *args, **kwargs):
+        """Ejecuta la operación en el pool de hilos si el repositorio tiene uno, si no en línea"""
+        if self.max_hilos <= 0:
+            return operacion(*args, **kwargs)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_hilos,
+                thread_name_prefix="productos-db"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(operacion, *args, **kwargs))
+
+    async def _esperar_durabilidad(self, marca: int):
+        """Espera en el pool de durabilidad a que la escritura de la marca esté en disco"""
+        if not marca:
+            return
+        if self._executor_durabilidad is None:
+            self._executor_durabilidad = ThreadPoolExecutor(
+                max_workers=self.hilos_durabilidad,
+                thread_name_prefix="productos-fsync"
+            )
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor_durabilidad, self.store.esperar_durabilidad, marca)
+
+    def _leer(self, operacion, *args, **kwargs):
+        """Ejecuta una lectura del almacén sin que otro hilo lo mute a la mitad si no admite hilos concurrentes"""
+        if self.store.concurrente or self.max_hilos <= 0:
+            return operacion(*args, **kwargs)
+        with self._lock_almacen:
+            return operacion(*args, **kwargs)
+
+    def _mutar(self, operacion, *args):
+        """Aplica una mutación del almacén protegiendo sus estructuras si no admite hilos concurrentes"""
+        if self.store.concurrente:
+            resultado = operacion(*args)
+        else:
+            with self._lock_almacen:
+                resultado = operacion(*args)
+        if not self.hilos_durabilidad:
+            # Fuera del lock, para que varios hilos compartan el mismo fsync del log
+            self.store.esperar_durabilidad()
+        return resultado
+
+    async def obtener(self, producto_id: UUID) -> Optional[Producto]:
+        """Obtiene un producto por su ID"""
+        return await self._ejecutar("obtener", self._leer, self.store.obtener, producto_id)
+
+    async def listar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> List[Producto]:
+        """Lista los productos que cumplen los filtros"""
+        return await self._ejecutar(
+            "listar",
+            self._leer,
+            self.store.filtrar,
+            disponible=disponible,
+            categoria=categoria,
+            precio_max=precio_max,
+            precio_min=precio_min,
+            min_rating=min_rating,
+            stock_min=stock_min
+        )
+
+    async def explicar(self, **filtros) -> Dict[str, Any]:
+        """Plan con que el almacén resuelve los filtros, con las filas recorridas y retornadas"""
+        return await self._ejecutar("explicar", self._leer, self.store.explicar, **filtros)
+
+    async def paginar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        ordenar_por: Optional[str] = None,
+        descendente: bool = False,
+        despues_de: Optional[Tuple[Any, int]] = None,
+        limite: Optional[int] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> Tuple[List[Producto], Optional[Tuple[Any, int]]]:
+        """Obtiene una página ordenada y el cursor de la siguiente"""
+        return await self._ejecutar(
+            "paginar",
+            self._leer,
+            self.store.paginar,
+            disponible=disponible,
+            categoria=categoria,
+            precio_max=precio_max,
+            ordenar_por=ordenar_por,
+            descendente=descendente,
+            despues_de=despues_de,
+            limite=limite,
+            precio_min=precio_min,
+            min_rating=min_rating,
+            stock_min=stock_min
+        )
+
+    async def top(
+        self,
+        k: int,
+        ordenar_por: str,
+        descendente: bool = True,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> List[Producto]:
+        """Los k primeros según `ordenar_por` entre los que cumplen los filtros, sin ordenar el resto"""
+        productos, _ = await self.paginar(
+            disponible=disponible,
+            categoria=categoria,
+            precio_max=precio_max,
+            ordenar_por=ordenar_por,
+            descendente=descendente,
+            limite=k,
+            precio_min=precio_min,
+            min_rating=min_rating,
+            stock_min=stock_min
+        )
+        return productos
+
+    async def iterar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        ordenar_por: Optional[str] = None,
+        descendente: bool = False,
+        tamano_lote: int = TAMANO_LOTE_STREAM,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> AsyncIterator[Producto]:
+        """Recorre los productos en lotes por cursor, sin materializar el resultado completo"""
+        despues_de = None
+        while True:
+            lote, despues_de = await self.paginar(
+                disponible=disponible,
+                categoria=categoria,
+                precio_max=precio_max,
+                ordenar_por=ordenar_por,
+                descendente=descendente,
+                despues_de=despues_de,
+                limite=tamano_lote,
+                precio_min=precio_min,
+                min_rating=min_rating,
+                stock_min=stock_min
+            )
+            for producto in lote:
+                yield producto
+            if despues_de is None:
+                return
+
+    async def buscar(self, query: str, min_rating: Optional[float] = None, difusa: bool = False) -> List[Producto]:
+        """Busca productos por texto en nombre o descripción; difusa tolera errores de tipeo"""
+        return await self._ejecutar(
+            "buscar",
+            self._leer, buscar_productos_por_texto, self.store, self.indice_busqueda, query, min_rating, difusa
+        )
+
+    async def autocompletar(self, prefijo: str, k: int) -> List[Producto]:
+        """Los k productos mejor valorados cuyo nombre tiene una palabra con ese prefijo"""
+        return await self._ejecutar(
+            "autocompletar",
+            self._leer, autocompletar_productos, self.store, self.indice_busqueda, prefijo, k
+        )
+
+    async def facetas(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Agregados del catálogo: los contadores en memoria sin filtros, una pasada sobre el filtro si hay"""
+        filtros = {
+            "disponible": disponible,
+            "categoria": categoria or None,
+            "precio_max": precio_max,
+            "precio_min": precio_min,
+            "min_rating": min_rating,
+            "stock_min": stock_min
+        }
+        if all(valor is None for valor in filtros.values()):
+            return self.facetas_catalogo.resumen()
+        return await self._ejecutar("facetas", self._facetas_filtradas, **filtros)
+
+    def _facetas_filtradas(self, **filtros) -> Dict[str, Any]:
+        return resumir_facetas(self._leer(self.store.filtrar, **filtros))
+
+    async def crear(self, producto: Producto) -> Producto:
+        """Guarda un producto nuevo en su versión 1"""
+        return await self._escribir("crear", self._crear, producto)
+
+    async def actualizar(
+        self,
+        producto_id: UUID,
+        cambios: Dict[str, Any],
+        version_esperada: Optional[int] = None
+    ) -> Producto:
+        """Aplica cambios a un producto existente; con version_esperada falla si otro lo modificó antes"""
+        return await self._escribir("actualizar", self._actualizar, producto_id, cambios, version_esperada)
+
+    async def eliminar(self, producto_id: UUID, version_esperada: Optional[int] = None) -> Producto:
+        """Elimina un producto existente; con version_esperada falla si otro lo modificó antes"""
+        return await self._escribir("eliminar", self._eliminar, producto_id, version_esperada)
+
+    def _vigente(self, producto_id: UUID, version_esperada: Optional[int]) -> Producto:
+        """Retorna el producto actual; lanza si no existe o si no está en la versión esperada"""
+        actual = self.store.obtener(producto_id)
+        if actual is None:
+            raise ProductoNoEncontradoError(f"Producto con ID {producto_id} no encontrado")
+        if version_esperada is not None and actual.version != version_esperada:
+            raise ConflictoVersionError(
+                f"El producto fue modificado: versión actual {actual.version}",
+                version_actual=actual.version
+            )
+        return actual
+
+    def _crear(self, producto: Producto) -> Producto:
+        producto.version = 1
+        with self.locks.bloquear(clave_producto(producto.id), clave_nombre(producto.nombre)):
+            producto = self._mutar(self.store.agregar, producto)
+            self.indice_busqueda.indexar(producto)
+            self._notificar("crear", producto)
+        return producto
+
+    def _actualizar(
+        self,
+        producto_id: UUID,
+        cambios: Dict[str, Any],
+        version_esperada: Optional[int] = None
+    ) -> Producto:
+        claves = [clave_producto(producto_id)]
+        if cambios.get("nombre") is not None:
+            claves.append(clave_nombre(cambios["nombre"]))
+        with self.locks.bloquear(*claves):
+            actual = self._vigente(producto_id, version_esperada)
+            producto = self._mutar(
+                self.store.actualizar, producto_id, {**cambios, "version": actual.version + 1}
+            )
+            self.indice_busqueda.indexar(producto)
+            self._notificar("actualizar", producto)
+        return producto
+
+    def _eliminar(self, producto_id: UUID, version_esperada: Optional[int] = None) -> Producto:
+        with self.locks.bloquear(clave_producto(producto_id)):
+            self._vigente(producto_id, version_esperada)
+            producto = self._mutar(self.store.eliminar, producto_id)
+            self.indice_busqueda.eliminar(producto_id)
+            self._notificar("eliminar", producto)
+        return producto
+
+    async def crear_lote(self, productos: List[Producto], atomico: bool = True) -> List[Optional[str]]:
+        """Guarda varios productos en un solo acceso; retorna el error de cada uno o None"""
+        return await self._escribir("crear_lote", self._crear_lote, productos, atomico)
+
+    async def actualizar_lote(
+        self,
+        cambios: List[Tuple[UUID, Dict[str, Any]]],
+        atomico: bool = True
+    ) -> List[Optional[str]]:
+        """Actualiza varios productos en un solo acceso; retorna el error de cada uno o None"""
+        return await self._escribir("actualizar_lote", self._actualizar_lote, cambios, atomico)
+
+    async def eliminar_lote(self, producto_ids: List[UUID], atomico: bool = True) -> List[Optional[str]]:
+        """Elimina varios productos en un solo acceso; retorna el error de cada uno o None"""
+        return await self._escribir("eliminar_lote", self._eliminar_lote, producto_ids, atomico)
+
+    def _crear_lote(self, productos: List[Producto], atomico: bool) -> List[Optional[str]]:
+        claves = [clave_producto(p.id) for p in productos] + [clave_nombre(p.nombre) for p in productos]
+        with self.locks.bloquear(*claves):
+            errores: List[Optional[str]] = []
+            nombres = set()
+            for producto in productos:
+                clave = producto.nombre_clave
+                if clave in nombres or self.store.existe_nombre(producto.nombre):
+                    errores.append("Ya existe un producto con ese nombre")
+                else:
+                    nombres.add(clave)
+                    errores.append(None)
+
+            if atomico and any(errores):
+                return errores
+            validos = [producto for producto, error in zip(productos, errores) if error is None]
+            for producto in validos:
+                producto.version = 1
+            for producto in self._mutar(self.store.agregar_lote, validos):
+                self.indice_busqueda.indexar(producto)
+                self._notificar("crear", producto)
+            return errores
+
+    def _actualizar_lote(
+        self,
+        cambios: List[Tuple[UUID, Dict[str, Any]]],
+        atomico: bool
+    ) -> List[Optional[str]]:
+        claves = [clave_producto(producto_id) for producto_id, _ in cambios]
+        claves += [clave_nombre(datos["nombre"]) for _, datos in cambios if datos.get("nombre") is not None]
+        with self.locks.bloquear(*claves):
+            errores: List[Optional[str]] = []
+            validos = []
+            vistos = set()
+            nombres = set()
+            for producto_id, datos in cambios:
+                nombre = datos.get("nombre")
+                clave = normalizar(nombre) if nombre is not None else None
+                actual = None if producto_id in vistos else self.store.obtener(producto_id)
+                if producto_id in vistos:
+                    errores.append("El producto aparece más de una vez en el lote")
+                elif actual is None:
+                    errores.append(f"Producto con ID {producto_id} no encontrado")
+                elif nombre is not None and (
+                    clave in nombres or self.store.existe_nombre(nombre, exclude_id=producto_id)
+                ):
+                    errores.append("Ya existe un producto con ese nombre")
+                else:
+                    if nombre is not None:
+                        nombres.add(clave)
+                    errores.append(None)
+                    validos.append((producto_id, {**datos, "version": actual.version + 1}))
+                vistos.add(producto_id)
+
+            if atomico and any(errores):
+                return errores
+            for producto in self._mutar(self.store.actualizar_lote, validos):
+                self.indice_busqueda.indexar(producto)
+                self._notificar("actualizar", producto)
+            return errores
+
+    def _eliminar_lote(self, producto_ids: List[UUID], atomico: bool) -> List[Optional[str]]:
+        with self.locks.bloquear(*(clave_producto(producto_id) for producto_id in producto_ids)):
+            errores: List[Optional[str]] = []
+            vistos = set()
+            for producto_id in producto_ids:
+                if producto_id in vistos:
+                    errores.append("El producto aparece más de una vez en el lote")
+                elif producto_id not in self.store:
+                    errores.append(f"Producto con ID {producto_id} no encontrado")
+                else:
+                    errores.append(None)
+                vistos.add(producto_id)
+
+            if atomico and any(errores):
+                return errores
+            validos = [producto_id for producto_id, error in zip(producto_ids, errores) if error is None]
+            for producto in self._mutar(self.store.eliminar_lote, validos):
+                self.indice_busqueda.eliminar(producto.id)
+                self._notificar("eliminar", producto)
+            return errores
+
+    async def sincronizar(self) -> int:
+        """Replica en los índices y oyentes locales las escrituras de otros procesos; retorna cuántas"""
+        if not self.store.compartido:
+            return 0
+        return await self._ejecutar("sincronizar", self._sincronizar)
+
+    def _sincronizar(self) -> int:
+        # Lo llaman el sondeo periódico y cada escritura: de a uno, para no aplicar dos veces un cambio
+        with self._lock_sincronizar:
+            origen = os.getpid()
+            aplicados = 0
+            while True:
+                cambios = self.store.cambios_desde(self._cambio_compartido, TAMANO_LOTE_STREAM)
+                if not cambios:
+                    return aplicados
+                if cambios[0][0] > self._cambio_compartido + 1:
+                    # El registro compartido se recortó antes de leerlo: se reconstruye todo
+                    self._cambio_compartido = self.store.ultimo_cambio()
+                    self._notificar("limpiar", None)
+                    self.indice_busqueda.reconstruir(self.store)
+                    self.facetas_catalogo.reconstruir(self.store)
+                    for oyente in self._oyentes_secuencia:
+                        oyente("resincronizar", None, self._cambio_compartido)
+                    return aplicados + 1
+                for secuencia, operacion, producto_id, pid in cambios:
+                    if pid != origen:
+                        self._replicar(operacion, producto_id)
+                        aplicados += 1
+                    with self._lock_cambios:
+                        self._cambio_compartido = secuencia
+                    if self._oyentes_secuencia:
+                        self._anotar(secuencia, operacion, producto_id)
+
+    def _anotar(self, secuencia: int, operacion: str, producto_id: Optional[UUID]):
+        """Pasa un cambio del registro compartido, de este worker o de otro, a los oyentes con secuencia"""
+        if operacion == "limpiar":
+            producto = None
+        elif operacion == "eliminar":
+            producto = Producto.model_construct(id=producto_id)
+        else:
+            producto = self.store.obtener(producto_id)
+            if producto is None:
+                # Se eliminó después; ese cambio llega más adelante
+                return
+        for oyente in self._oyentes_secuencia:
+            oyente(operacion, producto, secuencia)
+
+    def _replicar(self, operacion: str, producto_id: Optional[UUID]):
+        """Aplica un cambio hecho por otro proceso; el almacén ya lo tiene, solo faltan los derivados"""
+        if operacion == "limpiar":
+            self.indice_busqueda.limpiar()
+            self._notificar("limpiar", None)
+            return
+        with self.locks.bloquear(clave_producto(producto_id)):
+            if operacion == "eliminar":
+                self.indice_busqueda.eliminar(producto_id)
+                self._notificar("eliminar", Producto.model_construct(id=producto_id))
+                return
+            producto = self.store.obtener(producto_id)
+            if producto is None:
+                # Se eliminó después; ese cambio llega más adelante
+                return
+            self.indice_busqueda.indexar(producto)
+            self._notificar(operacion, producto)
+
+    def limpiar(self):
+        """Vacía el almacén y los índices derivados"""
+        with self._lock_almacen:
+            self.store.clear()
+            self.indice_busqueda.limpiar()
+            self._notificar("limpiar", None)
+        self.store.esperar_durabilidad()
+        if self.store.compartido:
+            self._sincronizar()
+
+    def cerrar(self):
+        """Libera el pool de hilos y las conexiones del backend si existen"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._executor_durabilidad is not None:
+            self._executor_durabilidad.shutdown(wait=True)
+            self._executor_durabilidad = None
+        cerrar_backend = getattr(self.store, "cerrar", None)
+        if cerrar_backend is not None:
+            cerrar_backend()
+
+
+def crear_repositorio() -> ProductRepository:
+    """Crea el repositorio con el backend configurado en BACKEND_DB"""
+    if BACKEND_DB == "sqlite":
+        from sqlite_store import SQLiteBackend
+        # SQLite es bloqueante: por defecto se usa un hilo por conexión del pool
+        return ProductRepository(
+            SQLiteBackend(SQLITE_RUTA, tamano_pool=SQLITE_POOL),
+            retraso=RETRASO_DB,
+            max_hilos=MAX_HILOS_DB or SQLITE_POOL
+        )
+    if BACKEND_DB == "columnar":
+        from column_store import ColumnStore
+        return ProductRepository(ColumnStore(), retraso=RETRASO_DB, max_hilos=MAX_HILOS_DB)
+    if BACKEND_DB != "memoria":
+        raise ValueError(f"Backend de base de datos desconocido: {BACKEND_DB}")
+    if PERSISTENCIA_DIR:
+        from persistence import AlmacenDurable, WAL_ESPERAR_FSYNC
+        # Solo la espera del fsync va a hilos: el almacén en memoria no admite lecturas y escrituras concurrentes
+        return ProductRepository(
+            AlmacenDurable(PERSISTENCIA_DIR),
+            retraso=RETRASO_DB,
+            max_hilos=MAX_HILOS_DB,
+            hilos_durabilidad=HILOS_DURABLE if WAL_ESPERAR_FSYNC else 0
+        )
+    return ProductRepository(productos_db, retraso=RETRASO_DB, max_hilos=MAX_HILOS_DB)
+
+
+repositorio = crear_repositorio()
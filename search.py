@@ -0,0 +1,195 @@
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+from products import Producto, normalizar
+from fuzzy import IndiceDifuso
+from trie import TriePrefijos
+
+PESO_NOMBRE = 2.0
+PESO_DESCRIPCION = 1.0
+BONO_TOKEN_EXACTO = 0.5
+# Lo que resta cada error de tipeo al puntaje de un token encontrado en modo difuso
+PENALIZACION_ERROR = 0.25
+
+_PATRON_TOKEN = re.compile(r"\w+")
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Divide un texto normalizado en palabras"""
+    return _PATRON_TOKEN.findall(normalizar(texto))
+
+
+def _ngramas(token: str) -> Set[str]:
+    """Bigramas y trigramas de un token para resolver búsquedas por subcadena"""
+    gramas = {token[i:i + 2] for i in range(len(token) - 1)}
+    gramas.update(token[i:i + 3] for i in range(len(token) - 2))
+    return gramas
+
+
+class IndiceBusqueda:
+    """Índice invertido incremental sobre nombre y descripción de los productos.
+
+    Cada token del vocabulario se indexa además por sus bigramas y trigramas,
+    así una palabra de la consulta encuentra los tokens que la contienen sin
+    recorrer el texto de todo el catálogo. También mantiene los borrados del
+    vocabulario para la búsqueda con errores y un trie de los tokens del
+    nombre para autocompletar.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[UUID, float]] = {}
+        self._tokens_por_producto: Dict[UUID, Dict[str, float]] = {}
+        self._vocabulario_por_grama: Dict[str, Set[str]] = {}
+        self._difuso = IndiceDifuso()
+        self._trie = TriePrefijos()
+        # id -> (tokens del nombre, entrada en el trie) para quitarlo aunque haya cambiado
+        self._en_trie: Dict[UUID, Tuple[FrozenSet[str], Tuple[float, int, UUID]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._tokens_por_producto)
+
+    def limpiar(self):
+        """Vacía el índice"""
+        with self._lock:
+            self._postings.clear()
+            self._tokens_por_producto.clear()
+            self._vocabulario_por_grama.clear()
+            self._difuso.limpiar()
+            self._trie.limpiar()
+            self._en_trie.clear()
+
+    def reconstruir(self, productos: Iterable[Producto]):
+        """Indexa desde cero un conjunto de productos"""
+        with self._lock:
+            self.limpiar()
+            for producto in productos:
+                self.indexar(producto)
+
+    def indexar(self, producto: Producto):
+        """Agrega o reemplaza las entradas de un producto"""
+        pesos: Dict[str, float] = {}
+        tokens_nombre = frozenset(_PATRON_TOKEN.findall(producto.nombre_clave))
+        for token in tokens_nombre:
+            pesos[token] = PESO_NOMBRE
+        if producto.descripcion_clave:
+            for token in _PATRON_TOKEN.findall(producto.descripcion_clave):
+                pesos[token] = max(pesos.get(token, 0.0), PESO_DESCRIPCION)
+
+        with self._lock:
+            self._quitar(producto.id)
+            self._tokens_por_producto[producto.id] = pesos
+            for token, peso in pesos.items():
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = {}
+                    for grama in _ngramas(token):
+                        self._vocabulario_por_grama.setdefault(grama, set()).add(token)
+                    self._difuso.agregar(token)
+                posting[producto.id] = peso
+            entrada = (-producto.rating, producto.id.int, producto.id)
+            for token in tokens_nombre:
+                self._trie.agregar(token, entrada)
+            self._en_trie[producto.id] = (tokens_nombre, entrada)
+
+    def eliminar(self, producto_id: UUID):
+        """Quita un producto del índice"""
+        with self._lock:
+            self._quitar(producto_id)
+
+    def _quitar(self, producto_id: UUID):
+        en_trie = self._en_trie.pop(producto_id, None)
+        if en_trie is not None:
+            tokens_nombre, entrada = en_trie
+            for token in tokens_nombre:
+                self._trie.quitar(token, entrada)
+        pesos = self._tokens_por_producto.pop(producto_id, None)
+        if not pesos:
+            return
+        for token in pesos:
+            posting = self._postings[token]
+            posting.pop(producto_id, None)
+            if not posting:
+                del self._postings[token]
+                self._difuso.quitar(token)
+                for grama in _ngramas(token):
+                    tokens = self._vocabulario_por_grama.get(grama)
+                    if tokens is not None:
+                        tokens.discard(token)
+                        if not tokens:
+                            del self._vocabulario_por_grama[grama]
+
+    def _tokens_que_contienen(self, fragmento: str) -> Set[str]:
+        """Tokens del vocabulario que contienen el fragmento como subcadena"""
+        if len(fragmento) == 1:
+            return {t for t in self._postings if fragmento in t}
+        gramas = [fragmento[i:i + 3] for i in range(len(fragmento) - 2)] or [fragmento]
+        candidatos: Optional[Set[str]] = None
+        for grama in sorted(gramas, key=lambda g: len(self._vocabulario_por_grama.get(g, ()))):
+            tokens = self._vocabulario_por_grama.get(grama)
+            if not tokens:
+                return set()
+            candidatos = set(tokens) if candidatos is None else candidatos & tokens
+            if not candidatos:
+                return set()
+        return {t for t in candidatos if fragmento in t}
+
+    def _tokens_para(self, palabra: str, difusa: bool) -> Dict[str, float]:
+        """Tokens que cuentan como la palabra -> bono (o penalización) que suman al puntaje"""
+        bonos = {
+            token: BONO_TOKEN_EXACTO if token == palabra else 0.0
+            for token in self._tokens_que_contienen(palabra)
+        }
+        if difusa:
+            for token, distancia in self._difuso.similares(palabra).items():
+                bonos.setdefault(token, -PENALIZACION_ERROR * distancia)
+        return bonos
+
+    def buscar(self, consulta: str, difusa: bool = False) -> List[Tuple[UUID, float]]:
+        """Retorna (id, puntaje) de los productos que contienen todas las palabras de la consulta.
+
+        Con difusa=True cada palabra también coincide con los tokens a una o dos
+        ediciones (según su largo), con menos puntaje que una coincidencia real.
+        """
+        palabras = tokenizar(consulta)
+        if not palabras:
+            return []
+
+        with self._lock:
+            puntajes: Optional[Dict[UUID, float]] = None
+            for palabra in palabras:
+                por_palabra: Dict[UUID, float] = {}
+                for token, bono in self._tokens_para(palabra, difusa).items():
+                    for producto_id, peso in self._postings[token].items():
+                        puntaje = peso + bono
+                        if puntaje > por_palabra.get(producto_id, 0.0):
+                            por_palabra[producto_id] = puntaje
+                if puntajes is None:
+                    puntajes = por_palabra
+                else:
+                    puntajes = {
+                        producto_id: puntaje + por_palabra[producto_id]
+                        for producto_id, puntaje in puntajes.items()
+                        if producto_id in por_palabra
+                    }
+                if not puntajes:
+                    return []
+
+        return sorted(puntajes.items(), key=lambda item: item[1], reverse=True)
+
+    def autocompletar(self, consulta: str, k: int) -> List[Tuple[UUID, float]]:
+        """(id, rating) de los k productos mejor valorados cuyo nombre tiene un token con el prefijo.
+
+        La última palabra es el prefijo; las anteriores, ya completas, tienen
+        que estar en el nombre.
+        """
+        palabras = tokenizar(consulta)
+        if not palabras:
+            return []
+        *completas, prefijo = palabras
+        requeridas = frozenset(completas)
+
+        with self._lock:
+            filtro = (lambda producto_id: requeridas <= self._en_trie[producto_id][0]) if requeridas else None
+            return [(producto_id, -rating) for rating, _, producto_id in self._trie.mejores(prefijo, k, filtro)]
@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from products import Producto
+
+try:
+    import orjson
+except ImportError:  # sin orjson la ruta rápida sigue cacheando, pero codifica con json
+    orjson = None
+
+SERIALIZACION_RAPIDA = os.getenv("SERIALIZACION_RAPIDA", "0") == "1"
+MAX_JSON_PRODUCTOS = int(os.getenv("MAX_JSON_PRODUCTOS", "500000"))
+
+
+def _dumps(datos: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class CacheJsonProductos:
+    """JSON ya codificado de cada producto, válido mientras no cambie su versión.
+
+    Se indexa por ID y no sobre el objeto guardado porque los backends
+    columnar y SQLite construyen un Producto nuevo en cada lectura. Cada
+    escritura incrementa la versión, igual que el ETag; la fecha no sirve
+    porque dos escrituras pueden compartirla con un reloj grueso o desde
+    otro worker.
+    """
+
+    def __init__(self, max_entradas: int = MAX_JSON_PRODUCTOS):
+        self.max_entradas = max_entradas
+        self._entradas: Dict[UUID, Tuple[int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def codificar(self, producto: Producto) -> bytes:
+        entrada = self._entradas.get(producto.id)
+        if entrada is not None and entrada[0] == producto.version:
+            return entrada[1]
+        # Iterar el modelo da sus campos en orden de declaración sin convertirlos
+        cuerpo = _dumps(dict(producto) if orjson is not None else jsonable_encoder(producto))
+        if producto.id is not None:
+            with self._lock:
+                if len(self._entradas) >= self.max_entradas and producto.id not in self._entradas:
+                    # Se descarta la entrada más antigua
+                    del self._entradas[next(iter(self._entradas))]
+                self._entradas[producto.id] = (producto.version, cuerpo)
+        return cuerpo
+
+    def olvidar(self, operacion: str, producto: Optional[Producto]):
+        """Oyente del repositorio: libera las entradas de productos eliminados"""
+        with self._lock:
+            if operacion == "limpiar":
+                self._entradas.clear()
+            elif operacion == "eliminar":
+                self._entradas.pop(producto.id, None)
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+json_productos = CacheJsonProductos()
+
+
+def serializar_rapido(contenido: Any) -> bytes:
+    """Serializa productos y listas de productos concatenando su JSON cacheado"""
+    if isinstance(contenido, Producto):
+        return json_productos.codificar(contenido)
+    if isinstance(contenido, list) and all(isinstance(item, Producto) for item in contenido):
+        return b"[" + b",".join([json_productos.codificar(item) for item in contenido]) + b"]"
+    return _dumps(jsonable_encoder(contenido))
+
+
+class RespuestaJSONRapida(Response):
+    """Respuesta JSON que usa serializar_rapido; al retornarla FastAPI omite el response_model"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return serializar_rapido(content)
@@ -0,0 +1,142 @@
+"""Lanzador de producción de la API.
+
+Uso:
+    BACKEND_DB=sqlite python server.py --workers 4 --port 8000
+    python server.py --workers 1 --loop uvloop --http httptools
+
+Importa la aplicación y la precalienta en el proceso maestro (esquema
+OpenAPI, índices de búsqueda y facetas), cierra conexiones e hilos y recién
+entonces hace fork de los workers sobre un socket compartido, para que
+hereden el estado ya construido por copy-on-write. El maestro reinicia los
+workers que terminan inesperadamente y reenvía SIGTERM/SIGINT al apagar.
+
+Con más de un worker el catálogo tiene que vivir en un almacén compartido
+(BACKEND_DB=sqlite); cada worker replica las escrituras de los demás en sus
+índices y cachés con el registro de cambios de SQLite. Las secuencias de
+/productos/cambios y los ETag de los listados salen de ese registro, así que
+valen en cualquier worker; uno que todavía no sondeó las últimas escrituras
+de otro responde con una secuencia anterior, nunca con otra numeración.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+WORKERS = int(os.getenv("WORKERS", "1"))
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+BACKENDS_COMPARTIDOS = ("sqlite",)
+# Un worker que muere antes de este tiempo se relanza con espera, para no girar en falso
+VIDA_MINIMA_WORKER = 1.0
+
+
+def precalentar(app):
+    """Construye en el maestro todo lo que los workers pueden heredar"""
+    from repository import repositorio
+    app.openapi()
+    # Los workers abren sus propias conexiones e hilos; compartirlos entre procesos no es seguro
+    repositorio.cerrar()
+    gc.collect()
+    # Los objetos ya creados no vuelven a ser recorridos por el GC, así sus páginas siguen compartidas
+    gc.freeze()
+
+
+def crear_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def correr_worker(app, sock: socket.socket, argumentos):
+    import uvicorn
+    config = uvicorn.Config(
+        app,
+        loop=argumentos.loop,
+        http=argumentos.http,
+        log_level=argumentos.log_level,
+        access_log=False,
+        lifespan="on"
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def supervisar(app, sock: socket.socket, argumentos):
+    """Mantiene `workers` procesos hijos vivos hasta recibir SIGTERM o SIGINT"""
+    hijos: Dict[int, float] = {}
+    terminando = False
+
+    def lanzar():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                correr_worker(app, sock, argumentos)
+            finally:
+                os._exit(0)
+        hijos[pid] = time.monotonic()
+
+    def apagar(senal, _):
+        nonlocal terminando
+        terminando = True
+        for pid in list(hijos):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, apagar)
+    signal.signal(signal.SIGINT, apagar)
+    for _ in range(argumentos.workers):
+        lanzar()
+
+    while hijos:
+        try:
+            pid, estado = os.wait()
+        except ChildProcessError:
+            break
+        inicio = hijos.pop(pid, None)
+        if inicio is None or terminando:
+            continue
+        print(f"worker {pid} terminó con estado {estado}; se relanza", file=sys.stderr)
+        if time.monotonic() - inicio < VIDA_MINIMA_WORKER:
+            time.sleep(VIDA_MINIMA_WORKER)
+        lanzar()
+
+
+def main(app=None, argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--loop", choices=["auto", "uvloop", "asyncio"], default=os.getenv("LOOP", "auto"))
+    parser.add_argument("--http", choices=["auto", "httptools", "h11"], default=os.getenv("HTTP", "auto"))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "warning"))
+    argumentos = parser.parse_args(argv)
+
+    from repository import BACKEND_DB
+    if argumentos.workers > 1 and BACKEND_DB not in BACKENDS_COMPARTIDOS:
+        parser.error(
+            f"con {argumentos.workers} workers el catálogo debe ser compartido: "
+            f"use BACKEND_DB={' o '.join(BACKENDS_COMPARTIDOS)} (actual: {BACKEND_DB})"
+        )
+
+    if app is None:
+        from main import app
+    precalentar(app)
+    sock = crear_socket(argumentos.host, argumentos.port)
+    if argumentos.workers == 1:
+        correr_worker(app, sock, argumentos)
+    else:
+        supervisar(app, sock, argumentos)
+
+
+if __name__ == "__main__":
+    main()
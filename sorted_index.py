@@ -0,0 +1,76 @@
+from bisect import bisect_left, insort
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+# Mayor que cualquier seq: (valor, INFINITO) queda después de todas las claves con ese valor
+INFINITO = float("inf")
+
+# Las claves son tuplas (valor, seq, id); seq es único por producto, así que
+# el id nunca llega a compararse y (valor, seq) basta como cursor.
+Clave = Tuple[Any, int, Any]
+
+
+class IndiceOrdenado:
+    """Lista ordenada de claves mantenida con bisect para recorridos por rango"""
+
+    def __init__(self):
+        self._claves: List[Clave] = []
+
+    def __len__(self) -> int:
+        return len(self._claves)
+
+    def limpiar(self):
+        """Vacía el índice"""
+        self._claves.clear()
+
+    def cargar(self, claves: Iterable[Clave]):
+        """Reemplaza el contenido ordenando todas las claves de una vez, en O(n log n)"""
+        self._claves = sorted(claves)
+
+    def agregar(self, clave: Clave):
+        """Inserta una clave conservando el orden"""
+        insort(self._claves, clave)
+
+    def quitar(self, clave: Clave):
+        """Quita una clave si está presente"""
+        i = bisect_left(self._claves, clave)
+        if i < len(self._claves) and self._claves[i] == clave:
+            del self._claves[i]
+
+    def limites(self, minimo: Any = None, maximo: Any = None) -> Tuple[int, int]:
+        """Posiciones [inicio, fin) de las claves con minimo <= valor <= maximo, en O(log n)"""
+        claves = self._claves
+        inicio = 0 if minimo is None else bisect_left(claves, (minimo,))
+        fin = len(claves) if maximo is None else bisect_left(claves, (maximo, INFINITO))
+        return inicio, max(inicio, fin)
+
+    def contar(self, minimo: Any = None, maximo: Any = None) -> int:
+        """Cantidad de claves dentro del rango"""
+        inicio, fin = self.limites(minimo, maximo)
+        return fin - inicio
+
+    def ids(self, minimo: Any = None, maximo: Any = None) -> List[Any]:
+        """Ids de las claves dentro del rango, en orden de valor"""
+        inicio, fin = self.limites(minimo, maximo)
+        return [clave[2] for clave in self._claves[inicio:fin]]
+
+    def recorrer(
+        self,
+        despues_de: Optional[Tuple[Any, int]] = None,
+        descendente: bool = False,
+        minimo: Any = None,
+        maximo: Any = None
+    ) -> Iterator[Clave]:
+        """Recorre las claves a partir de un cursor (valor, seq), sin incluirlo, sin salir del rango"""
+        claves = self._claves
+        inicio, fin = self.limites(minimo, maximo)
+        if descendente:
+            i = fin if despues_de is None else min(fin, bisect_left(claves, tuple(despues_de)))
+            while i > inicio:
+                i -= 1
+                if i < len(claves):
+                    yield claves[i]
+        else:
+            i = inicio if despues_de is None else max(inicio, bisect_left(claves, (despues_de[0], despues_de[1] + 1)))
+            while i < min(fin, len(claves)):
+                yield claves[i]
+                i += 1
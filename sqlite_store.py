@@ -0,0 +1,389 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+from products import Producto, normalizar
+from store import StorageBackend
+from exceptions import ProductoNoEncontradoError, ProductoDuplicadoError
+
+COLUMNAS = (
+    "id", "nombre", "descripcion", "precio", "stock", "categoria",
+    "disponible", "fecha_creacion", "fecha_actualizacion", "rating", "version"
+)
+SELECT_PRODUCTOS = f"SELECT {', '.join(COLUMNAS)} FROM productos"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS productos (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    nombre_clave TEXT NOT NULL,
+    descripcion TEXT,
+    precio REAL NOT NULL,
+    stock INTEGER NOT NULL,
+    categoria TEXT NOT NULL,
+    categoria_clave TEXT NOT NULL,
+    disponible INTEGER NOT NULL,
+    fecha_creacion TEXT,
+    fecha_actualizacion TEXT,
+    rating REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre_clave);
+CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos(categoria_clave, disponible);
+CREATE INDEX IF NOT EXISTS idx_productos_precio ON productos(precio);
+CREATE INDEX IF NOT EXISTS idx_productos_rating ON productos(rating);
+CREATE INDEX IF NOT EXISTS idx_productos_stock ON productos(stock);
+CREATE INDEX IF NOT EXISTS idx_productos_fecha_creacion ON productos(COALESCE(fecha_creacion, ''));
+CREATE TABLE IF NOT EXISTS cambios (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    operacion TEXT NOT NULL,
+    id TEXT,
+    origen INTEGER NOT NULL
+);
+"""
+
+SQL_OBTENER = f"{SELECT_PRODUCTOS} WHERE id = ?"
+SQL_OBTENER_POR_NOMBRE = f"{SELECT_PRODUCTOS} WHERE nombre_clave = ?"
+SQL_INSERTAR = """
+INSERT INTO productos (
+    id, nombre, nombre_clave, descripcion, precio, stock, categoria,
+    categoria_clave, disponible, fecha_creacion, fecha_actualizacion, rating, version
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_ACTUALIZAR = """
+UPDATE productos SET
+    nombre = ?, nombre_clave = ?, descripcion = ?, precio = ?, stock = ?,
+    categoria = ?, categoria_clave = ?, disponible = ?, fecha_creacion = ?,
+    fecha_actualizacion = ?, rating = ?, version = ?
+WHERE id = ?
+"""
+SQL_ELIMINAR = "DELETE FROM productos WHERE id = ?"
+SQL_CONTAR = "SELECT COUNT(*) FROM productos"
+SQL_REGISTRAR_CAMBIO = "INSERT INTO cambios (operacion, id, origen) VALUES (?, ?, ?)"
+SQL_RECORTAR_CAMBIOS = "DELETE FROM cambios WHERE seq <= (SELECT MAX(seq) FROM cambios) - ?"
+SQL_ULTIMO_CAMBIO = "SELECT COALESCE(MAX(seq), 0) FROM cambios"
+SQL_CAMBIOS_DESDE = "SELECT seq, operacion, id, origen FROM cambios WHERE seq > ? ORDER BY seq LIMIT ?"
+
+# Se guarda en PRAGMA user_version para migrar bases creadas con versiones anteriores
+VERSION_ESQUEMA = 1
+
+# Cambios que se conservan para que los demás procesos los repliquen
+MAX_CAMBIOS_COMPARTIDOS = int(os.getenv("MAX_CAMBIOS_COMPARTIDOS", "100000"))
+
+# Expresión SQL de cada criterio de orden; seq desempata y da el orden de inserción
+COLUMNAS_ORDEN = {
+    None: "seq",
+    "precio": "precio",
+    "rating": "rating",
+    "fecha_creacion": "COALESCE(fecha_creacion, '')",
+}
+
+
+def _fecha(valor: Optional[datetime]) -> Optional[str]:
+    return valor.isoformat() if valor is not None else None
+
+
+def _fila_a_producto(fila: tuple) -> Producto:
+    datos = dict(zip(COLUMNAS, fila))
+    datos["id"] = UUID(datos["id"])
+    datos["disponible"] = bool(datos["disponible"])
+    for campo in ("fecha_creacion", "fecha_actualizacion"):
+        if datos[campo] is not None:
+            datos[campo] = datetime.fromisoformat(datos[campo])
+    # Las filas se validaron al escribirlas
+    return Producto.sin_validar(**datos)
+
+
+def _valores(producto: Producto) -> tuple:
+    """Valores de las columnas editables en el orden de SQL_ACTUALIZAR"""
+    return (
+        producto.nombre, producto.nombre_clave, producto.descripcion,
+        producto.precio, producto.stock, producto.categoria,
+        producto.categoria_clave, int(producto.disponible),
+        _fecha(producto.fecha_creacion), _fecha(producto.fecha_actualizacion),
+        producto.rating, producto.version
+    )
+
+
+class SQLiteBackend(StorageBackend):
+    """Backend persistente en SQLite con WAL y un pool de conexiones.
+
+    Las sentencias son constantes parametrizadas, así que cada conexión las
+    compila una sola vez gracias a su caché de sentencias preparadas.
+    """
+
+    concurrente = True
+    compartido = True
+
+    def __init__(self, ruta: str, tamano_pool: int = 4):
+        self.ruta = ruta
+        self.tamano_pool = tamano_pool
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._abiertas = 0
+        self._lock_pool = threading.Lock()
+        with self._conexion() as conexion:
+            conexion.executescript(ESQUEMA)
+            columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(productos)")}
+            if "version" not in columnas:
+                # Bases creadas antes de que existiera el control de versiones
+                conexion.execute("ALTER TABLE productos ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            if conexion.execute("PRAGMA user_version").fetchone()[0] < VERSION_ESQUEMA:
+                # Bases anteriores guardaban las claves solo en minúsculas; se recalculan también sin acentos
+                conexion.create_function("normalizar", 1, normalizar, deterministic=True)
+                conexion.execute(
+                    "UPDATE productos SET nombre_clave = normalizar(nombre), categoria_clave = normalizar(categoria)"
+                )
+                conexion.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(
+            self.ruta,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256
+        )
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.execute("PRAGMA busy_timeout=5000")
+        return conexion
+
+    @contextmanager
+    def _conexion(self) -> Iterator[sqlite3.Connection]:
+        """Toma una conexión del pool, abriéndola si aún no se alcanzó el tamaño máximo"""
+        try:
+            conexion = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock_pool:
+                nueva = self._abiertas < self.tamano_pool
+                if nueva:
+                    self._abiertas += 1
+            conexion = self._conectar() if nueva else self._pool.get()
+        try:
+            yield conexion
+        finally:
+            self._pool.put(conexion)
+
+    @staticmethod
+    def _registrar_cambios(conexion: sqlite3.Connection, operacion: str, ids: List[Optional[UUID]]):
+        """Anota las escrituras en la misma transacción para que otros procesos las repliquen"""
+        origen = os.getpid()
+        conexion.executemany(
+            SQL_REGISTRAR_CAMBIO,
+            [(operacion, str(producto_id) if producto_id is not None else None, origen) for producto_id in ids]
+        )
+        conexion.execute(SQL_RECORTAR_CAMBIOS, (MAX_CAMBIOS_COMPARTIDOS,))
+
+    @contextmanager
+    def _transaccion(self) -> Iterator[sqlite3.Connection]:
+        with self._conexion() as conexion:
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexion
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+            conexion.execute("COMMIT")
+
+    def cerrar(self):
+        """Cierra las conexiones libres del pool; se reabren al volver a usarlo"""
+        with self._lock_pool:
+            while True:
+                try:
+                    self._pool.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._abiertas -= 1
+
+    def __len__(self) -> int:
+        with self._conexion() as conexion:
+            return conexion.execute(SQL_CONTAR).fetchone()[0]
+
+    def __iter__(self) -> Iterator[Producto]:
+        return iter(self.filtrar())
+
+    def clear(self):
+        with self._transaccion() as conexion:
+            conexion.execute("DELETE FROM productos")
+            self._registrar_cambios(conexion, "limpiar", [None])
+
+    def obtener(self, producto_id: UUID) -> Optional[Producto]:
+        with self._conexion() as conexion:
+            fila = conexion.execute(SQL_OBTENER, (str(producto_id),)).fetchone()
+        return _fila_a_producto(fila) if fila else None
+
+    def obtener_por_nombre(self, nombre: str) -> Optional[Producto]:
+        with self._conexion() as conexion:
+            fila = conexion.execute(SQL_OBTENER_POR_NOMBRE, (normalizar(nombre),)).fetchone()
+        return _fila_a_producto(fila) if fila else None
+
+    def agregar(self, producto: Producto) -> Producto:
+        return self.agregar_lote([producto])[0]
+
+    def actualizar(self, producto_id: UUID, cambios: Dict[str, Any]) -> Producto:
+        return self.actualizar_lote([(producto_id, cambios)])[0]
+
+    def eliminar(self, producto_id: UUID) -> Producto:
+        return self.eliminar_lote([producto_id])[0]
+
+    def agregar_lote(self, productos: List[Producto]) -> List[Producto]:
+        """Inserta todos los productos en una sola transacción"""
+        try:
+            with self._transaccion() as conexion:
+                conexion.executemany(
+                    SQL_INSERTAR,
+                    [(str(producto.id),) + _valores(producto) for producto in productos]
+                )
+                self._registrar_cambios(conexion, "crear", [producto.id for producto in productos])
+        except sqlite3.IntegrityError:
+            raise ProductoDuplicadoError("Ya existe un producto con ese nombre")
+        return productos
+
+    def actualizar_lote(self, cambios: List[Tuple[UUID, Dict[str, Any]]]) -> List[Producto]:
+        """Aplica los cambios de todos los productos en una sola transacción"""
+        actualizados = []
+        try:
+            with self._transaccion() as conexion:
+                for producto_id, datos in cambios:
+                    fila = conexion.execute(SQL_OBTENER, (str(producto_id),)).fetchone()
+                    if fila is None:
+                        raise ProductoNoEncontradoError(f"Producto con ID {producto_id} no encontrado")
+                    producto = _fila_a_producto(fila)
+                    for campo, valor in datos.items():
+                        setattr(producto, campo, valor)
+                    conexion.execute(SQL_ACTUALIZAR, _valores(producto) + (str(producto_id),))
+                    actualizados.append(producto)
+                self._registrar_cambios(conexion, "actualizar", [producto.id for producto in actualizados])
+        except sqlite3.IntegrityError:
+            raise ProductoDuplicadoError("Ya existe un producto con ese nombre")
+        return actualizados
+
+    def eliminar_lote(self, producto_ids: List[UUID]) -> List[Producto]:
+        """Elimina todos los productos en una sola transacción"""
+        eliminados = []
+        with self._transaccion() as conexion:
+            for producto_id in producto_ids:
+                fila = conexion.execute(SQL_OBTENER, (str(producto_id),)).fetchone()
+                if fila is None:
+                    raise ProductoNoEncontradoError(f"Producto con ID {producto_id} no encontrado")
+                conexion.execute(SQL_ELIMINAR, (str(producto_id),))
+                eliminados.append(_fila_a_producto(fila))
+            self._registrar_cambios(conexion, "eliminar", [producto.id for producto in eliminados])
+        return eliminados
+
+    def ultimo_cambio(self) -> int:
+        with self._conexion() as conexion:
+            return conexion.execute(SQL_ULTIMO_CAMBIO).fetchone()[0]
+
+    def cambios_desde(self, secuencia: int, limite: int) -> List[Tuple[int, str, Optional[UUID], int]]:
+        with self._conexion() as conexion:
+            filas = conexion.execute(SQL_CAMBIOS_DESDE, (secuencia, limite)).fetchall()
+        return [
+            (seq, operacion, UUID(producto_id) if producto_id is not None else None, origen)
+            for seq, operacion, producto_id, origen in filas
+        ]
+
+    def filtrar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> List[Producto]:
+        """Traduce los filtros a una cláusula WHERE que resuelven los índices"""
+        sql, parametros = self._sql_filtrar(disponible, categoria, precio_max, precio_min, min_rating, stock_min)
+        with self._conexion() as conexion:
+            filas = conexion.execute(sql, parametros).fetchall()
+        return [_fila_a_producto(fila) for fila in filas]
+
+    def explicar(self, **filtros) -> Dict[str, Any]:
+        """El plan de SQLite para el filtro (EXPLAIN QUERY PLAN) y las filas que retorna"""
+        sql, parametros = self._sql_filtrar(**filtros)
+        with self._conexion() as conexion:
+            plan = [fila[3] for fila in conexion.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+            filas = len(conexion.execute(sql, parametros).fetchall())
+        return {"backend": "sqlite", "plan": plan, "filas_retornadas": filas}
+
+    def _sql_filtrar(self, *args, **kwargs) -> Tuple[str, List[Any]]:
+        condiciones, parametros = self._condiciones(*args, **kwargs)
+        sql = SELECT_PRODUCTOS
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        return sql + " ORDER BY seq", parametros
+
+    def paginar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        ordenar_por: Optional[str] = None,
+        descendente: bool = False,
+        despues_de: Optional[Tuple[Any, int]] = None,
+        limite: Optional[int] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> Tuple[List[Producto], Optional[Tuple[Any, int]]]:
+        """Paginación por keyset: compara (valor, seq) contra el cursor en lugar de usar OFFSET"""
+        columna = COLUMNAS_ORDEN[ordenar_por]
+        direccion = "DESC" if descendente else "ASC"
+        condiciones, parametros = self._condiciones(
+            disponible, categoria, precio_max, precio_min, min_rating, stock_min
+        )
+        if despues_de is not None:
+            condiciones.append(f"({columna}, seq) {'<' if descendente else '>'} (?, ?)")
+            parametros.extend(despues_de)
+
+        sql = f"SELECT {', '.join(COLUMNAS)}, {columna}, seq FROM productos"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += f" ORDER BY {columna} {direccion}, seq {direccion}"
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros.append(limite + 1)
+
+        with self._conexion() as conexion:
+            filas = conexion.execute(sql, parametros).fetchall()
+
+        siguiente = None
+        if limite is not None and len(filas) > limite:
+            filas = filas[:limite]
+            siguiente = tuple(filas[-1][-2:])
+        return [_fila_a_producto(fila[:-2]) for fila in filas], siguiente
+
+    @staticmethod
+    def _condiciones(
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> Tuple[List[str], List[Any]]:
+        condiciones = []
+        parametros: List[Any] = []
+        if categoria:
+            condiciones.append("categoria_clave = ?")
+            parametros.append(normalizar(categoria))
+        if disponible is not None:
+            condiciones.append("disponible = ?")
+            parametros.append(int(disponible))
+        if precio_max is not None:
+            condiciones.append("precio <= ?")
+            parametros.append(precio_max)
+        if precio_min is not None:
+            condiciones.append("precio >= ?")
+            parametros.append(precio_min)
+        if min_rating is not None:
+            condiciones.append("rating >= ?")
+            parametros.append(min_rating)
+        if stock_min is not None:
+            condiciones.append("stock >= ?")
+            parametros.append(stock_min)
+        return condiciones, parametros
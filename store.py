@@ -0,0 +1,383 @@
+import heapq
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+from products import Producto, normalizar
+from exceptions import ProductoNoEncontradoError, ProductoDuplicadoError
+from sorted_index import IndiceOrdenado
+from query import Fuente, PlanConsulta, Predicado, compilar, planificar, predicados_de_filtros
+
+CAMPOS_ORDEN = ("precio", "rating", "fecha_creacion")
+# Campos numéricos filtrables por rango; todos tienen índice ordenado en el almacén en memoria
+CAMPOS_RANGO = ("precio", "rating", "stock")
+
+
+class StorageBackend(ABC):
+    """Interfaz común de los backends de almacenamiento de productos"""
+
+    # True si el backend admite mutaciones desde varios hilos sin coordinación externa
+    concurrente = False
+    # True si otros procesos escriben el mismo almacén; sus cambios se leen con cambios_desde
+    compartido = False
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Producto]:
+        ...
+
+    def __contains__(self, producto_id: UUID) -> bool:
+        return self.obtener(producto_id) is not None
+
+    @abstractmethod
+    def clear(self):
+        """Elimina todos los productos"""
+
+    @abstractmethod
+    def obtener(self, producto_id: UUID) -> Optional[Producto]:
+        """Retorna el producto con ese ID o None si no existe"""
+
+    @abstractmethod
+    def obtener_por_nombre(self, nombre: str) -> Optional[Producto]:
+        """Retorna el producto con ese nombre (sin distinguir mayúsculas) o None"""
+
+    def existe_nombre(self, nombre: str, exclude_id: Optional[UUID] = None) -> bool:
+        """Verifica si el nombre ya está en uso por otro producto"""
+        producto = self.obtener_por_nombre(nombre)
+        return producto is not None and producto.id != exclude_id
+
+    @abstractmethod
+    def agregar(self, producto: Producto) -> Producto:
+        """Agrega un producto nuevo; lanza ProductoDuplicadoError si el nombre existe"""
+
+    @abstractmethod
+    def actualizar(self, producto_id: UUID, cambios: Dict[str, Any]) -> Producto:
+        """Aplica cambios a un producto; lanza ProductoNoEncontradoError o ProductoDuplicadoError"""
+
+    @abstractmethod
+    def eliminar(self, producto_id: UUID) -> Producto:
+        """Elimina un producto y lo retorna; lanza ProductoNoEncontradoError si no existe"""
+
+    def agregar_lote(self, productos: List[Producto]) -> List[Producto]:
+        """Agrega varios productos; los backends con I/O lo hacen en un solo viaje"""
+        return [self.agregar(producto) for producto in productos]
+
+    def actualizar_lote(self, cambios: List[Tuple[UUID, Dict[str, Any]]]) -> List[Producto]:
+        """Aplica cambios a varios productos; los backends con I/O lo hacen en un solo viaje"""
+        return [self.actualizar(producto_id, datos) for producto_id, datos in cambios]
+
+    def eliminar_lote(self, producto_ids: List[UUID]) -> List[Producto]:
+        """Elimina varios productos; los backends con I/O lo hacen en un solo viaje"""
+        return [self.eliminar(producto_id) for producto_id in producto_ids]
+
+    def marca_durabilidad(self) -> int:
+        """Marca de la última escritura de este hilo, para esperarla después desde otro"""
+        return 0
+
+    def esperar_durabilidad(self, marca: Optional[int] = None):
+        """Bloquea hasta que la escritura de la marca, o sin ella la última de este hilo, esté en disco; solo backends con log"""
+
+    def ultimo_cambio(self) -> int:
+        """Secuencia del último cambio registrado por cualquier proceso; solo backends compartidos"""
+        return 0
+
+    def cambios_desde(self, secuencia: int, limite: int) -> List[Tuple[int, str, Optional[UUID], int]]:
+        """(secuencia, operación, id, pid de origen) posteriores a `secuencia`; solo backends compartidos"""
+        return []
+
+    @abstractmethod
+    def filtrar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> List[Producto]:
+        """Retorna los productos que cumplen los filtros en orden de inserción"""
+
+    def explicar(self, **filtros) -> Dict[str, Any]:
+        """Ejecuta el filtro y describe cómo lo resolvió el backend"""
+        return {"backend": type(self).__name__, "filas_retornadas": len(self.filtrar(**filtros))}
+
+    @abstractmethod
+    def paginar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        ordenar_por: Optional[str] = None,
+        descendente: bool = False,
+        despues_de: Optional[Tuple[Any, int]] = None,
+        limite: Optional[int] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> Tuple[List[Producto], Optional[Tuple[Any, int]]]:
+        """Retorna una página ordenada y el cursor (valor, seq) de su último elemento si quedan más"""
+
+
+class ProductStore(StorageBackend):
+    """Almacén de productos en memoria con índices por id, nombre, categoría y disponibilidad"""
+
+    def __init__(self):
+        self._por_id: Dict[UUID, Producto] = {}
+        self._por_nombre: Dict[str, UUID] = {}
+        # Los índices secundarios usan dicts como conjuntos ordenados para
+        # conservar el orden de inserción en los resultados
+        self._por_categoria: Dict[str, Dict[UUID, None]] = {}
+        self._por_disponible: Dict[bool, Dict[UUID, None]] = {True: {}, False: {}}
+        # Índices ordenados para paginación por cursor y filtros de rango; None es el orden de inserción
+        self._seq: Dict[UUID, int] = {}
+        self._siguiente_seq = 0
+        self._ordenados: Dict[Optional[str], IndiceOrdenado] = {
+            campo: IndiceOrdenado() for campo in (None,) + tuple(dict.fromkeys(CAMPOS_ORDEN + CAMPOS_RANGO))
+        }
+
+    def __len__(self) -> int:
+        return len(self._por_id)
+
+    def __iter__(self) -> Iterator[Producto]:
+        return iter(list(self._por_id.values()))
+
+    def __contains__(self, producto_id: UUID) -> bool:
+        return producto_id in self._por_id
+
+    def clear(self):
+        """Elimina todos los productos y vacía los índices"""
+        self._por_id.clear()
+        self._por_nombre.clear()
+        self._por_categoria.clear()
+        self._por_disponible = {True: {}, False: {}}
+        self._seq.clear()
+        for indice in self._ordenados.values():
+            indice.limpiar()
+
+    def cargar(self, productos: Iterable[Producto]):
+        """Reemplaza el contenido con productos ya validados, ordenando cada índice una sola vez"""
+        self.clear()
+        for producto in productos:
+            self._por_id[producto.id] = producto
+            self._seq[producto.id] = self._siguiente_seq
+            self._siguiente_seq += 1
+            self._por_nombre[producto.nombre_clave] = producto.id
+            self._por_categoria.setdefault(producto.categoria_clave, {})[producto.id] = None
+            self._por_disponible[producto.disponible][producto.id] = None
+        seqs = self._seq
+        for campo, indice in self._ordenados.items():
+            valor = _VALOR_ORDEN[campo]
+            indice.cargar([(valor(p, seqs[p.id]), seqs[p.id], p.id) for p in self._por_id.values()])
+
+    def obtener(self, producto_id: UUID) -> Optional[Producto]:
+        """Retorna el producto con ese ID o None si no existe"""
+        return self._por_id.get(producto_id)
+
+    def obtener_por_nombre(self, nombre: str) -> Optional[Producto]:
+        """Retorna el producto con ese nombre (sin distinguir mayúsculas) o None"""
+        producto_id = self._por_nombre.get(normalizar(nombre))
+        return self._por_id.get(producto_id) if producto_id is not None else None
+
+    def existe_nombre(self, nombre: str, exclude_id: Optional[UUID] = None) -> bool:
+        """Verifica si el nombre ya está en uso por otro producto"""
+        producto_id = self._por_nombre.get(normalizar(nombre))
+        return producto_id is not None and producto_id != exclude_id
+
+    def agregar(self, producto: Producto) -> Producto:
+        """Agrega un producto nuevo al almacén"""
+        if self.existe_nombre(producto.nombre):
+            raise ProductoDuplicadoError("Ya existe un producto con ese nombre")
+        self._por_id[producto.id] = producto
+        self._seq[producto.id] = self._siguiente_seq
+        self._siguiente_seq += 1
+        self._indexar(producto)
+        return producto
+
+    def actualizar(self, producto_id: UUID, cambios: Dict[str, Any]) -> Producto:
+        """Aplica los cambios a un producto y mantiene los índices al día"""
+        producto = self._por_id.get(producto_id)
+        if producto is None:
+            raise ProductoNoEncontradoError(f"Producto con ID {producto_id} no encontrado")
+
+        nombre = cambios.get("nombre")
+        if nombre is not None and self.existe_nombre(nombre, exclude_id=producto_id):
+            raise ProductoDuplicadoError("Ya existe un producto con ese nombre")
+
+        self._desindexar(producto)
+        for campo, valor in cambios.items():
+            setattr(producto, campo, valor)
+        self._indexar(producto)
+        return producto
+
+    def eliminar(self, producto_id: UUID) -> Producto:
+        """Elimina un producto del almacén y lo retorna"""
+        producto = self._por_id.pop(producto_id, None)
+        if producto is None:
+            raise ProductoNoEncontradoError(f"Producto con ID {producto_id} no encontrado")
+        self._desindexar(producto)
+        del self._seq[producto_id]
+        return producto
+
+    def filtrar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> List[Producto]:
+        """Filtra productos con el plan que parte del índice de menor cardinalidad"""
+        predicados = predicados_de_filtros(disponible, categoria, precio_max, precio_min, min_rating, stock_min)
+        return self._filtrar_con_plan(predicados)[0]
+
+    def explicar(self, **filtros) -> Dict[str, Any]:
+        """Ejecuta el filtro y describe el plan elegido y las filas que recorrió"""
+        resultados, plan = self._filtrar_con_plan(predicados_de_filtros(**filtros))
+        return {"backend": "memoria", **plan.explicar(), "filas_retornadas": len(resultados)}
+
+    def paginar(
+        self,
+        disponible: Optional[bool] = None,
+        categoria: Optional[str] = None,
+        precio_max: Optional[float] = None,
+        ordenar_por: Optional[str] = None,
+        descendente: bool = False,
+        despues_de: Optional[Tuple[Any, int]] = None,
+        limite: Optional[int] = None,
+        precio_min: Optional[float] = None,
+        min_rating: Optional[float] = None,
+        stock_min: Optional[int] = None
+    ) -> Tuple[List[Producto], Optional[Tuple[Any, int]]]:
+        """Recorre el índice del orden pedido o, si el plan deja pocos candidatos, ordena solo esos"""
+        predicados = predicados_de_filtros(disponible, categoria, precio_max, precio_min, min_rating, stock_min)
+        minimo, maximo = _limites(p for p in predicados if p.campo == ordenar_por)
+        indice = self._ordenados[ordenar_por]
+        recorrido = indice.contar(minimo, maximo)
+        plan = planificar(predicados, self._fuentes(predicados))
+        tamano = plan.fuente.cardinalidad
+        # Recorrer el índice hasta llenar la página visita unas limite * recorrido / tamano claves
+        if tamano * tamano < (limite or recorrido) * recorrido:
+            return self._paginar_candidatos(plan, ordenar_por, descendente, despues_de, limite)
+
+        # El rango sobre el campo del orden lo resuelve el propio recorrido
+        cumple = compilar(p for p in predicados if p.campo != ordenar_por)
+        pagina = []
+        for valor, seq, producto_id in indice.recorrer(despues_de, descendente, minimo, maximo):
+            producto = self._por_id.get(producto_id)
+            if producto is None or not cumple(producto):
+                continue
+            if limite is not None and len(pagina) == limite:
+                return pagina, ultima
+            pagina.append(producto)
+            ultima = (valor, seq)
+        return pagina, None
+
+    def _paginar_candidatos(
+        self,
+        plan: PlanConsulta,
+        ordenar_por: Optional[str],
+        descendente: bool,
+        despues_de: Optional[Tuple[Any, int]],
+        limite: Optional[int]
+    ) -> Tuple[List[Producto], Optional[Tuple[Any, int]]]:
+        """Top-K con un heap sobre los candidatos del plan: no ordena más que la página pedida"""
+        claves = (self._clave_orden(ordenar_por, producto) for producto in plan.ejecutar(self._por_id.get))
+        if despues_de is not None:
+            despues_de = tuple(despues_de)
+            claves = (clave for clave in claves if (clave[:2] < despues_de if descendente else clave[:2] > despues_de))
+
+        if limite is None:
+            claves = sorted(claves, reverse=descendente)
+        else:
+            claves = (heapq.nlargest if descendente else heapq.nsmallest)(limite + 1, claves)
+        siguiente = None
+        if limite is not None and len(claves) > limite:
+            claves = claves[:limite]
+            siguiente = claves[-1][:2]
+        return [self._por_id[clave[2]] for clave in claves], siguiente
+
+    def _filtrar_con_plan(self, predicados: List[Predicado]) -> Tuple[List[Producto], PlanConsulta]:
+        plan = planificar(predicados, self._fuentes(predicados))
+        resultados = list(plan.ejecutar(self._por_id.get))
+        if plan.fuente.por_valor:
+            # Un índice ordenado entrega los ids por valor; se restituye el orden de inserción
+            resultados.sort(key=lambda producto: self._seq[producto.id])
+        return resultados, plan
+
+    def _fuentes(self, predicados: List[Predicado]) -> List[Fuente]:
+        """Caminos de acceso útiles para los predicados, con su cardinalidad exacta"""
+        fuentes = [Fuente("catalogo", len(self._por_id), lambda: self._por_id)]
+        por_campo: Dict[str, List[Predicado]] = {}
+        for predicado in predicados:
+            if predicado.campo == "categoria_clave":
+                ids = self._por_categoria.get(predicado.valor, {})
+                fuentes.append(Fuente("categoria", len(ids), lambda ids=ids: ids, (predicado,)))
+            elif predicado.campo == "disponible":
+                ids = self._por_disponible[predicado.valor]
+                fuentes.append(Fuente("disponible", len(ids), lambda ids=ids: ids, (predicado,)))
+            else:
+                por_campo.setdefault(predicado.campo, []).append(predicado)
+        for campo, del_campo in por_campo.items():
+            indice = self._ordenados[campo]
+            minimo, maximo = _limites(del_campo)
+            fuentes.append(Fuente(
+                campo,
+                indice.contar(minimo, maximo),
+                lambda indice=indice, minimo=minimo, maximo=maximo: indice.ids(minimo, maximo),
+                tuple(del_campo),
+                por_valor=True
+            ))
+        return fuentes
+
+    def _clave_orden(self, campo: Optional[str], producto: Producto):
+        seq = self._seq[producto.id]
+        return (_VALOR_ORDEN[campo](producto, seq), seq, producto.id)
+
+    def _indexar(self, producto: Producto):
+        self._por_nombre[producto.nombre_clave] = producto.id
+        self._por_categoria.setdefault(producto.categoria_clave, {})[producto.id] = None
+        self._por_disponible[producto.disponible][producto.id] = None
+        for campo, indice in self._ordenados.items():
+            indice.agregar(self._clave_orden(campo, producto))
+
+    def _desindexar(self, producto: Producto):
+        self._por_nombre.pop(producto.nombre_clave, None)
+        categoria = producto.categoria_clave
+        ids_categoria = self._por_categoria.get(categoria)
+        if ids_categoria is not None:
+            ids_categoria.pop(producto.id, None)
+            if not ids_categoria:
+                del self._por_categoria[categoria]
+        self._por_disponible[producto.disponible].pop(producto.id, None)
+        for campo, indice in self._ordenados.items():
+            indice.quitar(self._clave_orden(campo, producto))
+
+
+def _timestamp(fecha) -> float:
+    return fecha.timestamp() if fecha is not None else 0.0
+
+
+_VALOR_ORDEN: Dict[Optional[str], Callable[[Producto, int], Any]] = {
+    None: lambda producto, seq: seq,
+    "precio": lambda producto, seq: producto.precio,
+    "rating": lambda producto, seq: producto.rating,
+    "fecha_creacion": lambda producto, seq: _timestamp(producto.fecha_creacion),
+    "stock": lambda producto, seq: producto.stock,
+}
+
+
+def _limites(predicados: Iterable[Predicado]) -> Tuple[Any, Any]:
+    """(mínimo, máximo) inclusivos que imponen los predicados de rango de un campo"""
+    minimo = maximo = None
+    for predicado in predicados:
+        if predicado.operador in (">=", "==") and (minimo is None or predicado.valor > minimo):
+            minimo = predicado.valor
+        if predicado.operador in ("<=", "==") and (maximo is None or predicado.valor < maximo):
+            maximo = predicado.valor
+    return minimo, maximo
+
+
+productos_db = ProductStore()
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from fastapi import status
+from admission import ControlAdmision, LimitadorTasa, limites
+
+def test_cubeta_por_cliente_y_costo_de_ruta():
+    """Test para que las rutas caras consuman el presupuesto más rápido y se recargue con el tiempo"""
+    limitador = LimitadorTasa(
+        tasa_cliente=10, rafaga_cliente=10, tasa_ruta=100, rafaga_ruta=100,
+        costos={"/productos/buscar": 5}
+    )
+    t = time.monotonic()
+    assert limitador.admitir("a", "/productos/buscar", ahora=t) == 0
+    assert limitador.admitir("a", "/productos/buscar", ahora=t) == 0
+    assert limitador.admitir("a", "/productos/buscar", ahora=t) == 0.5
+    # Otro cliente tiene su propio presupuesto
+    assert limitador.admitir("b", "/productos/1", ahora=t) == 0
+    assert limitador.admitir("a", "/productos/buscar", ahora=t + 0.5) == 0
+    assert limitador.estadisticas()["rechazadas_cliente"] == 1
+
+def test_cubeta_compartida_por_ruta():
+    """Test para que una ruta cara no agote su presupuesto global con muchos clientes"""
+    limitador = LimitadorTasa(
+        tasa_cliente=100, rafaga_cliente=100, tasa_ruta=1, rafaga_ruta=10,
+        costos={"/productos/buscar": 5}, max_clientes=2
+    )
+    t = time.monotonic()
+    resultados = [limitador.admitir(f"cliente {i}", "/productos/buscar", ahora=t) for i in range(3)]
+    assert resultados == [0, 0, 5.0]
+    assert limitador.admitir("cliente 9", "/productos/1", ahora=t) == 0
+    assert limitador.estadisticas()["clientes"] == 2
+
+def test_control_admision_cola_acotada():
+    """Test para encolar hasta el límite, rechazar el resto y traspasar el lugar en orden"""
+    async def escenario():
+        control = ControlAdmision(max_concurrentes=1, max_cola=1, espera_maxima=0.05)
+        assert await control.entrar()
+        en_espera = asyncio.ensure_future(control.entrar())
+        await asyncio.sleep(0)
+        assert not await control.entrar()
+        control.salir()
+        assert await en_espera
+        assert not await control.entrar()
+        control.salir()
+        return control.estadisticas()
+
+    estadisticas = asyncio.run(escenario())
+    assert estadisticas["en_curso"] == 0
+    assert estadisticas["rechazadas_cola_llena"] == 1
+    assert estadisticas["rechazadas_espera"] == 1
+
+def test_api_responde_429_con_retry_after(cliente, monkeypatch):
+    """Test para rechazar con 429 y Retry-After cuando el cliente agota su presupuesto"""
+    monkeypatch.setattr(limites, "habilitados", True)
+    monkeypatch.setattr(limites, "tasa", LimitadorTasa(
+        tasa_cliente=0.5, rafaga_cliente=6, costos={"/productos/buscar": 5}
+    ))
+
+    assert cliente.get("/productos/buscar", params={"q": "laptop"}).status_code == status.HTTP_200_OK
+    response = cliente.get("/productos/buscar", params={"q": "laptop"})
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["Retry-After"] == "8"
+    # Las búsquedas no agotan lo que queda para las lecturas baratas
+    assert cliente.get("/productos/00000000-0000-0000-0000-000000000000").status_code == status.HTTP_404_NOT_FOUND
+    assert cliente.get("/limites/estadisticas").json()["tasa"]["rechazadas_cliente"] == 1
+
+def test_respuesta_en_streaming_ocupa_su_lugar_hasta_terminar(cliente, monkeypatch):
+    """Test para devolver el lugar de admisión cuando termina el cuerpo de una exportación, no al enviar los headers"""
+    from main import app
+    monkeypatch.setattr(limites, "habilitados", True)
+    monkeypatch.setattr(limites, "admision", ControlAdmision(max_concurrentes=1, max_cola=0))
+    cliente.post("/productos", json={"nombre": "Laptop", "precio": 10.0, "categoria": "Tecnología"})
+    en_curso = {}
+
+    async def escenario():
+        alcance = {
+            "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": "/productos/exportar", "raw_path": b"/productos/exportar", "root_path": "",
+            "query_string": b"formato=ndjson", "headers": [], "client": ("test", 1), "server": ("test", 80)
+        }
+
+        pedidos = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def recibir():
+            if pedidos:
+                return pedidos.pop()
+            # El cliente sigue conectado hasta que la respuesta termina
+            await asyncio.Event().wait()
+
+        async def enviar(mensaje):
+            if mensaje["type"] in ("http.response.start", "http.response.body"):
+                en_curso.setdefault(mensaje["type"], limites.admision.en_curso)
+
+        await app(alcance, recibir, enviar)
+
+    cliente.portal.call(escenario)
+    assert en_curso == {"http.response.start": 1, "http.response.body": 1}
+    assert limites.admision.en_curso == 0
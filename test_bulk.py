@@ -0,0 +1,50 @@
+from fastapi import status
+
+def producto(nombre, **extra):
+    """Payload mínimo de un producto"""
+    return {"nombre": nombre, "precio": 10.0, "categoria": "Tecnología", **extra}
+
+def test_crear_lote_parcial(cliente):
+    """Test para crear un lote reportando errores por elemento"""
+    cliente.post("/productos", json=producto("Existente"))
+
+    response = cliente.post("/productos/bulk?atomico=false", json=[
+        producto("Mouse"),
+        producto("mouse"),
+        producto("Existente"),
+        producto("Teclado", precio=-1),
+        producto("Monitor")
+    ])
+
+    assert response.status_code == status.HTTP_200_OK
+    cuerpo = response.json()
+    assert [r["estado"] for r in cuerpo["resultados"]] == ["creado", "error", "error", "error", "creado"]
+    assert cuerpo["exitosos"] == 2
+    assert len(cliente.get("/productos").json()) == 3
+
+def test_crear_lote_atomico_no_aplica_nada(cliente):
+    """Test para rechazar el lote completo si un elemento falla"""
+    response = cliente.post("/productos/bulk", json=[producto("Mouse"), producto("MOUSE")])
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    cuerpo = response.json()
+    assert cuerpo["aplicado"] is False
+    assert [r["estado"] for r in cuerpo["resultados"]] == ["omitido", "error"]
+    assert [r["id"] for r in cuerpo["resultados"]] == [None, None]
+    assert cliente.get("/productos").json() == []
+
+def test_actualizar_y_eliminar_lote(cliente):
+    """Test para actualizar y eliminar varios productos en una sola solicitud"""
+    creados = cliente.post("/productos/bulk", json=[producto("Mouse"), producto("Teclado")]).json()
+    ids = [r["id"] for r in creados["resultados"]]
+
+    response = cliente.patch("/productos/bulk", json=[
+        {"id": ids[0], "precio": 5.5},
+        {"id": ids[1], "stock": 3}
+    ])
+    assert response.status_code == status.HTTP_200_OK
+    assert cliente.get(f"/productos/{ids[0]}").json()["precio"] == 5.5
+
+    response = cliente.request("DELETE", "/productos/bulk?atomico=false", json=[ids[0], ids[0]])
+    assert [r["estado"] for r in response.json()["resultados"]] == ["eliminado", "error"]
+    assert len(cliente.get("/productos").json()) == 1
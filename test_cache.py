@@ -0,0 +1,67 @@
+import time
+from fastapi import status
+from cache import CacheRespuestas, SOBRECOSTO_ENTRADA
+
+def test_lru_respeta_presupuesto():
+    """Test para expulsar la entrada menos usada al superar el presupuesto"""
+    cache = CacheRespuestas(max_bytes=2 * (10 + SOBRECOSTO_ENTRADA), ttl=60)
+    cache.guardar("a", 0, b"x" * 10)
+    cache.guardar("b", 0, b"y" * 10)
+    assert cache.obtener("a") is not None
+    cache.guardar("c", 0, b"z" * 10)
+
+    assert cache.obtener("b") is None
+    assert cache.obtener("a") is not None
+    assert cache.expulsiones == 1
+
+def test_invalidacion_por_generacion():
+    """Test para no guardar resultados calculados antes de una escritura"""
+    cache = CacheRespuestas(ttl=60)
+    generacion = cache.generacion
+    cache.invalidar("actualizar", None)
+    cache.guardar("a", generacion, b"viejo")
+    assert cache.obtener("a") is None
+
+def test_expiracion_por_ttl():
+    """Test para descartar entradas vencidas"""
+    cache = CacheRespuestas(ttl=0.01)
+    cache.guardar("a", 0, b"x")
+    time.sleep(0.02)
+    assert cache.obtener("a") is None
+
+def test_cache_de_listado_se_invalida(cliente, producto_ejemplo):
+    """Test para servir el listado desde caché hasta la siguiente escritura"""
+    crear_response = cliente.post("/productos", json=producto_ejemplo.model_dump())
+    producto_id = crear_response.json()["id"]
+
+    antes = cliente.get("/cache/estadisticas").json()["aciertos"]
+    cliente.get("/productos?categoria=Tecnología")
+    cliente.get("/productos?categoria=Tecnología")
+    assert cliente.get("/cache/estadisticas").json()["aciertos"] == antes + 1
+
+    cliente.put(f"/productos/{producto_id}", json={"precio": 10.0})
+    response = cliente.get("/productos?categoria=Tecnología")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["precio"] == 10.0
+
+def test_escritura_concurrente_no_deja_etag_viejo_en_cache(cliente, producto_ejemplo, producto_ejemplo_2, monkeypatch):
+    """Test para no responder 304 con un cuerpo guardado tras una escritura que se coló al calcular los validadores"""
+    from uuid import uuid4
+    from cache import cache_respuestas
+    from products import Producto
+    from repository import repositorio
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    etag = cliente.get("/productos").headers["ETag"]
+
+    obtener = cache_respuestas.obtener
+    def obtener_con_escritura(clave):
+        # Otro hilo escribe justo después de que la solicitud calculó sus validadores
+        monkeypatch.setattr(cache_respuestas, "obtener", obtener)
+        repositorio._crear(Producto(**{**producto_ejemplo_2.model_dump(), "id": uuid4()}))
+        return obtener(clave)
+    monkeypatch.setattr(cache_respuestas, "obtener", obtener_con_escritura)
+    assert len(cliente.get("/productos").json()) == 2
+
+    response = cliente.get("/productos", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
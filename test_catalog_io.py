@@ -0,0 +1,53 @@
+import json
+from fastapi import status
+
+CSV_CATALOGO = (
+    "nombre,descripcion,precio,stock,categoria,disponible,rating\n"
+    'Laptop Gaming,"Laptop para juegos, con RTX 4060",1500.99,10,Tecnología,true,4.5\n'
+    "Mouse,,-5,3,Tecnología,true,4\n"
+    'Silla,"Silla ergonómica\nde oficina",200,5,Muebles,false,\n'
+    "laptop gaming,,10,1,Tecnología,true,3\n"
+)
+
+def test_importar_csv_reporta_errores_por_fila(cliente):
+    """Test para importar un CSV con registros válidos e inválidos"""
+    response = cliente.post(
+        "/productos/importar?formato=csv&tamano_lote=2",
+        content=CSV_CATALOGO.encode("utf-8")
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    cuerpo = response.json()
+    assert cuerpo["filas"] == 4
+    assert cuerpo["importados"] == 2
+    assert [e["fila"] for e in cuerpo["errores"]] == [2, 4]
+
+    silla = cliente.get("/productos/buscar?q=ergonomica").json()[0]
+    assert silla["descripcion"] == "Silla ergonómica\nde oficina"
+    assert silla["disponible"] is False
+
+def test_importar_ndjson(cliente):
+    """Test para importar NDJSON en streaming"""
+    lineas = [
+        json.dumps({"nombre": "Mouse", "precio": 10, "categoria": "Tecnología"}),
+        "no es json",
+        json.dumps({"nombre": "Teclado", "precio": 20, "categoria": "Tecnología"})
+    ]
+    response = cliente.post("/productos/importar?formato=ndjson", content="\n".join(lineas))
+
+    cuerpo = response.json()
+    assert cuerpo["importados"] == 2
+    assert cuerpo["errores"][0]["fila"] == 2
+
+def test_exportar_csv_y_reimportar(cliente):
+    """Test para exportar el catálogo en CSV y volver a leerlo"""
+    cliente.post("/productos/importar?formato=csv", content=CSV_CATALOGO.encode("utf-8"))
+
+    response = cliente.get("/productos/exportar?formato=csv")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    exportado = response.text
+
+    cliente.request("DELETE", "/productos/bulk", json=[p["id"] for p in cliente.get("/productos").json()])
+    response = cliente.post("/productos/importar?formato=csv", content=exportado.encode("utf-8"))
+    assert response.json()["importados"] == 2
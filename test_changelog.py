@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from fastapi import status
+from changelog import RegistroCambios, eventos_sse
+from exceptions import ResincronizacionRequeridaError
+from products import Producto
+
+def test_cambios_desde_secuencia(cliente, producto_ejemplo):
+    """Test para obtener solo los cambios posteriores a una secuencia"""
+    inicio = cliente.get("/productos/cambios", params={"desde": 0}).json()["ultima_secuencia"]
+    producto_id = cliente.post("/productos", json=producto_ejemplo.model_dump()).json()["id"]
+    cliente.put(f"/productos/{producto_id}", json={"stock": 1})
+    cliente.delete(f"/productos/{producto_id}")
+
+    pagina = cliente.get("/productos/cambios", params={"desde": inicio, "limit": 2}).json()
+    assert [c["operacion"] for c in pagina["cambios"]] == ["crear", "actualizar"]
+    assert pagina["cambios"][1]["producto"]["stock"] == 1
+    assert pagina["hay_mas"] is True
+
+    pagina = cliente.get("/productos/cambios", params={"desde": pagina["cambios"][-1]["secuencia"]}).json()
+    assert [(c["operacion"], c["id"], c["producto"]) for c in pagina["cambios"]] == [("eliminar", producto_id, None)]
+    assert pagina["hay_mas"] is False
+
+def test_registro_truncado_pide_resincronizar(cliente):
+    """Test para responder 410 cuando los cambios pedidos ya se descartaron"""
+    registro = RegistroCambios(max_entradas=2)
+    for _ in range(3):
+        registro.registrar("limpiar", None)
+    with pytest.raises(ResincronizacionRequeridaError):
+        registro.desde(0, 10)
+    assert [c["secuencia"] for c in registro.desde(1, 10)[0]] == [2, 3]
+
+    ultima = cliente.get("/productos/cambios").json()["ultima_secuencia"]
+    response = cliente.get("/productos/cambios", params={"desde": ultima + 1})
+    assert response.status_code == status.HTTP_410_GONE
+    assert response.headers["X-Resync-Required"] == "true"
+
+def test_eventos_sse_en_vivo():
+    """Test para transmitir los cambios pendientes y luego los nuevos"""
+    registro = RegistroCambios()
+    producto = Producto(nombre="Mesa", precio=10.0, categoria="Hogar")
+    registro.registrar("crear", producto)
+
+    async def escenario():
+        async def desconectado():
+            return False
+
+        eventos = eventos_sse(registro, 0, desconectado, latido=0.01)
+        recibidos = [await eventos.__anext__()]
+        asyncio.get_running_loop().call_later(0.05, registro.registrar, "actualizar", producto)
+        while len(recibidos) < 2 or recibidos[-1].startswith(":"):
+            recibidos.append(await eventos.__anext__())
+        await eventos.aclose()
+        return recibidos
+
+    recibidos = asyncio.run(escenario())
+    assert recibidos[0].startswith("id: 1\nevent: crear\ndata: {")
+    assert recibidos[-1].startswith("id: 2\nevent: actualizar\n")
+    assert all(evento == ": latido\n\n" for evento in recibidos[1:-1])
@@ -0,0 +1,62 @@
+from fastapi import status
+from facets import ContadorFacetas, resumir_facetas
+from repository import repositorio
+
+def test_facetas_sin_filtros(cliente, producto_ejemplo, producto_ejemplo_2):
+    """Test para obtener las facetas del catálogo completo desde los contadores"""
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    cliente.post("/productos", json=producto_ejemplo_2.model_dump())
+
+    response = cliente.get("/productos/facetas")
+    assert response.status_code == status.HTTP_200_OK
+    facetas = response.json()
+    assert facetas["total"] == 2
+    assert facetas["categorias"] == {
+        "Electrónicos": {"conteo": 1, "rating_promedio": 4.3},
+        "Tecnología": {"conteo": 1, "rating_promedio": 4.5}
+    }
+    assert [r["conteo"] for r in facetas["rangos_precio"] if r["conteo"]] == [1, 1]
+    assert facetas["rangos_precio"][-1]["hasta"] is None
+    assert facetas["valor_stock_total"] == round(1500.99 * 10 + 899.99 * 25, 2)
+
+def test_facetas_siguen_las_escrituras(cliente, producto_ejemplo, producto_ejemplo_2):
+    """Test para mantener los contadores al actualizar y eliminar"""
+    id_1 = cliente.post("/productos", json=producto_ejemplo.model_dump()).json()["id"]
+    id_2 = cliente.post("/productos", json=producto_ejemplo_2.model_dump()).json()["id"]
+    cliente.put(f"/productos/{id_1}", json={"categoria": "Electrónicos", "stock": 1, "rating": 3.5})
+    cliente.delete(f"/productos/{id_2}")
+
+    facetas = cliente.get("/productos/facetas").json()
+    assert facetas == resumir_facetas(repositorio.store)
+    assert facetas["categorias"] == {"Electrónicos": {"conteo": 1, "rating_promedio": 3.5}}
+    assert facetas["valor_stock_total"] == 1500.99
+
+def test_facetas_filtradas(cliente, producto_ejemplo, producto_ejemplo_2):
+    """Test para calcular las facetas sobre los productos filtrados"""
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    cliente.post("/productos", json=producto_ejemplo_2.model_dump())
+
+    facetas = cliente.get("/productos/facetas", params={"precio_max": 1000}).json()
+    assert facetas["total"] == 1
+    assert list(facetas["categorias"]) == ["Electrónicos"]
+
+    response = cliente.get("/productos/facetas", params={"precio_max": 0})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_facetas_agrupan_categorias_normalizadas(cliente, producto_ejemplo, producto_ejemplo_2):
+    """Test para contar en una sola faceta las categorías que ?categoria= trata como iguales"""
+    cliente.post("/productos", json={**producto_ejemplo.model_dump(), "categoria": "Electrónicos"})
+    cliente.post("/productos", json=producto_ejemplo_2.model_dump())
+    cliente.post("/productos", json={"nombre": "Cable", "precio": 5, "categoria": "electronicos"})
+
+    facetas = cliente.get("/productos/facetas").json()
+    assert facetas["categorias"] == {"Electrónicos": {"conteo": 3, "rating_promedio": 2.93}}
+    assert facetas == resumir_facetas(repositorio.store)
+
+def test_contador_limpiar(producto_ejemplo):
+    """Test para reiniciar los contadores con la notificación de limpiar"""
+    contador = ContadorFacetas()
+    contador.reconstruir([producto_ejemplo])
+    assert contador.resumen()["total"] == 1
+    contador.aplicar("limpiar", None)
+    assert contador.resumen() == resumir_facetas([])
@@ -0,0 +1,27 @@
+from metrics import Metricas
+
+def test_histograma_acumula_buckets():
+    """Test para exportar buckets acumulados, suma y conteo"""
+    metricas = Metricas(buckets=(0.01, 0.1))
+    metricas.inicio_solicitud("GET")
+    metricas.fin_solicitud("GET", "/productos", 200, 5_000_000)
+    metricas.inicio_solicitud("GET")
+    metricas.fin_solicitud("GET", "/productos", 200, 50_000_000)
+
+    texto = metricas.exportar()
+    assert 'http_requests_total{method="GET",route="/productos",status="200"} 2' in texto
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/productos",le="0.01"} 1' in texto
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/productos",le="0.1"} 2' in texto
+    assert 'http_request_duration_seconds_count{method="GET",route="/productos"} 2' in texto
+    assert 'http_requests_in_flight{method="GET"} 0' in texto
+
+def test_endpoint_metrics_usa_plantilla_de_ruta(cliente, producto_ejemplo):
+    """Test para etiquetar por plantilla de ruta y no por la URL concreta"""
+    producto_id = cliente.post("/productos", json=producto_ejemplo.model_dump()).json()["id"]
+    cliente.get(f"/productos/{producto_id}")
+
+    response = cliente.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/productos/{producto_id}",status="200"' in response.text
+    assert producto_id not in response.text
+    assert 'store_operation_duration_seconds_count{operation="crear"}' in response.text
@@ -0,0 +1,91 @@
+import os
+import threading
+from uuid import uuid4
+from products import Producto
+from persistence import AlmacenDurable, segmentos
+from repository import ProductRepository
+
+def nuevo_producto(i, **datos):
+    return Producto(id=uuid4(), nombre=f"Producto {i}", precio=10.0 + i, categoria="Tecnología", **datos)
+
+def test_reinicio_recupera_snapshot_y_log(tmp_path):
+    """Test para recuperar el catálogo desde el snapshot más el log escrito después"""
+    almacen = AlmacenDurable(str(tmp_path))
+    productos = almacen.agregar_lote([nuevo_producto(i) for i in range(5)])
+    almacen.guardar_snapshot()
+    almacen.actualizar(productos[0].id, {"precio": 99.0, "nombre": "Renombrado"})
+    almacen.eliminar(productos[1].id)
+    almacen.agregar(nuevo_producto(9, rating=4.5))
+    almacen._wal.cerrar()
+
+    recuperado = AlmacenDurable(str(tmp_path))
+    assert recuperado.arranque == {"productos": 5, "registros_reproducidos": 3, "segundos": recuperado.arranque["segundos"]}
+    assert [p.nombre for p in recuperado] == ["Renombrado", "Producto 2", "Producto 3", "Producto 4", "Producto 9"]
+    assert recuperado.obtener_por_nombre("renombrado").precio == 99.0
+    assert [p.nombre for p in recuperado.filtrar(min_rating=4)] == ["Producto 9"]
+    assert recuperado.existe_nombre("Producto 2")
+
+def test_snapshot_no_sincroniza_con_el_lock_de_escrituras(tmp_path, monkeypatch):
+    """Test para que el volcado y los fsync al rotar el log no frenen las escrituras mientras se toma el snapshot"""
+    import persistence
+    almacen = AlmacenDurable(str(tmp_path), esperar_fsync=False)
+    almacen.agregar_lote([nuevo_producto(i) for i in range(5)])
+    escrituras_libres = []
+    fsync = os.fsync
+
+    def escribir():
+        libre = almacen._lock.acquire(timeout=0.5)
+        if libre:
+            almacen._lock.release()
+        escrituras_libres.append(libre)
+
+    def fsync_vigilado(fd):
+        # Otro hilo, como una solicitud, tiene que poder escribir durante cada fsync
+        hilo = threading.Thread(target=escribir)
+        hilo.start()
+        hilo.join()
+        fsync(fd)
+    monkeypatch.setattr(persistence.os, "fsync", fsync_vigilado)
+
+    almacen.guardar_snapshot()
+    assert escrituras_libres and all(escrituras_libres)
+    monkeypatch.undo()
+    almacen.agregar(nuevo_producto(9))
+    almacen.cerrar()
+    assert len(AlmacenDurable(str(tmp_path))) == 6
+
+def test_registro_incompleto_se_descarta(tmp_path):
+    """Test para truncar el último registro si una caída lo dejó a medio escribir"""
+    almacen = AlmacenDurable(str(tmp_path))
+    almacen.agregar(nuevo_producto(1))
+    almacen.agregar(nuevo_producto(2))
+    almacen._wal.cerrar()
+    ruta = os.path.join(str(tmp_path), f"wal.{segmentos(str(tmp_path))[-1]:08d}")
+    os.truncate(ruta, os.path.getsize(ruta) - 3)
+
+    recuperado = AlmacenDurable(str(tmp_path))
+    assert [p.nombre for p in recuperado] == ["Producto 1"]
+    recuperado.agregar(nuevo_producto(3))
+    recuperado.cerrar()
+    assert [p.nombre for p in AlmacenDurable(str(tmp_path))] == ["Producto 1", "Producto 3"]
+
+def test_escrituras_concurrentes_comparten_fsync(tmp_path):
+    """Test para agrupar en un mismo fsync las escrituras de varios hilos"""
+    almacen = AlmacenDurable(str(tmp_path))
+    repositorio = ProductRepository(almacen)
+
+    def escribir(desde):
+        for i in range(desde, desde + 50):
+            repositorio._mutar(almacen.agregar, nuevo_producto(i))
+
+    hilos = [threading.Thread(target=escribir, args=(i * 100,)) for i in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    estadisticas = almacen.estadisticas()["wal"]
+    assert estadisticas["registros"] == 200
+    assert estadisticas["lotes_fsync"] <= 200
+    repositorio.cerrar()
+    assert len(AlmacenDurable(str(tmp_path))) == 200
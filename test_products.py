@@ -1,11 +1,12 @@
+import json
 import pytest
 from uuid import UUID, uuid4
 from fastapi import status
-from models import Producto
+from products import Producto
 
 def test_crear_producto(cliente, producto_ejemplo):
     """Test para crear un producto"""
-    response = cliente.post("/productos", json=producto_ejemplo.dict())
+    response = cliente.post("/productos", json=producto_ejemplo.model_dump())
     assert response.status_code == status.HTTP_201_CREATED
     assert response.json()["nombre"] == "Laptop Gaming"
     assert UUID(response.json()["id"])
@@ -18,8 +19,8 @@ def test_obtener_producto_no_existente(cliente):
 
 def test_obtener_todos_los_productos(cliente, producto_ejemplo, producto_ejemplo_2):
     """Test para obtener todos los productos"""
-    cliente.post("/productos", json=producto_ejemplo.dict())
-    cliente.post("/productos", json=producto_ejemplo_2.dict())
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    cliente.post("/productos", json=producto_ejemplo_2.model_dump())
 
     response = cliente.get("/productos")
     assert response.status_code == status.HTTP_200_OK
@@ -27,7 +28,7 @@ def test_obtener_todos_los_productos(cliente, producto_ejemplo, producto_ejemplo
 
 def test_actualizar_producto(cliente, producto_ejemplo):
     """Test para actualizar un producto"""
-    crear_response = cliente.post("/productos", json=producto_ejemplo.dict())
+    crear_response = cliente.post("/productos", json=producto_ejemplo.model_dump())
     producto_id = crear_response.json()["id"]
 
     update_data = {"precio": 1299.99, "stock": 15}
@@ -39,7 +40,7 @@ def test_actualizar_producto(cliente, producto_ejemplo):
 
 def test_eliminar_producto(cliente, producto_ejemplo):
     """Test para eliminar un producto"""
-    crear_response = cliente.post("/productos", json=producto_ejemplo.dict())
+    crear_response = cliente.post("/productos", json=producto_ejemplo.model_dump())
     producto_id = crear_response.json()["id"]
 
     response = cliente.delete(f"/productos/{producto_id}")
@@ -50,10 +51,169 @@ def test_eliminar_producto(cliente, producto_ejemplo):
 
 def test_buscar_productos(cliente, producto_ejemplo, producto_ejemplo_2):
     """Test para buscar productos"""
-    cliente.post("/productos", json=producto_ejemplo.dict())
-    cliente.post("/productos", json=producto_ejemplo_2.dict())
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    cliente.post("/productos", json=producto_ejemplo_2.model_dump())
 
     response = cliente.get("/productos/buscar?q=gaming")
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) == 1
-    assert response.json()[0]["nombre"] == "Laptop Gaming"
\ No newline at end of file
+    assert response.json()[0]["nombre"] == "Laptop Gaming"
+
+def test_crear_producto_duplicado(cliente, producto_ejemplo):
+    """Test para rechazar productos con nombre repetido"""
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    response = cliente.post("/productos", json=producto_ejemplo.model_dump())
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_buscar_productos_sin_acentos_y_rating(cliente, producto_ejemplo, producto_ejemplo_2):
+    """Test para buscar ignorando acentos y filtrando por rating mínimo"""
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    cliente.post("/productos", json=producto_ejemplo_2.model_dump())
+
+    response = cliente.get("/productos/buscar?q=telefono")
+    assert [p["nombre"] for p in response.json()] == ["Smartphone Samsung"]
+
+    response = cliente.get("/productos/buscar?q=telefono&min_rating=4.4")
+    assert response.json() == []
+
+def crear_catalogo(cliente, cantidad):
+    """Crea productos con precios y ratings distintos"""
+    for i in range(cantidad):
+        cliente.post("/productos", json={
+            "nombre": f"Producto {i}",
+            "precio": 10.0 + (i * 7) % cantidad,
+            "categoria": "Tecnología",
+            "rating": (i % 5) + 0.5
+        })
+
+def test_paginacion_por_cursor(cliente):
+    """Test para recorrer el catálogo por páginas ordenadas por precio"""
+    crear_catalogo(cliente, 7)
+
+    precios = []
+    cursor = None
+    while True:
+        params = {"limit": 3, "ordenar_por": "precio", "orden": "desc"}
+        if cursor:
+            params["cursor"] = cursor
+        response = cliente.get("/productos", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        precios.extend(p["precio"] for p in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert precios == sorted(precios, reverse=True)
+    assert len(precios) == 7
+
+def test_filtros_de_rango_y_top(cliente):
+    """Test para filtrar por rangos y pedir los k mejor valorados de una categoría"""
+    crear_catalogo(cliente, 10)
+
+    response = cliente.get("/productos", params={"precio_min": 12, "precio_max": 15, "min_rating": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert all(12 <= p["precio"] <= 15 and p["rating"] >= 2 for p in response.json())
+    assert len(response.json()) == 2
+
+    response = cliente.get("/productos/top", params={"k": 3, "categoria": "tecnologia"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [p["rating"] for p in response.json()] == [4.5, 4.5, 3.5]
+
+    response = cliente.get("/productos", params={"precio_min": 20, "precio_max": 10})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_listado_explain(cliente):
+    """Test para obtener el plan de filtrado en lugar de los productos"""
+    crear_catalogo(cliente, 10)
+
+    response = cliente.get("/productos", params={"explain": "true", "min_rating": 4, "categoria": "Tecnología"})
+    assert response.status_code == status.HTTP_200_OK
+    plan = response.json()
+    assert plan["filas_retornadas"] == 2
+    assert plan["filas_escaneadas"] <= 10
+
+def test_autocompletar_y_busqueda_difusa(cliente, producto_ejemplo, producto_ejemplo_2):
+    """Test para sugerir por prefijo y encontrar nombres mal escritos"""
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    cliente.post("/productos", json=producto_ejemplo_2.model_dump())
+
+    response = cliente.get("/productos/autocompletar", params={"q": "sam"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [s["nombre"] for s in response.json()] == ["Smartphone Samsung"]
+    assert set(response.json()[0]) == {"id", "nombre", "categoria", "rating"}
+
+    response = cliente.get("/productos/buscar", params={"q": "smarphone", "difusa": "true"})
+    assert [p["nombre"] for p in response.json()] == ["Smartphone Samsung"]
+    assert cliente.get("/productos/buscar", params={"q": "smarphone"}).json() == []
+
+def test_paginacion_cursor_invalido(cliente):
+    """Test para rechazar cursores corruptos"""
+    response = cliente.get("/productos", params={"limit": 2, "cursor": "no-es-un-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_listado_ndjson(cliente):
+    """Test para obtener el catálogo como NDJSON en streaming"""
+    crear_catalogo(cliente, 4)
+
+    response = cliente.get("/productos", params={"formato": "ndjson", "ordenar_por": "rating"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    ratings = [json.loads(linea)["rating"] for linea in response.text.splitlines()]
+    assert ratings == sorted(ratings)
+    assert len(ratings) == 4
+
+def test_if_match_en_actualizar_y_eliminar(cliente, producto_ejemplo):
+    """Test para rechazar con 412 las escrituras sobre una versión desactualizada"""
+    response = cliente.post("/productos", json=producto_ejemplo.model_dump())
+    producto_id = response.json()["id"]
+    etag = response.headers["ETag"]
+    assert etag == '"1"' and response.json()["version"] == 1
+    assert cliente.get(f"/productos/{producto_id}").headers["ETag"] == etag
+
+    response = cliente.put(f"/productos/{producto_id}", json={"stock": 5}, headers={"If-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] == '"2"'
+
+    response = cliente.put(f"/productos/{producto_id}", json={"stock": 6}, headers={"If-Match": etag})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert response.headers["ETag"] == '"2"'
+
+    response = cliente.delete(f"/productos/{producto_id}", headers={"If-Match": 'W/"2"'})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    response = cliente.delete(f"/productos/{producto_id}", headers={"If-Match": '"2"'})
+    assert response.status_code == status.HTTP_200_OK
+
+def test_get_condicional_producto(cliente, producto_ejemplo):
+    """Test para responder 304 a un producto sin cambios y 200 tras modificarlo"""
+    producto_id = cliente.post("/productos", json=producto_ejemplo.model_dump()).json()["id"]
+    response = cliente.get(f"/productos/{producto_id}")
+    etag, modificado = response.headers["ETag"], response.headers["Last-Modified"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = cliente.get(f"/productos/{producto_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b"" and response.headers["ETag"] == etag
+    response = cliente.get(f"/productos/{producto_id}", headers={"If-Modified-Since": modificado})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    cliente.put(f"/productos/{producto_id}", json={"stock": 3})
+    response = cliente.get(f"/productos/{producto_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["stock"] == 3
+
+def test_get_condicional_listado(cliente, producto_ejemplo, producto_ejemplo_2):
+    """Test para validar los listados con el número de cambio del catálogo"""
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+    response = cliente.get("/productos", params={"categoria": "tecnología"})
+    etag = response.headers["ETag"]
+    assert "Last-Modified" in response.headers
+
+    response = cliente.get("/productos", params={"categoria": "tecnología"}, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = cliente.get("/productos", params={"formato": "ndjson"}, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    cliente.post("/productos", json=producto_ejemplo_2.model_dump())
+    response = cliente.get("/productos", params={"categoria": "tecnología"}, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
@@ -0,0 +1,43 @@
+from fastapi import status
+from profiling import Perfilador, perfilador
+
+def test_header_perfila_la_solicitud(cliente, producto_ejemplo, monkeypatch):
+    """Test para perfilar a pedido con tramos, Server-Timing y funciones más costosas"""
+    monkeypatch.setattr(perfilador, "habilitado", True)
+    monkeypatch.setattr(perfilador, "lentas", Perfilador().lentas)
+    cliente.post("/productos", json=producto_ejemplo.model_dump())
+
+    response = cliente.get("/productos", params={"categoria": "Tecnología"}, headers={"X-Profile": "1"})
+    assert response.status_code == status.HTTP_200_OK
+    assert "almacen-listar;dur=" in response.headers["Server-Timing"]
+
+    solicitudes = cliente.get("/debug/solicitudes-lentas").json()["solicitudes"]
+    assert len(solicitudes) == 1
+    guardada = solicitudes[0]
+    assert guardada["ruta"] == "/productos" and guardada["motivo"] == "header"
+    assert [t["tramo"] for t in guardada["tramos"]] == [
+        "validacion", "almacen.listar", "serializacion", "endpoint", "respuesta"
+    ]
+    assert guardada["funciones"]
+
+def test_umbral_guarda_solo_las_lentas(cliente, monkeypatch):
+    """Test para guardar las solicitudes sobre el umbral, sin perfil de funciones si no se muestrearon"""
+    monkeypatch.setattr(perfilador, "habilitado", True)
+    monkeypatch.setattr(perfilador, "lentas", Perfilador().lentas)
+    monkeypatch.setattr(perfilador, "umbral_ms", 0)
+
+    response = cliente.get("/productos")
+    assert "Server-Timing" not in response.headers
+    guardada = cliente.get("/debug/solicitudes-lentas").json()["solicitudes"][0]
+    assert guardada["motivo"] == "lenta" and guardada["funciones"] is None
+
+    monkeypatch.setattr(perfilador, "umbral_ms", 10_000)
+    cliente.get("/productos")
+    assert cliente.get("/debug/solicitudes-lentas").json()["guardadas"] == 2
+
+def test_deshabilitado_ignora_el_header(cliente):
+    """Test para no perfilar ni guardar nada con el perfilado deshabilitado"""
+    guardadas = len(perfilador.lentas)
+    response = cliente.get("/productos", headers={"X-Profile": "1"})
+    assert "Server-Timing" not in response.headers
+    assert len(perfilador.lentas) == guardadas
@@ -0,0 +1,186 @@
+import asyncio
+import sys
+import threading
+import time
+from uuid import uuid4
+from products import Producto
+from store import ProductStore
+from repository import ProductRepository
+from exceptions import ConflictoVersionError, ProductoDuplicadoError
+
+def crear(nombre):
+    """Crea un producto con ID listo para el repositorio"""
+    producto = Producto(nombre=nombre, precio=10.0, categoria="Tecnología")
+    producto.id = uuid4()
+    return producto
+
+def test_lecturas_concurrentes_se_solapan():
+    """Test para verificar que la latencia simulada no bloquea el event loop"""
+    repositorio = ProductRepository(ProductStore(), retraso=0.05)
+
+    async def escenario():
+        producto = await repositorio.crear(crear("Laptop"))
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(*(repositorio.obtener(producto.id) for _ in range(20)))
+        return producto, resultados, time.perf_counter() - inicio
+
+    producto, resultados, duracion = asyncio.run(escenario())
+    assert all(r is producto for r in resultados)
+    assert duracion < 0.5
+
+def test_pool_de_hilos():
+    """Test para ejecutar las operaciones en un pool de hilos acotado"""
+    repositorio = ProductRepository(ProductStore(), max_hilos=4)
+
+    async def escenario():
+        await asyncio.gather(*(repositorio.crear(crear(f"Producto {i}")) for i in range(50)))
+        return await repositorio.listar()
+
+    try:
+        assert len(asyncio.run(escenario())) == 50
+    finally:
+        repositorio.cerrar()
+
+def test_escrituras_concurrentes_sin_perdidas():
+    """Test de estrés: nombres únicos y ninguna actualización perdida con muchos hilos"""
+    repositorio = ProductRepository(ProductStore(), max_hilos=8)
+    incrementos = 200
+
+    async def incrementar(producto_id):
+        while True:
+            actual = await repositorio.obtener(producto_id)
+            try:
+                return await repositorio.actualizar(
+                    producto_id, {"stock": actual.stock + 1}, version_esperada=actual.version
+                )
+            except ConflictoVersionError:
+                await asyncio.sleep(0)
+
+    async def escenario():
+        intentos = [repositorio.crear(crear("Duplicado" if i % 2 else "DUPLICADO")) for i in range(40)]
+        creados = await asyncio.gather(*intentos, return_exceptions=True)
+        producto = next(p for p in creados if isinstance(p, Producto))
+        await asyncio.gather(*(incrementar(producto.id) for _ in range(incrementos)))
+        return creados, await repositorio.obtener(producto.id)
+
+    try:
+        creados, producto = asyncio.run(escenario())
+    finally:
+        repositorio.cerrar()
+    assert sum(isinstance(p, Producto) for p in creados) == 1
+    assert all(isinstance(p, (Producto, ProductoDuplicadoError)) for p in creados)
+    assert producto.stock == incrementos
+    assert producto.version == incrementos + 1
+    assert len(repositorio.locks) == 0
+
+def lecturas_con_escrituras(repositorio, base=2000, operaciones=400):
+    """Lista una categoría mientras se crean productos en ella; retorna las excepciones"""
+    for i in range(base):
+        repositorio.store.agregar(crear(f"Base {i}"))
+
+    async def escenario():
+        tareas = [
+            repositorio.crear(crear(f"Nuevo {i}")) if i % 2 else repositorio.listar(categoria="tecnologia")
+            for i in range(operaciones)
+        ]
+        return await asyncio.gather(*tareas, return_exceptions=True)
+
+    # Cambiar de hilo casi en cada instrucción hace que el recorrido se cruce con las escrituras
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        resultados = asyncio.run(escenario())
+    finally:
+        sys.setswitchinterval(intervalo)
+        repositorio.cerrar()
+    return [r for r in resultados if isinstance(r, Exception)]
+
+def test_lecturas_en_el_pool_no_ven_mutaciones_a_medias():
+    """Test para listar desde el pool de hilos mientras otros hilos escriben en el almacén en memoria"""
+    assert lecturas_con_escrituras(ProductRepository(ProductStore(), max_hilos=8)) == []
+
+def test_almacen_persistente_lee_mientras_espera_fsync(tmp_path, monkeypatch):
+    """Test para listar el almacén en memoria persistente mientras las escrituras esperan el fsync del WAL"""
+    import repository
+    from persistence import AlmacenDurable, WAL_ESPERAR_FSYNC
+    assert WAL_ESPERAR_FSYNC
+    monkeypatch.setattr(repository, "BACKEND_DB", "memoria")
+    monkeypatch.setattr(repository, "PERSISTENCIA_DIR", str(tmp_path))
+    monkeypatch.setattr(repository, "MAX_HILOS_DB", 0)
+    monkeypatch.setattr(repository, "RETRASO_DB", 0.0)
+    repositorio = repository.crear_repositorio()
+    hilos = set()
+    for nombre in ("agregar", "filtrar"):
+        operacion = getattr(repositorio.store, nombre)
+
+        def registrar(*args, operacion=operacion, **kwargs):
+            hilos.add(threading.current_thread())
+            return operacion(*args, **kwargs)
+        monkeypatch.setattr(repositorio.store, nombre, registrar)
+
+    assert lecturas_con_escrituras(repositorio) == []
+    # Solo la espera del fsync sale del event loop
+    assert hilos == {threading.main_thread()}
+    assert len(AlmacenDurable(str(tmp_path))) == 2000 + 200
+
+def test_sincronizar_escrituras_de_otro_proceso(tmp_path, monkeypatch):
+    """Test para replicar en un worker las escrituras que otro hizo en el SQLite compartido"""
+    import os
+    from sqlite_store import SQLiteBackend
+    ruta = str(tmp_path / "compartido.db")
+    otro = ProductRepository(SQLiteBackend(ruta))
+    local = ProductRepository(SQLiteBackend(ruta))
+    invalidaciones = []
+    local.suscribir(lambda operacion, producto: invalidaciones.append(operacion))
+
+    async def escenario():
+        await local.crear(crear("Silla"))
+        with monkeypatch.context() as m:
+            m.setattr(os, "getpid", lambda: -1)
+            producto = await otro.crear(crear("Lámpara Compartida"))
+            await otro.actualizar(producto.id, {"stock": 7})
+            await otro.crear(crear("Mesa"))
+            await otro.eliminar_lote([producto.id])
+        return await local.sincronizar(), await local.buscar("lampara"), await local.buscar("mesa")
+
+    try:
+        aplicados, lamparas, mesas = asyncio.run(escenario())
+    finally:
+        otro.cerrar()
+        local.cerrar()
+    assert aplicados == 4
+    assert lamparas == [] and [p.nombre for p in mesas] == ["Mesa"]
+    # La lámpara ya no existe al replicar su alta y su cambio: solo se propaga su baja
+    assert invalidaciones == ["crear", "crear", "eliminar"]
+    assert local.facetas_catalogo.resumen()["total"] == 2
+
+def test_numeros_de_cambio_compartidos_entre_workers(tmp_path, monkeypatch):
+    """Test para numerar el registro de cambios y el ETag igual en todos los workers de un SQLite compartido"""
+    import os
+    from changelog import RegistroCambios
+    from sqlite_store import SQLiteBackend
+    ruta = str(tmp_path / "compartido.db")
+    workers = [ProductRepository(SQLiteBackend(ruta)) for _ in range(2)]
+    registros = [RegistroCambios() for _ in workers]
+    for repositorio, registro in zip(workers, registros):
+        repositorio.suscribir_con_secuencia(registro.registrar)
+
+    async def escenario():
+        with monkeypatch.context() as m:
+            m.setattr(os, "getpid", lambda: -1)
+            producto = await workers[0].crear(crear("Mesa"))
+            await workers[0].actualizar(producto.id, {"stock": 3})
+        await workers[1].crear(crear("Silla"))
+        await workers[1].eliminar(producto.id)
+        for repositorio in workers:
+            await repositorio.sincronizar()
+
+    try:
+        asyncio.run(escenario())
+    finally:
+        for repositorio in workers:
+            repositorio.cerrar()
+    cambios = [[(c["secuencia"], c["operacion"], c["id"]) for c in registro.desde(0, 10)[0]] for registro in registros]
+    assert cambios[0] == cambios[1]
+    assert [operacion for _, operacion, _ in cambios[0]] == ["crear", "actualizar", "crear", "eliminar"]
+    assert workers[0].version_catalogo()[0] == workers[1].version_catalogo()[0] == cambios[0][-1][0]
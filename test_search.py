@@ -0,0 +1,88 @@
+from uuid import uuid4
+from products import Producto
+from search import IndiceBusqueda, normalizar
+
+def crear(nombre, descripcion=None, rating=0.0):
+    """Crea un producto con ID listo para indexar"""
+    producto = Producto(nombre=nombre, descripcion=descripcion, precio=10.0, categoria="Tecnología", rating=rating)
+    producto.id = uuid4()
+    return producto
+
+def ids(resultados):
+    return [producto_id for producto_id, _ in resultados]
+
+def test_normalizar_quita_acentos():
+    """Test para plegar acentos y mayúsculas"""
+    assert normalizar("Teléfono TECNOLOGÍA") == "telefono tecnologia"
+
+def test_busqueda_por_subcadena_y_sin_acentos():
+    """Test para encontrar productos por fragmentos de palabras sin importar los acentos"""
+    indice = IndiceBusqueda()
+    telefono = crear("Smartphone Samsung", "Teléfono inteligente con 128GB")
+    laptop = crear("Laptop Gaming", "Laptop para juegos")
+    indice.reconstruir([telefono, laptop])
+
+    assert ids(indice.buscar("telefono")) == [telefono.id]
+    assert ids(indice.buscar("fono")) == [telefono.id]
+    assert ids(indice.buscar("gam")) == [laptop.id]
+    assert ids(indice.buscar("lap jueg")) == [laptop.id]
+    assert indice.buscar("tablet") == []
+
+def test_nombre_pesa_mas_que_descripcion():
+    """Test para ordenar primero las coincidencias en el nombre"""
+    indice = IndiceBusqueda()
+    en_descripcion = crear("Mochila", "Ideal para laptop")
+    en_nombre = crear("Laptop Basica")
+    indice.reconstruir([en_descripcion, en_nombre])
+
+    assert ids(indice.buscar("laptop")) == [en_nombre.id, en_descripcion.id]
+
+def test_actualizacion_incremental():
+    """Test para reindexar y eliminar productos sin reconstruir el índice"""
+    indice = IndiceBusqueda()
+    producto = crear("Laptop Gaming")
+    indice.indexar(producto)
+
+    producto.nombre = "Monitor Curvo"
+    indice.indexar(producto)
+    assert indice.buscar("laptop") == []
+    assert ids(indice.buscar("curvo")) == [producto.id]
+
+    indice.eliminar(producto.id)
+    assert indice.buscar("curvo") == []
+    assert len(indice) == 0
+
+def test_busqueda_difusa_tolera_errores():
+    """Test para encontrar palabras mal escritas solo en modo difuso y con menos puntaje"""
+    indice = IndiceBusqueda()
+    telefono = crear("Smartphone Samsung")
+    laptop = crear("Laptop Gaming", "Portátil liviano")
+    indice.reconstruir([telefono, laptop])
+
+    assert indice.buscar("smarphone") == []
+    assert ids(indice.buscar("smarphone", difusa=True)) == [telefono.id]
+    assert ids(indice.buscar("samsnug laptp", difusa=True)) == []
+    assert ids(indice.buscar("portatl", difusa=True)) == [laptop.id]
+    # Las palabras cortas no admiten errores
+    assert indice.buscar("lap", difusa=True) != [] and indice.buscar("lzp", difusa=True) == []
+    assert indice.buscar("smartphone")[0][1] > indice.buscar("smarphone", difusa=True)[0][1]
+
+def test_autocompletar_por_rating():
+    """Test para sugerir por prefijo de cualquier palabra del nombre, los mejor valorados primero"""
+    indice = IndiceBusqueda()
+    gamer = crear("Laptop Gamer", rating=4.0)
+    oficina = crear("Laptop Oficina", rating=4.8)
+    lampara = crear("Lámpara de Escritorio", rating=3.0)
+    mouse = crear("Mouse Gaming", rating=4.5)
+    indice.reconstruir([gamer, oficina, lampara, mouse])
+
+    assert ids(indice.autocompletar("la", 10)) == [oficina.id, gamer.id, lampara.id]
+    assert ids(indice.autocompletar("LAPT", 1)) == [oficina.id]
+    assert ids(indice.autocompletar("gam", 10)) == [mouse.id, gamer.id]
+    assert ids(indice.autocompletar("laptop ga", 10)) == [gamer.id]
+    assert indice.autocompletar("xyz", 10) == []
+
+    oficina.rating = 1.0
+    indice.indexar(oficina)
+    indice.eliminar(lampara.id)
+    assert ids(indice.autocompletar("la", 10)) == [gamer.id, oficina.id]
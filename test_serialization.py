@@ -0,0 +1,54 @@
+from datetime import datetime
+from uuid import uuid4
+from fastapi import status
+import main
+from main import app
+from serialization import CacheJsonProductos, serializar_rapido
+from utils import serializar_json
+
+def crear(nombre, **campos):
+    """Crea un producto con ID y fechas como si viniera del almacén"""
+    ahora = datetime.now()
+    return main.Producto(
+        id=uuid4(), nombre=nombre, precio=10.5, categoria="Hogar",
+        fecha_creacion=ahora, fecha_actualizacion=ahora, **campos
+    )
+
+def test_serializacion_rapida_equivale_a_la_normal():
+    """Test para producir los mismos bytes que la serialización de FastAPI"""
+    productos = [crear("Lámpara \"Ñandú\"", descripcion="Luz cálida"), crear("Silla", rating=4.5)]
+    assert serializar_rapido(productos) == serializar_json(productos)
+    assert serializar_rapido(productos[0]) == serializar_json(productos[0])
+    assert serializar_rapido([]) == b"[]"
+    assert serializar_rapido({"a": 1}) == serializar_json({"a": 1})
+
+def test_cache_json_se_invalida_con_la_version():
+    """Test para volver a codificar un producto cuando cambia su versión aunque la fecha de actualización sea la misma"""
+    cache = CacheJsonProductos()
+    producto = crear("Mesa")
+    primero = cache.codificar(producto)
+    assert cache.codificar(producto) is primero
+
+    producto.precio = 20.0
+    producto.version += 1
+    assert b"20.0" in cache.codificar(producto)
+
+    cache.olvidar("eliminar", producto)
+    assert len(cache) == 0
+
+def test_endpoints_con_serializacion_rapida(cliente, producto_ejemplo, monkeypatch):
+    """Test para responder igual con la serialización rápida y mantener el esquema OpenAPI"""
+    monkeypatch.setattr(main, "SERIALIZACION_RAPIDA", True)
+
+    response = cliente.post("/productos", json=producto_ejemplo.model_dump())
+    assert response.status_code == status.HTTP_201_CREATED
+    creado = response.json()
+
+    response = cliente.put(f"/productos/{creado['id']}", json={"precio": 1200.0})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["precio"] == 1200.0
+
+    assert cliente.get(f"/productos/{creado['id']}").json()["precio"] == 1200.0
+    assert [p["id"] for p in cliente.get("/productos").json()] == [creado["id"]]
+    esquema = app.openapi()["paths"]["/productos"]["post"]["responses"]["201"]
+    assert esquema["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/Producto"}
@@ -0,0 +1,232 @@
+import random
+import pytest
+from uuid import uuid4
+from products import Producto
+from store import ProductStore
+from sqlite_store import SQLiteBackend
+from column_store import ColumnStore
+from exceptions import ProductoDuplicadoError, ProductoNoEncontradoError
+
+def crear(nombre, categoria="Tecnología", precio=100.0, disponible=True):
+    """Crea un producto con ID listo para el almacén"""
+    producto = Producto(nombre=nombre, precio=precio, categoria=categoria, disponible=disponible)
+    producto.id = uuid4()
+    return producto
+
+@pytest.fixture(params=["memoria", "sqlite", "columnar"])
+def store(request, tmp_path):
+    """Fixture que ejecuta cada test contra todos los backends"""
+    if request.param == "memoria":
+        yield ProductStore()
+    elif request.param == "columnar":
+        yield ColumnStore(capacidad_inicial=2)
+    else:
+        backend = SQLiteBackend(str(tmp_path / "productos.db"), tamano_pool=2)
+        yield backend
+        backend.cerrar()
+
+def test_agregar_y_obtener(store):
+    """Test para agregar un producto y recuperarlo por ID y nombre"""
+    producto = store.agregar(crear("Laptop"))
+    assert store.obtener(producto.id) == producto
+    assert store.obtener_por_nombre("LAPTOP") == producto
+    assert len(store) == 1
+
+def test_nombre_duplicado(store):
+    """Test para rechazar nombres repetidos sin distinguir mayúsculas"""
+    store.agregar(crear("Laptop"))
+    with pytest.raises(ProductoDuplicadoError):
+        store.agregar(crear("laptop"))
+
+def test_actualizar_mantiene_indices(store):
+    """Test para que los índices sigan al producto al actualizarlo"""
+    producto = store.agregar(crear("Laptop", categoria="Tecnología"))
+    producto = store.actualizar(producto.id, {"nombre": "Notebook", "categoria": "Oficina", "disponible": False})
+
+    assert store.obtener_por_nombre("Laptop") is None
+    assert store.obtener_por_nombre("Notebook") == producto
+    assert store.filtrar(categoria="tecnología") == []
+    assert store.filtrar(categoria="oficina", disponible=False) == [producto]
+
+def test_filtrar_combinado(store):
+    """Test para combinar filtros de disponibilidad, categoría y precio"""
+    barato = store.agregar(crear("Mouse", precio=20.0))
+    store.agregar(crear("Monitor", precio=300.0))
+    store.agregar(crear("Teclado", precio=50.0, disponible=False))
+    store.agregar(crear("Silla", categoria="Muebles", precio=10.0))
+
+    assert store.filtrar(disponible=True, categoria="Tecnología", precio_max=100) == [barato]
+
+def test_comparaciones_sin_acentos(store):
+    """Test para que nombres y categorías se comparen sin mayúsculas ni acentos"""
+    producto = store.agregar(crear("Teléfono", categoria="Electrónicos"))
+    with pytest.raises(ProductoDuplicadoError):
+        store.agregar(crear("TELEFONO"))
+
+    assert store.obtener_por_nombre("telefono") == producto
+    assert store.filtrar(categoria="electronicos") == [producto]
+    assert store.paginar(categoria="ELECTRÓNICOS")[0] == [producto]
+
+def test_claves_normalizadas_siguen_al_producto():
+    """Test para recalcular las claves al asignar un campo y no exponerlas al serializar"""
+    producto = crear("Canción", categoria="Música")
+    assert (producto.nombre_clave, producto.categoria_clave) == ("cancion", "musica")
+
+    producto.nombre = "Álbum"
+    assert producto.nombre_clave == "album"
+    assert "nombre_clave" not in producto.model_dump()
+    assert Producto.model_construct(nombre="Éxito", categoria="Ñandú").categoria_clave == "nandu"
+
+def test_producto_sin_validar_y_copia():
+    """Test para reconstruir sin validar un producto igual al validado y copiarlo sin compartir estado"""
+    producto = crear("Canción", categoria="Música")
+    reconstruido = Producto.sin_validar(**producto.model_dump())
+    assert reconstruido == producto
+    assert reconstruido.nombre_clave == "cancion"
+
+    copia = reconstruido.copia()
+    copia.nombre = "Álbum"
+    assert (copia.nombre_clave, reconstruido.nombre_clave) == ("album", "cancion")
+    assert reconstruido.model_copy(update={"stock": 3}).stock == 3
+    assert copia.model_dump(exclude_unset=True)["nombre"] == "Álbum"
+
+def test_producto_sin_validar_y_copia_conservan_campos_asignados():
+    """Test para que reconstruir y copiar un producto validado no cambien sus campos asignados"""
+    producto = crear("Canción", categoria="Música")
+    asignados = producto.model_dump(exclude_unset=True)
+    assert "stock" not in asignados
+
+    copia = producto.copia()
+    assert copia == producto
+    assert copia.model_dump(exclude_unset=True) == asignados
+    copia.stock = 3
+    assert "stock" in copia.model_dump(exclude_unset=True)
+    assert "stock" not in producto.model_dump(exclude_unset=True)
+
+    reconstruido = Producto.sin_validar(**asignados)
+    assert reconstruido == producto
+    assert reconstruido.model_dump(exclude_unset=True) == asignados
+    assert reconstruido.categoria_clave == "musica"
+
+    completo = Producto.sin_validar(**producto.model_dump())
+    assert completo == producto
+    assert completo.model_fields_set == set(Producto.model_fields)
+    assert completo.model_fields_set is not Producto.sin_validar(**producto.model_dump()).model_fields_set
+
+def test_eliminar(store):
+    """Test para eliminar un producto y liberar su nombre"""
+    producto = store.agregar(crear("Laptop"))
+    assert store.eliminar(producto.id) == producto
+    assert not store.existe_nombre("Laptop")
+    assert store.filtrar(categoria="Tecnología") == []
+    with pytest.raises(ProductoNoEncontradoError):
+        store.eliminar(producto.id)
+
+def test_sqlite_persiste_y_usa_wal(tmp_path):
+    """Test para reabrir la base SQLite y conservar el catálogo"""
+    ruta = str(tmp_path / "productos.db")
+    backend = SQLiteBackend(ruta, tamano_pool=1)
+    producto = backend.agregar(crear("Laptop"))
+    with backend._conexion() as conexion:
+        assert conexion.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    backend.cerrar()
+
+    reabierto = SQLiteBackend(ruta, tamano_pool=1)
+    assert reabierto.obtener(producto.id) == producto
+    assert len(reabierto) == 1
+    reabierto.cerrar()
+
+def test_paginar_por_cursor(store):
+    """Test para paginar por precio con filtros usando el cursor de cada página"""
+    for i, precio in enumerate([50.0, 10.0, 30.0, 10.0, 40.0, 20.0]):
+        store.agregar(crear(f"Producto {i}", precio=precio, disponible=i != 4))
+
+    vistos = []
+    cursor = None
+    while True:
+        pagina, cursor = store.paginar(
+            disponible=True, ordenar_por="precio", despues_de=cursor, limite=2
+        )
+        vistos.extend(p.precio for p in pagina)
+        if cursor is None:
+            break
+
+    assert vistos == [10.0, 10.0, 20.0, 30.0, 50.0]
+
+    pagina, cursor = store.paginar(ordenar_por="precio", descendente=True, limite=1)
+    assert [p.precio for p in pagina] == [50.0]
+    assert cursor is not None
+
+def test_filtros_de_rango_y_top_k(store):
+    """Test para comparar filtros de rango, órdenes y cursores contra una pasada completa"""
+    aleatorio = random.Random(7)
+    for i in range(60):
+        producto = crear(
+            f"Producto {i}",
+            categoria=aleatorio.choice(["Hogar", "Oficina", "Jardín"]),
+            precio=float(aleatorio.randint(1, 20)),
+            disponible=aleatorio.random() > 0.3
+        )
+        producto.rating = aleatorio.choice([0.0, 2.5, 4.0, 5.0])
+        producto.stock = aleatorio.randint(0, 10)
+        store.agregar(producto)
+    todos = list(store)
+
+    casos = [
+        {"precio_min": 5, "precio_max": 12},
+        {"min_rating": 4.0, "categoria": "hogar"},
+        {"stock_min": 9, "disponible": True},
+        {"precio_min": 19, "min_rating": 2.5, "stock_min": 1},
+        {"precio_min": 50},
+    ]
+    for filtros in casos:
+        esperados = [
+            p for p in todos
+            if (p.precio >= filtros.get("precio_min", 0) and p.precio <= filtros.get("precio_max", 1e9)
+                and p.rating >= filtros.get("min_rating", 0) and p.stock >= filtros.get("stock_min", 0)
+                and ("categoria" not in filtros or p.categoria == "Hogar")
+                and ("disponible" not in filtros or p.disponible))
+        ]
+        assert store.filtrar(**filtros) == esperados
+
+        for ordenar_por, descendente in [("precio", False), ("rating", True), (None, False)]:
+            clave = (lambda p: p.precio) if ordenar_por == "precio" else (lambda p: p.rating)
+            vistos, cursor = [], None
+            while True:
+                pagina, cursor = store.paginar(
+                    ordenar_por=ordenar_por, descendente=descendente, despues_de=cursor, limite=4, **filtros
+                )
+                vistos.extend(pagina)
+                if cursor is None:
+                    break
+            assert sorted(p.id for p in vistos) == sorted(p.id for p in esperados)
+            if ordenar_por is not None:
+                valores = [clave(p) for p in vistos]
+                assert valores == sorted(valores, reverse=descendente)
+
+        top, _ = store.paginar(ordenar_por="rating", descendente=True, limite=3, **filtros)
+        assert [p.rating for p in top] == sorted((p.rating for p in esperados), reverse=True)[:3]
+
+def test_columnar_compacta_borrados():
+    """Test para verificar que el almacén columnar compacta los huecos sin perder filas"""
+    store = ColumnStore(capacidad_inicial=2)
+    productos = [store.agregar(crear(f"Producto {i}", precio=float(i + 1))) for i in range(10)]
+    for producto in productos[:7]:
+        store.eliminar(producto.id)
+    assert len(store) == 3
+    assert [p.nombre for p in store] == ["Producto 7", "Producto 8", "Producto 9"]
+    assert store.obtener(productos[8].id).precio == 9.0
+    assert [p.nombre for p in store.filtrar(precio_max=9)] == ["Producto 7", "Producto 8"]
+
+def test_explicar_plan_de_filtrado(store):
+    """Test para describir el plan de filtrado y partir del índice más selectivo en memoria"""
+    for i in range(20):
+        store.agregar(crear(f"Producto {i}", categoria="Hogar" if i < 3 else "Oficina", precio=float(i + 1)))
+
+    plan = store.explicar(categoria="hogar", precio_max=10, disponible=True)
+    assert plan["filas_retornadas"] == 3
+    if isinstance(store, ProductStore):
+        assert plan["indice"] == "categoria"
+        assert plan["filas_escaneadas"] == 3
+        assert plan["alternativas"] == {"catalogo": 20, "categoria": 3, "disponible": 20, "precio": 10}
+        assert plan["predicados_residuales"] == ["disponible == True", "precio <= 10"]
@@ -0,0 +1,168 @@
+import heapq
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Productos que cada nodo guarda ya ordenados de su subárbol; acota el k de autocompletar
+TOP_K_NODO = 20
+
+# (-rating, id.int, id): el orden natural de las tuplas deja primero al mejor valorado y
+# desempata por un entero, sin llegar a comparar UUIDs, que se comparan en Python
+Entrada = Tuple[float, int, Any]
+
+
+class _Nodo:
+    __slots__ = ("etiqueta", "hijos", "propios", "mejores")
+
+    def __init__(self, etiqueta: str):
+        self.etiqueta = etiqueta
+        self.hijos: Dict[str, "_Nodo"] = {}
+        # Entradas de los tokens que terminan exactamente en este nodo, ordenadas
+        self.propios: List[Entrada] = []
+        # Top del subárbol sin repetir productos; None si cambió algo debajo desde que se calculó
+        self.mejores: Optional[List[Entrada]] = None
+
+
+def _largo_comun(a: str, b: str) -> int:
+    i = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        i += 1
+    return i
+
+
+class TriePrefijos:
+    """Trie comprimido (radix) de tokens con sus productos ordenados por rating.
+
+    Cada nodo cachea los TOP_K_NODO mejores productos de su subárbol; una
+    escritura invalida solo los nodos del camino de su token y el top se
+    recalcula al consultarlo mezclando los tops ya ordenados de los hijos.
+    Así autocompletar cuesta O(largo del prefijo + k) y no depende de cuántos
+    productos comparten el prefijo. No es seguro entre hilos: lo protege el
+    lock de IndiceBusqueda.
+    """
+
+    def __init__(self):
+        self._raiz = _Nodo("")
+
+    def limpiar(self):
+        self._raiz = _Nodo("")
+
+    def agregar(self, token: str, entrada: Entrada):
+        nodo = self._raiz
+        nodo.mejores = None
+        resto = token
+        while resto:
+            hijo = nodo.hijos.get(resto[0])
+            if hijo is None:
+                hijo = nodo.hijos[resto[0]] = _Nodo(resto)
+                resto = ""
+            else:
+                comun = _largo_comun(hijo.etiqueta, resto)
+                if comun < len(hijo.etiqueta):
+                    # El token se separa a mitad de la arista: se parte con un nodo intermedio
+                    medio = _Nodo(hijo.etiqueta[:comun])
+                    hijo.etiqueta = hijo.etiqueta[comun:]
+                    medio.hijos[hijo.etiqueta[0]] = hijo
+                    hijo = nodo.hijos[resto[0]] = medio
+                resto = resto[comun:]
+            nodo = hijo
+            nodo.mejores = None
+        insort(nodo.propios, entrada)
+
+    def quitar(self, token: str, entrada: Entrada):
+        camino = [self._raiz]
+        resto = token
+        while resto:
+            hijo = camino[-1].hijos.get(resto[0])
+            if hijo is None or not resto.startswith(hijo.etiqueta):
+                return
+            camino.append(hijo)
+            resto = resto[len(hijo.etiqueta):]
+
+        nodo = camino[-1]
+        i = bisect_left(nodo.propios, entrada)
+        if i < len(nodo.propios) and nodo.propios[i] == entrada:
+            del nodo.propios[i]
+        for visitado in camino:
+            visitado.mejores = None
+        self._compactar(camino)
+
+    def _compactar(self, camino: List[_Nodo]):
+        """Quita las hojas vacías y une los nodos sin entradas que quedaron con un solo hijo"""
+        for i in range(len(camino) - 1, 0, -1):
+            nodo, padre = camino[i], camino[i - 1]
+            if nodo.propios:
+                return
+            if not nodo.hijos:
+                del padre.hijos[nodo.etiqueta[0]]
+                continue
+            if len(nodo.hijos) == 1:
+                (hijo,) = nodo.hijos.values()
+                hijo.etiqueta = nodo.etiqueta + hijo.etiqueta
+                padre.hijos[hijo.etiqueta[0]] = hijo
+            return
+
+    def _nodo_prefijo(self, prefijo: str) -> Optional[_Nodo]:
+        """Nodo cuyo subárbol contiene exactamente los tokens que empiezan con el prefijo"""
+        nodo = self._raiz
+        resto = prefijo
+        while resto:
+            hijo = nodo.hijos.get(resto[0])
+            if hijo is None:
+                return None
+            if resto.startswith(hijo.etiqueta):
+                resto = resto[len(hijo.etiqueta):]
+            elif hijo.etiqueta.startswith(resto):
+                resto = ""
+            else:
+                return None
+            nodo = hijo
+        return nodo
+
+    def _mejores(self, nodo: _Nodo) -> List[Entrada]:
+        if nodo.mejores is None:
+            fuentes = [nodo.propios] + [self._mejores(hijo) for hijo in nodo.hijos.values()]
+            nodo.mejores = _primeros_distintos(heapq.merge(*fuentes), TOP_K_NODO)
+        return nodo.mejores
+
+    def mejores(self, prefijo: str, k: int, filtro: Optional[Callable[[Any], bool]] = None) -> List[Entrada]:
+        """Las k entradas de mejor rating entre los tokens con ese prefijo, un producto una vez.
+
+        Sin filtro y con k <= TOP_K_NODO sale del top cacheado; si no, recorre
+        el subárbol en orden de rating y se detiene al juntar k.
+        """
+        nodo = self._nodo_prefijo(prefijo)
+        if nodo is None:
+            return []
+        if filtro is None and k <= TOP_K_NODO:
+            return self._mejores(nodo)[:k]
+        entradas = self._recorrer(nodo)
+        if filtro is not None:
+            entradas = (entrada for entrada in entradas if filtro(entrada[2]))
+        return _primeros_distintos(entradas, k)
+
+    @staticmethod
+    def _recorrer(nodo: _Nodo) -> Iterator[Entrada]:
+        """Todas las entradas del subárbol en orden de rating, con repetidos, de forma perezosa"""
+        fuentes = []
+        pendientes = [nodo]
+        while pendientes:
+            actual = pendientes.pop()
+            if actual.propios:
+                fuentes.append(actual.propios)
+            pendientes.extend(actual.hijos.values())
+        return heapq.merge(*fuentes)
+
+
+def _primeros_distintos(entradas: Iterator[Entrada], k: int) -> List[Entrada]:
+    """Las primeras k entradas sin repetir id; un producto aparece bajo cada uno de sus tokens"""
+    vistos = set()
+    resultado = []
+    for entrada in entradas:
+        if entrada[1] not in vistos:
+            vistos.add(entrada[1])
+            resultado.append(entrada)
+            if len(resultado) == k:
+                break
+    return resultado
@@ -1,12 +1,18 @@
-import time
-from datetime import datetime
-from typing import List, Optional
+import asyncio
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, List, Optional, Tuple
 from uuid import UUID
-from models import Producto
+from products import Producto
+from store import StorageBackend
+from search import IndiceBusqueda
 
-def simular_retraso_db():
-    """Simula un pequeño retraso de base de datos"""
-    time.sleep(0.1)
+async def simular_retraso_db(segundos: float = 0.1):
+    """Simula un pequeño retraso de base de datos sin bloquear el event loop"""
+    await asyncio.sleep(segundos)
 
 def generar_timestamps() -> dict:
     """Genera timestamps de creación y actualización"""
@@ -20,61 +26,149 @@ def actualizar_timestamp() -> datetime:
     """Retorna el timestamp actual para actualizaciones"""
     return datetime.now()
 
+def serializar_json(contenido: Any) -> bytes:
+    """Serializa igual que JSONResponse para poder guardar el resultado en caché"""
+    from fastapi.encoders import jsonable_encoder
+    return json.dumps(
+        jsonable_encoder(contenido),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def resumir_errores_validacion(error) -> str:
+    """Convierte un ValidationError de Pydantic en un mensaje de una línea"""
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in detalle['loc'])}: {detalle['msg']}"
+        for detalle in error.errors()
+    )
+
+def codificar_cursor(ordenar_por: Optional[str], descendente: bool, clave: Tuple[Any, int]) -> str:
+    """Codifica el cursor (valor, seq) junto con el orden al que pertenece"""
+    datos = json.dumps([ordenar_por, descendente, list(clave)]).encode()
+    return base64.urlsafe_b64encode(datos).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str, ordenar_por: Optional[str], descendente: bool) -> Tuple[Any, int]:
+    """Decodifica un cursor y valida que corresponda al orden solicitado"""
+    from exceptions import CursorInvalidoError
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        orden, desc, (valor, seq) = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError, binascii.Error):
+        raise CursorInvalidoError("El cursor de paginación no es válido")
+    if orden != ordenar_por or desc != descendente or not isinstance(seq, int):
+        raise CursorInvalidoError("El cursor no corresponde al orden solicitado")
+    return valor, seq
+
+def etag_producto(version: int) -> str:
+    """ETag fuerte de un producto a partir de su número de versión"""
+    return f'"{version}"'
+
+def version_de_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Versión exigida por If-Match; None si no hay condición o es '*'"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    from exceptions import ConflictoVersionError
+    etiqueta = if_match.strip()
+    # If-Match usa comparación fuerte: una etiqueta débil nunca coincide
+    if etiqueta.startswith("W/") or len(etiqueta) < 3 or etiqueta[0] != '"' or etiqueta[-1] != '"':
+        raise ConflictoVersionError("If-Match debe ser un ETag fuerte del producto")
+    try:
+        return int(etiqueta[1:-1])
+    except ValueError:
+        raise ConflictoVersionError("If-Match debe ser un ETag fuerte del producto")
+
+def fecha_http(fecha: datetime) -> str:
+    """Formato IMF-fixdate de HTTP; las fechas sin zona se interpretan en hora local"""
+    if fecha.tzinfo is None:
+        fecha = fecha.astimezone()
+    return format_datetime(fecha.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+def es_no_modificado(headers, etag: Optional[str], ultima_modificacion: Optional[str]) -> bool:
+    """Evalúa If-None-Match o, si no viene, If-Modified-Since contra los validadores de la respuesta"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match usa comparación débil: se ignora el prefijo W/
+        etiqueta = etag.removeprefix("W/")
+        return any(candidata.strip().removeprefix("W/") == etiqueta for candidata in if_none_match.split(","))
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or ultima_modificacion is None:
+        return False
+    try:
+        return parsedate_to_datetime(ultima_modificacion) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
 def filtrar_productos(
-    productos: List[Producto],
+    productos: StorageBackend,
     disponible: Optional[bool] = None,
     categoria: Optional[str] = None,
-    precio_max: Optional[float] = None
+    precio_max: Optional[float] = None,
+    precio_min: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    stock_min: Optional[int] = None
 ) -> List[Producto]:
-    """Filtra productos según los criterios especificados"""
-    productos_filtrados = productos
-    
-    if disponible is not None:
-        productos_filtrados = [p for p in productos_filtrados if p.disponible == disponible]
-        
-    if categoria:
-        categoria_lower = categoria.lower()
-        productos_filtrados = [p for p in productos_filtrados if p.categoria.lower() == categoria_lower]
-    
-    if precio_max is not None:
-        if precio_max <= 0:
-            from exceptions import PrecioInvalidoError
-            raise PrecioInvalidoError("El precio máximo debe ser mayor a 0")
-        productos_filtrados = [p for p in productos_filtrados if p.precio <= precio_max]
+    """Filtra productos según los criterios especificados usando los índices del almacén"""
+    if precio_max is not None and precio_max <= 0:
+        from exceptions import PrecioInvalidoError
+        raise PrecioInvalidoError("El precio máximo debe ser mayor a 0")
+    if precio_min is not None and precio_max is not None and precio_min > precio_max:
+        from exceptions import PrecioInvalidoError
+        raise PrecioInvalidoError("El precio mínimo no puede ser mayor al precio máximo")
     
-    return productos_filtrados
+    return productos.filtrar(
+        disponible=disponible,
+        categoria=categoria,
+        precio_max=precio_max,
+        precio_min=precio_min,
+        min_rating=min_rating,
+        stock_min=stock_min
+    )
 
 def buscar_productos_por_texto(
-    productos: List[Producto],
+    productos: StorageBackend,
+    indice: IndiceBusqueda,
     query: str,
-    min_rating: Optional[float] = None
+    min_rating: Optional[float] = None,
+    difusa: bool = False
 ) -> List[Producto]:
-    """Busca productos por texto en nombre o descripción"""
+    """Busca productos por texto en nombre o descripción usando el índice invertido"""
     if len(query.strip()) < 2:
         from exceptions import BusquedaInvalidaError
         raise BusquedaInvalidaError("El término de búsqueda debe tener al menos 2 caracteres")
     
-    query_lower = query.lower()
     resultados = []
+    for producto_id, puntaje in indice.buscar(query, difusa=difusa):
+        producto = productos.obtener(producto_id)
+        if producto is None:
+            continue
+        if min_rating is None or producto.rating >= min_rating:
+            resultados.append((puntaje, producto))
     
-    for producto in productos:
-        if (query_lower in producto.nombre.lower() or 
-            (producto.descripcion and query_lower in producto.descripcion.lower())):
-            
-            if min_rating is None or producto.rating >= min_rating:
-                resultados.append(producto)
-    
-    return resultados
+    # A igual relevancia se prefieren los productos mejor valorados
+    resultados.sort(key=lambda item: (item[0], item[1].rating), reverse=True)
+    return [producto for _, producto in resultados]
+
+def autocompletar_productos(
+    productos: StorageBackend,
+    indice: IndiceBusqueda,
+    prefijo: str,
+    k: int
+) -> List[Producto]:
+    """Los k productos mejor valorados con una palabra del nombre que empieza con el prefijo"""
+    sugeridos = (productos.obtener(producto_id) for producto_id, _ in indice.autocompletar(prefijo, k))
+    return [producto for producto in sugeridos if producto is not None]
 
 def verificar_producto_duplicado(
-    productos: List[Producto],
+    productos: StorageBackend,
     nombre: str,
     exclude_id: Optional[UUID] = None
 ) -> bool:
     """Verifica si ya existe un producto con el mismo nombre"""
-    nombre_lower = nombre.lower()
-    for producto in productos:
-        if producto.nombre.lower() == nombre_lower:
-            if exclude_id is None or producto.id != exclude_id:
-                return True
-    return False
\ No newline at end of file
+    return productos.existe_nombre(nombre, exclude_id=exclude_id)
\ No newline at end of file